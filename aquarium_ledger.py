@@ -0,0 +1,87 @@
+# aquarium_ledger.py
+"""Sổ thu nhập thủy cung dạng đóng (closed-form).
+
+Mỗi user giữ `aqua_ledger = {"rate", "since", "banked"}`:
+- rate:   tổng thu nhập mỗi giờ của các cá đang nuôi (coins/giờ)
+- since:  mốc tính lãi gần nhất (giây epoch)
+- banked: thu nhập đã cộng dồn tới `since` nhưng chưa thu hoạch (có phần lẻ)
+
+Thu nhập chờ = banked + rate × (now - since) / 3600, không phải duyệt từng con cá.
+Sổ chỉ đổi khi thêm / bớt cá (chốt phần đã sinh rồi đổi rate) hoặc khi thu hoạch.
+Mỗi ô trong `aquarium` lưu sẵn rate + tên cá nên hiển thị cũng không cần tra kho.
+
+Các hàm ở đây thuần tuý (không I/O, không sửa tham số) — DataManager lo ghi.
+"""
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Tuple
+
+try:
+    from game_config import HOURLY_INCOME_RATE
+except Exception:
+    HOURLY_INCOME_RATE = 0.05  # 5% of fish value per hour
+
+Ledger = Dict[str, Any]
+
+
+def empty() -> Ledger:
+    return {"rate": 0.0, "since": 0, "banked": 0.0}
+
+
+def fish_rate(fish: Mapping[str, Any]) -> float:
+    """Thu nhập mỗi giờ của một con cá."""
+    try:
+        return float(fish.get("sell_price", 0) or 0) * HOURLY_INCOME_RATE
+    except Exception:
+        return 0.0
+
+
+def total_rate(aquarium: Mapping[str, dict]) -> float:
+    # Cộng lại từ các ô (tối đa vài con) thay vì +/- dồn để không trôi số thực
+    return float(sum(float(e.get("rate", 0) or 0) for e in aquarium.values()))
+
+
+def pending(ledger: Mapping[str, Any] | None, now: float) -> float:
+    """Thu nhập chờ tại thời điểm `now` (chưa làm tròn)."""
+    if not ledger:
+        return 0.0
+    elapsed = max(0.0, float(now) - float(ledger.get("since", now)))
+    return float(ledger.get("banked", 0) or 0) + float(ledger.get("rate", 0) or 0) * elapsed / 3600.0
+
+
+def settle(ledger: Mapping[str, Any] | None, now: float, rate: float | None = None) -> Ledger:
+    """Chốt thu nhập tới `now` vào banked; tuỳ chọn đổi rate từ thời điểm này."""
+    old = ledger or empty()
+    return {
+        "rate": float(old.get("rate", 0) or 0) if rate is None else float(rate),
+        "since": int(now),
+        "banked": pending(old, now) if ledger else 0.0,
+    }
+
+
+def collect(ledger: Mapping[str, Any] | None, now: float) -> Tuple[int, Ledger]:
+    """(số coins thu được, sổ mới). Phần lẻ dưới 1 coin được giữ lại cho lần sau."""
+    new = settle(ledger, now)
+    amount = int(new["banked"])
+    new["banked"] -= amount
+    return amount, new
+
+
+def from_legacy(aquarium: Mapping[str, dict], fishes_by_id: Mapping[str, dict], now: float) -> Tuple[Dict[str, dict], Ledger]:
+    """Chuyển bể cá kiểu cũ ({fish_id: {added_at}}) sang (ô có rate + tên, sổ) — chỉ chạy một lần.
+    Thu nhập đang chờ theo công thức cũ (theo từng phút trọn vẹn) được chuyển vào banked."""
+    entries: Dict[str, dict] = {}
+    banked = 0.0
+    for fid, data in aquarium.items():
+        fish = fishes_by_id.get(fid)
+        if fish is None:
+            continue
+        rate = fish_rate(fish)
+        added_at = int(data.get("added_at", now))
+        minutes = max(0, (int(now) - added_at) // 60)
+        banked += int(float(fish.get("sell_price", 0) or 0) * HOURLY_INCOME_RATE * (minutes / 60))
+        entries[fid] = {"added_at": added_at, "rate": rate, "name": fish.get("name", "Unknown")}
+    return entries, {"rate": total_rate(entries), "since": int(now), "banked": banked}
+
+
+def is_legacy(aquarium: Mapping[str, dict] | None, ledger: Mapping[str, Any] | None) -> bool:
+    return bool(aquarium) and (ledger is None or any("rate" not in e for e in aquarium.values()))
@@ -0,0 +1,135 @@
+# challenge_registry.py
+"""Bảng các thử thách câu cá đang chờ câu trả lời.
+
+Thay cho `bot.wait_for("message", check=...)` (discord.py chạy mọi check đang chờ trên
+mỗi tin nhắn → O(số người đang câu)): mỗi thử thách là một future được đánh key theo
+(channel_id, user_id); `on_message` trong main.py tra key đó trong O(1) và trả tin nhắn
+cho đúng future. Hết giờ do một timer wheel duy nhất xử lý (một task cho mọi thử thách).
+"""
+from __future__ import annotations
+import asyncio
+import math
+from typing import Any, Dict, Tuple
+
+Key = Tuple[int, int]
+
+
+class ChallengeRegistry:
+    def __init__(self, tick: float = 0.25, slots: int = 256):
+        self.tick = float(tick)
+        self.slots = int(slots)
+        # Mỗi ô của wheel: key -> [số vòng còn lại, future]
+        self._wheel: list[Dict[Key, list]] = [{} for _ in range(self.slots)]
+        self._pending: Dict[Key, Tuple[asyncio.Future, int]] = {}
+        self._cursor = 0
+        self._task: asyncio.Task | None = None
+        self._stats = {"registered": 0, "resolved": 0, "expired": 0, "cancelled": 0}
+
+    # ---------- Đăng ký / chờ ----------
+    def register(self, channel_id: int, user_id: int, timeout: float) -> asyncio.Future:
+        """Tạo future chờ tin nhắn của `user_id` trong `channel_id`; hết `timeout` giây thì
+        future nhận asyncio.TimeoutError. Thử thách cũ cùng key (nếu còn) bị huỷ."""
+        key = (int(channel_id), int(user_id))
+        self._cancel_key(key)
+        fut = asyncio.get_running_loop().create_future()
+        # +1 tick để không bao giờ hết giờ sớm hơn timeout (trễ tối đa một tick)
+        ticks = max(1, math.ceil(float(timeout) / self.tick)) + 1
+        slot = (self._cursor + ticks) % self.slots
+        self._wheel[slot][key] = [(ticks - 1) // self.slots, fut]
+        self._pending[key] = (fut, slot)
+        self._stats["registered"] += 1
+        self._ensure_ticker()
+        return fut
+
+    async def wait(self, channel_id: int, user_id: int, timeout: float) -> Any:
+        """Chờ tin nhắn trả lời; ném asyncio.TimeoutError khi hết giờ."""
+        key = (int(channel_id), int(user_id))
+        fut = self.register(channel_id, user_id, timeout)
+        try:
+            return await fut
+        finally:
+            self._discard(key, fut)
+
+    def resolve(self, message) -> bool:
+        """Gọi từ on_message: giao tin nhắn cho thử thách của tác giả trong kênh đó (nếu có)."""
+        key = (message.channel.id, message.author.id)
+        entry = self._pending.get(key)
+        if entry is None:
+            return False
+        fut, _ = entry
+        self._discard(key, fut)
+        if fut.done():
+            return False
+        fut.set_result(message)
+        self._stats["resolved"] += 1
+        return True
+
+    def cancel(self, channel_id: int, user_id: int) -> bool:
+        return self._cancel_key((int(channel_id), int(user_id)))
+
+    # ---------- Thống kê ----------
+    def active_count(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, active=len(self._pending))
+
+    async def close(self) -> None:
+        for key in list(self._pending):
+            self._cancel_key(key)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._task = None
+
+    # ---------- Nội bộ ----------
+    def _discard(self, key: Key, fut: asyncio.Future) -> None:
+        entry = self._pending.get(key)
+        if entry is None or entry[0] is not fut:
+            return
+        del self._pending[key]
+        self._wheel[entry[1]].pop(key, None)
+
+    def _cancel_key(self, key: Key) -> bool:
+        entry = self._pending.get(key)
+        if entry is None:
+            return False
+        fut = entry[0]
+        self._discard(key, fut)
+        if not fut.done():
+            fut.cancel()
+            self._stats["cancelled"] += 1
+        return True
+
+    def _ensure_ticker(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run_wheel())
+
+    async def _run_wheel(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.tick
+        while self._pending:
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            # Nếu event loop bị trễ, xử lý bù các tick đã lỡ
+            while loop.time() >= next_tick:
+                next_tick += self.tick
+                self._advance()
+
+    def _advance(self) -> None:
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        if not bucket:
+            return
+        for key, entry in list(bucket.items()):
+            if entry[0] > 0:
+                entry[0] -= 1
+                continue
+            fut = entry[1]
+            del bucket[key]
+            self._pending.pop(key, None)
+            if not fut.done():
+                fut.set_exception(asyncio.TimeoutError())
+                self._stats["expired"] += 1
@@ -1,23 +1,33 @@
 # cogs/aquarium.py
 from __future__ import annotations
+import asyncio
 import discord
 from discord.ext import commands
-import time
 from typing import Dict, Any
 
+from fish_catalog import EMOJI as FISH_EMO_MAP
+
 # =================================
 # Constants
 # =================================
 EMBED_COLOR = 0x00A9E0  # Deep Sky Blue
-HOURLY_INCOME_RATE = 0.05  # 5% of fish value per hour
 
-# Aquarium capacity by level
-AQUARIUM_CAPACITY = {
-    1: 2,
-    5: 3,
-    10: 4,
-    20: 5,
-}
+try:
+    from game_config import HOURLY_INCOME_RATE, AQUARIUM_CAPACITY
+except Exception:
+    HOURLY_INCOME_RATE = 0.05  # 5% of fish value per hour
+    # Aquarium capacity by level
+    AQUARIUM_CAPACITY = {
+        1: 2,
+        5: 3,
+        10: 4,
+        20: 5,
+    }
+
+try:
+    from game_config import AQUARIUM_AUTO_COLLECT
+except Exception:
+    AQUARIUM_AUTO_COLLECT = {"enabled": False, "interval": 3600, "batch_size": 200}
 
 def get_aquarium_capacity(level: int) -> int:
     """Gets the user's aquarium capacity based on their level."""
@@ -35,14 +45,42 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
     """Nuôi cá kiếm tiền offline    """
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self._task = None
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self._task and AQUARIUM_AUTO_COLLECT.get("enabled"):
+            self._task = asyncio.create_task(self._auto_collect())
+
+    def cog_unload(self):
+        try:
+            if self._task:
+                self._task.cancel()
+        except Exception:
+            pass
 
     # =================================
     # Helper Methods
     # =================================
-    def _get_full_fish_details(self, user_id: int) -> Dict[str, Any]:
-        """Returns a dict mapping fish_id to the full fish object."""
-        all_fishes = self.bot.data.get_fish_objects(user_id)
-        return {f["id"]: f for f in all_fishes}
+    def _get_full_fish_details(self, user_id: int, fish_ids) -> Dict[str, Any]:
+        """Returns a dict mapping fish_id to the full fish object (only for the given ids)."""
+        return {f["id"]: f for f in self.bot.data.get_fishes_by_ids(user_id, fish_ids)}
+
+    async def _auto_collect(self):
+        """Thu hoạch định kỳ cho mọi user (bật bằng AQUARIUM_AUTO_COLLECT["enabled"])."""
+        await self.bot.wait_until_ready()
+        interval = max(60, int(AQUARIUM_AUTO_COLLECT.get("interval", 3600)))
+        batch_size = int(AQUARIUM_AUTO_COLLECT.get("batch_size", 200))
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                users, coins = await self.bot.data.collect_all_aquariums(batch_size)
+                if users:
+                    print(f"🐠 Tự thu hoạch thủy cung: {users} users, {coins:,} coins")
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                print(f"⚠️ Lỗi tự thu hoạch thủy cung: {e}")
 
     # =================================
     # Main Command Group
@@ -60,51 +98,27 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
         capacity = get_aquarium_capacity(level)
         
         aquarium_data = self.bot.data.get_aquarium(user_id)
-        fish_details_map = self._get_full_fish_details(user_id)
-
-        # Build emoji map
-        fish_emoji_map = {}
-        try:
-            from cogs.fish import FISH_POOLS
-        except ImportError:
-            try:
-                from fish import FISH_POOLS
-            except ImportError:
-                FISH_POOLS = {}
-        if FISH_POOLS:
-            for pool in FISH_POOLS.values():
-                for f in pool:
-                    fish_emoji_map[f.get("name", "")] = f.get("emoji", "")
-        try:
-            from game_config import WEATHER_CONFIG
-            for w in WEATHER_CONFIG.values():
-                for f in w.get("special_fish", []):
-                    fish_emoji_map[f.get("name", "")] = f.get("emoji", "")
-        except Exception:
-            pass
-        
-        total_earnings = 0
+        pending, hourly = self.bot.data.get_aquarium_income(user_id)
+        total_earnings = int(pending)
+        # Ô kiểu cũ (chưa lưu tên / rate) mới phải tra kho
+        legacy_ids = [fid for fid, data in aquarium_data.items() if "rate" not in data]
+        fish_details_map = self._get_full_fish_details(user_id, legacy_ids) if legacy_ids else {}
         fish_lines = []
 
         if not aquarium_data:
             fish_lines.append("🌊 *Thủy cung của bạn trống trơn...*")
         else:
-            current_time = int(time.time())
             for fish_id, data in aquarium_data.items():
-                fish = fish_details_map.get(fish_id)
-                if not fish:
-                    continue
-
-                added_at = data.get("added_at", current_time)
-                minutes_passed = (current_time - added_at) // 60
-                hours_passed = minutes_passed / 60
-                earnings = int(fish.get("sell_price", 0) * HOURLY_INCOME_RATE * hours_passed)
-                total_earnings += earnings
-                
-                fname = fish.get('name', 'Unknown')
-                emo = fish_emoji_map.get(fname, "🐠")
+                if "rate" in data:
+                    fname, rate = data.get("name", "Unknown"), float(data["rate"])
+                else:
+                    fish = fish_details_map.get(fish_id)
+                    if not fish:
+                        continue
+                    fname, rate = fish.get("name", "Unknown"), fish.get("sell_price", 0) * HOURLY_INCOME_RATE
+                emo = FISH_EMO_MAP.get(fname) or "🐠"
                 fish_lines.append(
-                    f"{emo} **{fname}** (`{fish['id']}`) - Thu nhập: **{earnings:,}** coins"
+                    f"{emo} **{fname}** (`{fish_id}`) - Thu nhập: **{rate:,.0f}** coins/giờ"
                 )
 
         # Decorative Embed
@@ -112,7 +126,7 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
             title=f"🌊 Thủy Cung của {ctx.author.display_name} 🌊",
             description=f"Đây là nơi bạn nuôi những con cá quý giá nhất của mình.\n"
                         f"**Sức chứa:** {len(aquarium_data)} / {capacity}\n"
-                        f"**Tổng thu nhập chờ:** `{total_earnings:,}` coins",
+                        f"**Tổng thu nhập chờ:** `{total_earnings:,}` coins ({hourly:,.0f} coins/giờ)",
             color=EMBED_COLOR
         )
         embed.add_field(
@@ -141,21 +155,18 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
             await ctx.send("❌ **Lỗi:** Con cá này đã ở trong thủy cung rồi.")
             return
 
-        fish_details_map = self._get_full_fish_details(user_id)
-        if fish_id not in fish_details_map:
+        fish = self.bot.data.get_fish(user_id, fish_id)
+        if fish is None:
             await ctx.send("❌ **Lỗi:** Không tìm thấy con cá với mã này trong kho của bạn.")
             return
 
-        fish = fish_details_map[fish_id]
         if fish.get("rarity") == "trash":
             await ctx.send("❌ **Lỗi:** Rác không thể thả vào thủy cung!")
             return
 
-        current_time = int(time.time())
-        aquarium_data[fish_id] = {"added_at": current_time}
-        await self.bot.data.set_aquarium(user_id, aquarium_data)
+        await self.bot.data.add_to_aquarium(user_id, fish)
 
-        await ctx.send(f"✅ **Thành công!** Bạn đã thêm cá **{fish_details_map[fish_id]['name']}** (`{fish_id}`) vào thủy cung.")
+        await ctx.send(f"✅ **Thành công!** Bạn đã thêm cá **{fish['name']}** (`{fish_id}`) vào thủy cung.")
 
     @aqua.command(name="remove", aliases=["rm"], help="Lấy một con cá ra khỏi thủy cung. VD: `/aqua remove 4g7d`")
     async def aqua_remove(self, ctx: commands.Context, fish_id: str):
@@ -167,11 +178,9 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
             await ctx.send("❌ **Lỗi:** Con cá này không có trong thủy cung.")
             return
             
-        fish_details_map = self._get_full_fish_details(user_id)
-        fish_name = fish_details_map.get(fish_id, {}).get("name", "Không rõ")
+        fish_name = aquarium_data[fish_id].get("name") or (self.bot.data.get_fish(user_id, fish_id) or {}).get("name", "Không rõ")
 
-        del aquarium_data[fish_id]
-        await self.bot.data.set_aquarium(user_id, aquarium_data)
+        await self.bot.data.remove_from_aquarium(user_id, fish_id)
         
         await ctx.send(f"✅ **Thành công!** Bạn đã lấy cá **{fish_name}** (`{fish_id}`) ra khỏi thủy cung. Nó đã được trả về kho đồ.")
 
@@ -180,42 +189,19 @@ class AquariumCog(commands.Cog, name="Thủy Cung"):
         """Collects all generated income from the aquarium."""
         user_id = ctx.author.id
         aquarium_data = self.bot.data.get_aquarium(user_id)
-        
-        if not aquarium_data:
+        pending, _ = self.bot.data.get_aquarium_income(user_id)
+
+        if not aquarium_data and pending < 1:
             await ctx.send("❌ **Lỗi:** Thủy cung của bạn trống, không có gì để thu hoạch.")
             return
 
-        fish_details_map = self._get_full_fish_details(user_id)
-        
-        total_earnings = 0
-        current_time = int(time.time())
-        
-        for fish_id, data in aquarium_data.items():
-            fish = fish_details_map.get(fish_id)
-            if not fish:
-                continue
-
-            added_at = data.get("added_at", current_time)
-            minutes_passed = (current_time - added_at) // 60
-            
-            if minutes_passed < 1:
-                continue
-
-            hours_passed = minutes_passed / 60
-            earnings = int(fish.get("sell_price", 0) * HOURLY_INCOME_RATE * hours_passed)
-            total_earnings += earnings
-            
-            # Reset the timer for this fish
-            aquarium_data[fish_id]["added_at"] = current_time
+        # Thu nhập chờ + cộng ví trong một lần ghi (sổ thu nhập, không duyệt từng con cá)
+        total_earnings = await self.bot.data.collect_aquarium(user_id)
 
         if total_earnings <= 0:
             await ctx.send("🐠 Dường như chưa có thu nhập nào mới. Hãy chờ thêm một chút!")
             return
 
-        # Update the database
-        await self.bot.data.set_aquarium(user_id, aquarium_data)
-        await self.bot.data.add_money(user_id, total_earnings)
-
         await ctx.send(f"🎉 **Thành công!** Bạn đã thu hoạch được **{total_earnings:,}** coins từ thủy cung!")
 
 
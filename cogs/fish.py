@@ -1,771 +1,551 @@
-# cogs/fish.py
-import random
-import asyncio
-import discord
-import time
-import uuid
-from discord.ext import commands
-from typing import Dict
-
-# ---- Thử import cấu hình chung (nếu có) ----
-try:
-    from game_config import (
-        ROD_TIERS, MAX_ROD_LEVEL, BASE_CHALLENGE, XP_PER_CATCH, FISH_POOLS,
-        RARITY_DISPLAY, RARITY_COLORS, WEATHER_CONFIG, GEM_SETTINGS,
-        FISHING_CONFIG, BASE_LUCK,
-        PRICE_PER_KG_BY_RARITY, WEIGHT_BY_RARITY, WEIGHT_CLASS_BOUNDS, WEIGHT_CLASS_NAMES, WEIGHT_CLASS_PROBS, WEIGHT_CLASS_PCT_RANGES
-    )
-except Exception:
-    # Fallback cấu hình mặc định nếu chưa tạo game_config.py
-    ROD_TIERS = {
-        1: {"name": "Cần Tre",        "cost": 0,     "bonus": 0, "len_add": 0, "timeout_sub": 0.0},
-        2: {"name": "Cần Gỗ",         "cost": 500,   "bonus": 1, "len_add": 2, "timeout_sub": 0.5},
-        3: {"name": "Cần Sắt",        "cost": 2000,  "bonus": 2, "len_add": 4, "timeout_sub": 1.0},
-        4: {"name": "Cần Carbon",     "cost": 8000,  "bonus": 3, "len_add": 6, "timeout_sub": 1.5},
-        5: {"name": "Cần Huyền Thoại","cost": 25000, "bonus": 4, "len_add": 8, "timeout_sub": 2.0},
-    }
-    MAX_ROD_LEVEL = max(ROD_TIERS)
-    FISH_POOLS = {}
-    RARITY_DISPLAY = {"common": "Common", "uncommon": "Uncommon", "rare": "Rare", "epic": "Epic"}
-    RARITY_COLORS  = {"common": 0x95A5A6, "uncommon": 0x2ECC71, "rare": 0x3498DB, "epic": 0xF1C40F}
-    WEATHER_CONFIG = {}
-    BASE_CHALLENGE = {"len_min": 4, "len_max": 5, "timeout": 5.0}
-    XP_PER_CATCH = 20
-    GEM_SETTINGS = {"gem_per_rarity": {"epic": 1}, "aurora_multiplier": 2, "daily_min": 1, "daily_max": 3, "sell_item_gems_default": 1}
-    FISHING_CONFIG = {
-        "trash":     {"base_weight": 10000, "luck_factor": 0.0},
-        "common":    {"base_weight": 5000,  "luck_factor": 0.1},
-        "uncommon":  {"base_weight": 2500,  "luck_factor": 0.5},
-        "rare":      {"base_weight": 1000,  "luck_factor": 1.0},
-        "epic":      {"base_weight": 500,   "luck_factor": 2.0},
-        "legendary": {"base_weight": 100,   "luck_factor": 5.0},
-        "mythical":  {"base_weight": 10,    "luck_factor": 15.0},
-    }
-    BASE_LUCK = 1
-    PRICE_PER_KG_BY_RARITY = {"trash": 5, "common": 10, "uncommon": 30, "rare": 120, "epic": 500}
-    WEIGHT_BY_RARITY = {"common": (0.2, 1.5), "uncommon": (0.5, 3.0), "rare": (1.0, 6.0), "epic": (2.0, 10.0)}
-    WEIGHT_CLASS_BOUNDS = [0.0, 1.0, 3.0, 7.0, 9999.0]
-    WEIGHT_CLASS_NAMES = ["tiny", "normal", "huge", "gigantic"]
-    WEIGHT_CLASS_PROBS = {"tiny": 0.15, "normal": 0.60, "huge": 0.23, "gigantic": 0.02}  # fallback probs
-
-# ===== Cấu hình thử thách (emoji) =====
-EMO_D = "<:D_:1469386519784587489>"
-EMO_F = "<:F_:1469386706753945803>"
-EMO_J = "<:J_:1469386607357333504>"
-EMO_K = "<:K_:1469386724646850804>"
-EMO_SET = [EMO_D, EMO_F, EMO_J, EMO_K]
-# Shiny constants
-SHINY_BASE = 0.001  # 0.1% base chance
-SPARKLE = "✨"  # emoji lấp lánh hiển thị trước emoji cá
-SHINY_SELL_MULT = 20  # giá bán gấp 20 lần
-# SPECIAL_VS_NORMAL_SCALE: hệ số để giảm tỉ lệ xuất hiện của cá thời tiết so với một con cá 'bình thường' trong cùng độ hiếm.
-# Nếu muốn cá thời tiết ít xuất hiện hơn, giảm giá trị này xuống (ví dụ 0.8), nếu muốn tăng thì nâng lên.
-SPECIAL_VS_NORMAL_SCALE = 0.8
-
-MAP_EMO_TO_CHAR = {
-    EMO_D: "d",
-    EMO_F: "f",
-    EMO_J: "j",
-    EMO_K: "k",
-}
-
-def gen_challenge(n_min: int, n_max: int):
-    """Sinh chuỗi emoji và đáp án tương ứng."""
-    n = random.randint(n_min, n_max)
-    chosen = [random.choice(EMO_SET) for _ in range(n)]
-    display = " - ".join(chosen)
-    expected = "".join(MAP_EMO_TO_CHAR[e] for e in chosen)
-    return display, expected
-
-def normalize_letters(s: str) -> str:
-    """Chuẩn hóa input: chỉ giữ d/f/j/k, bỏ khoảng trắng, lower."""
-    s = s.lower()
-    return "".join(c for c in s if c in ("d", "f", "j", "k"))
-
-
-class FishCog(commands.Cog, name="Fishing"):
-    """Lệnh câu cá cơ bản"""
-    # --- Helper for weighted fish selection ---
-    def pick_fish_by_rate(self, rarity):
-        pool = FISH_POOLS.get(rarity, []) if isinstance(FISH_POOLS, dict) else []
-        if not pool:
-            # fallback placeholder nếu không có định nghĩa cá cho bậc rarity
-            return {
-                "name": f"{RARITY_DISPLAY.get(rarity, rarity.title())} Fish",
-                "emoji": "",
-                "price_per_kg": PRICE_PER_KG_BY_RARITY.get(rarity, 10),
-                "rate": 1
-            }
-        weights = [float(f.get("rate", 1)) for f in pool]
-        return random.choices(pool, weights=weights, k=1)[0]
-
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.current_weather = None
-        self.weather_task = None
-        self.weather_end_time = 0
-
-    @commands.Cog.listener()
-    async def on_ready(self):
-        # start weather watcher once bot is ready
-        if not self.weather_task:
-            self.weather_task = asyncio.create_task(self._weather_watcher())
-
-    def cog_unload(self):
-        # cancel background task on unload
-        try:
-            if self.weather_task:
-                self.weather_task.cancel()
-        except Exception:
-            pass
-
-    async def _weather_watcher(self):
-        while True:
-            try:
-                self._set_new_weather()
-            except Exception:
-                pass
-            # Chọn thời lượng dựa trên thời tiết hiện tại
-            duration = 60
-            if self.current_weather:
-                duration = int(WEATHER_CONFIG.get(self.current_weather, {}).get("duration", 60))
-            self.weather_end_time = time.time() + duration
-            await asyncio.sleep(duration)
-
-    def _set_new_weather(self):
-        # Chọn thời tiết mới dựa trên tỉ lệ trong WEATHER_CONFIG
-        if not WEATHER_CONFIG:
-            # không có cấu hình thời tiết → vô hiệu hoá
-            self.current_weather = None
-            return
-        weather_types = list(WEATHER_CONFIG.keys())
-        rates = [float(WEATHER_CONFIG.get(w, {}).get("rate", 0)) for w in weather_types]
-        # Nếu tất cả weights đều 0, bỏ qua việc chọn
-        if not any(rates):
-            self.current_weather = None
-            return
-        self.current_weather = random.choices(weather_types, weights=rates, k=1)[0]
-
-    def get_current_weather(self):
-        if not self.current_weather:
-            self._set_new_weather()
-        return self.current_weather, WEATHER_CONFIG.get(self.current_weather, {})
-
-    @commands.hybrid_command(
-        name="fish",
-        aliases=["f"],
-        help="Câu cá: Gõ đúng chuỗi emoji (dfjk) trong thời gian giới hạn."
-    )
-    @commands.cooldown(rate=1, per=10, type=commands.BucketType.user)  # cooldown theo user
-    @commands.max_concurrency(1, per=commands.BucketType.user, wait=True)  # hàng đợi theo user
-    async def fish(self, ctx: commands.Context):
-        # Check inventory limit
-        if hasattr(self.bot, "data"):
-            try:
-                current_fish = self.bot.data.get_fish_objects(ctx.author.id)
-                if len(current_fish) >= 40:
-                    msg = "🚫 **Kho cá đã đầy (40/40)!**\nBạn cần bán bớt cá bằng lệnh `/sell` hoặc `/sellall` trước khi câu tiếp."
-                    if ctx.interaction:
-                        await ctx.send(msg, ephemeral=True)
-                    else:
-                        await ctx.send(msg)
-                    return
-            except Exception:
-                pass
-
-        # 1) Lấy cấp cần & tính độ khó + số cá thưởng
-        lvl = 1
-        if hasattr(self.bot, "data"):
-            try:
-                lvl = self.bot.data.get_rod_level(ctx.author.id)
-            except Exception:
-                pass
-        tier = ROD_TIERS.get(lvl, ROD_TIERS[1])
-
-        base_min = int(BASE_CHALLENGE["len_min"])
-        base_max = int(BASE_CHALLENGE["len_max"])
-        base_timeout = float(BASE_CHALLENGE["timeout"])
-
-        # Áp dụng buffs từ item đang trang bị
-        try:
-            equipped = []
-            if hasattr(self.bot, "data"):
-                equipped = self.bot.data.get_equipped_items(ctx.author.id)
-        except Exception:
-            equipped = []
-        try:
-            from game_items import ITEMS as GAME_ITEMS
-        except Exception:
-            GAME_ITEMS = {}
-
-        total_timeout_add = 0.0
-        total_len_sub = 0
-        # Buffs from equipped items (convert fish_flat -> luck, handled later)
-        if equipped and GAME_ITEMS:
-            for it in equipped:
-                g = GAME_ITEMS.get(it, {})
-                buffs = g.get("buffs", {}) if g else {}
-                total_timeout_add += float(buffs.get("timeout_add", 0.0))
-                total_len_sub += int(buffs.get("len_sub", 0))
-        # Buffs from pets (passive)
-        try:
-            from game_pets import PETS as GAME_PETS
-        except Exception:
-            GAME_PETS = {}
-        try:
-            pets = []
-            if hasattr(self.bot, "data"):
-                pets = self.bot.data.get_active_pets(ctx.author.id)
-        except Exception:
-            pets = []
-        if pets and GAME_PETS:
-            for pid in pets:
-                p = GAME_PETS.get(pid, {})
-                buffs = p.get("buffs", {}) if p else {}
-                total_timeout_add += float(buffs.get("timeout_add", 0.0))
-                total_len_sub += int(buffs.get("len_sub", 0))
-
-        effective_len_add = max(0, int(tier["len_add"]) - total_len_sub)
-        n_min = base_min + effective_len_add
-        n_max = base_max + effective_len_add
-        timeout = max(1.5, base_timeout - float(tier["timeout_sub"]) + float(total_timeout_add))  # không thấp hơn 1.5s
-        # Single-catch mechanic: always catch one fish per success. Legacy "bonus"/"fish_flat" removed.
-        fish_count = 1
-
-        # Áp dụng buff từ thời tiết (không còn tăng số cá; chỉ hỗ trợ các buff khác như 'shiny_mult' / 'gem_mult')
-        try:
-            w_key_tmp, w_info_tmp = self.get_current_weather()
-        except Exception:
-            w_key_tmp, w_info_tmp = None, {}
-
-        # Lưu thông tin weather dùng lại sau để xử lý shiny và special fish
-        try:
-            w_key, w_info = self.get_current_weather()
-        except Exception:
-            w_key, w_info = None, {}
-        weather_shiny_mult = float(w_info.get('buff', {}).get('shiny_mult', 1)) if isinstance(w_info, dict) else 1
-        weather_specials = w_info.get('special_fish', []) if isinstance(w_info, dict) else []
-
-        # --- Compute Luck (Moved up for display) ---
-        def _safe_float(v, default=0.0):
-            try:
-                return float(v)
-            except Exception:
-                return default
-
-        # Compute luck & weight multiplier
-        luck = float(BASE_LUCK) # Start from BASE_LUCK
-        user_weight_mult = 1.0
-
-        def _apply_w_mult(curr, props):
-            try:
-                val = float(props.get('weight_mult', 0))
-                if val > 0:
-                    return curr * val
-            except:
-                pass
-            return curr
-
-        try:
-            # Items
-            eq = []
-            if hasattr(self.bot, "data"):
-                eq = self.bot.data.get_equipped_items(ctx.author.id)
-            try:
-                from game_items import ITEMS as GAME_ITEMS
-            except Exception:
-                GAME_ITEMS = {}
-            for it in eq:
-                g = GAME_ITEMS.get(it, {})
-                buffs = g.get('buffs', {}) if g else {}
-                luck += _safe_float(buffs.get('luck', 0))
-                user_weight_mult = _apply_w_mult(user_weight_mult, buffs)
-            # Pets
-            try:
-                from game_pets import PETS as GAME_PETS
-            except Exception:
-                GAME_PETS = {}
-            pets = []
-            try:
-                if hasattr(self.bot, "data"):
-                    pets = self.bot.data.get_active_pets(ctx.author.id)
-            except Exception:
-                pets = []
-            for pid in pets:
-                p = GAME_PETS.get(pid, {})
-                buffs = p.get('buffs', {}) if p else {}
-                luck += _safe_float(buffs.get('luck', 0))
-                user_weight_mult = _apply_w_mult(user_weight_mult, buffs)
-            # Rod
-            try:
-                if hasattr(self.bot, "data"):
-                    rl = self.bot.data.get_rod_level(ctx.author.id)
-                    rod_data = ROD_TIERS.get(rl, {})
-                    luck += _safe_float(rod_data.get('luck', 0))
-                    user_weight_mult = _apply_w_mult(user_weight_mult, rod_data)
-            except Exception:
-                pass
-            # Weather-provided luck buff (if any)
-            try:
-                luck += _safe_float(w_info.get('buff', {}).get('luck', 0))
-            except Exception:
-                pass
-        except Exception:
-            pass
-
-
-        # 2) Tạo thử thách
-        challenge_emojis, expected_letters = gen_challenge(n_min, n_max)
-
-        demo = f"{EMO_D}=d  {EMO_F}=f  {EMO_J}=j  {EMO_K}=k"
-        embed = discord.Embed(
-            title="🎣 Thử thách câu cá",
-            description=(
-                f"**{ctx.author.display_name}**\n"
-                f"Trong **{timeout:.1f}s**, hãy nhập **chỉ** các chữ cái **dfjk** đúng với chuỗi emoji sau (theo thứ tự):\n"
-                f"{challenge_emojis}\n"
-            ),
-            color=0xE67E22,
-        )
-        bonus_parts = []
-        if total_timeout_add:
-            bonus_parts.append(f"+{total_timeout_add:.1f}s time")
-        if total_len_sub:
-            bonus_parts.append(f"-{int(total_len_sub)} len")
-        # show current rod & user's luck in footer
-        try:
-            footer_luck = f" | Luck hiện tại: {luck:.2f}"
-        except Exception:
-            footer_luck = ""
-        embed.set_footer(text=f"Cấp cần: Lv.{lvl} — {tier['name']}{footer_luck}")
-        
-        # Xử lý hiển thị thử thách (Ephemeral nếu là Slash Command)
-        if ctx.interaction:
-            guide_msg = await ctx.send(embed=embed, ephemeral=True)
-        else:
-            # Text command: Xóa lệnh gọi và gửi tin nhắn thường
-            try:
-                await ctx.message.delete()
-            except Exception:
-                pass
-            guide_msg = await ctx.send(embed=embed)
-
-        # 3) Chờ input trong thời gian 'timeout'
-        def check(m: discord.Message) -> bool:
-            return m.author.id == ctx.author.id and m.channel.id == ctx.channel.id
-
-        try:
-            reply: discord.Message = await self.bot.wait_for("message", timeout=timeout, check=check)
-        except asyncio.TimeoutError:
-            await ctx.send(f"⏰ {ctx.author.mention} Quá chậm! Cá đã bơi mất!")
-            return
-
-        user_letters = normalize_letters(reply.content)
-
-        # 4) Kiểm tra kết quả
-        if user_letters != expected_letters:
-            await ctx.send(f"❌ {ctx.author.mention} Nhập sai chuỗi, cá đã bơi mất!")
-            return
-
-        # --- THUẬT TOÁN CÂU CÁ MỚI (Weighted Random + Luck) ---
-        rarities = []
-        final_weights = []
-        
-        for r, cfg in FISHING_CONFIG.items():
-            base = cfg.get("base_weight", 0)
-            factor = cfg.get("luck_factor", 0)
-            # Công thức: Weight_Cuối = Base * (1 + (Luck * Factor / 100))
-            w = base * (1 + (luck * factor / 100.0))
-            rarities.append(r)
-            final_weights.append(w)
-            
-        # Chọn ngẫu nhiên theo trọng số
-        picked_rarity = random.choices(rarities, weights=final_weights, k=1)[0]
-        
-        # Tính phần trăm hiển thị (cho debug/log)
-        total_w = sum(final_weights)
-        perc = {r: (w / total_w) * 100 for r, w in zip(rarities, final_weights)}
-
-        # Determine if a weather special overrides
-        selected_special = None
-        if weather_specials:
-            for s in weather_specials:
-                try:
-                    if s.get('rarity') != picked_rarity:
-                        continue
-                    pool_len = max(1, len(FISH_POOLS.get(picked_rarity, [])))
-                    avg_normal = 1.0 / pool_len
-                    specified = s.get('chance', None)
-                    if specified is None:
-                        chance = avg_normal * SPECIAL_VS_NORMAL_SCALE
-                    else:
-                        chance = min(float(specified), avg_normal * 0.95)
-                    if random.random() < float(chance):
-                        selected_special = s
-                        break
-                except Exception:
-                    continue
-
-        fish_name = None
-        fish_emoji = ""
-        fish_entry = None
-        is_shiny = False
-        if selected_special:
-            fish_name = selected_special.get('name')
-            fish_emoji = selected_special.get('emoji', '')
-            # treat special as normal capture (no shiny)
-        else:
-            fish_entry = self.pick_fish_by_rate(picked_rarity)
-            fish_name = fish_entry.get('name')
-            fish_emoji = fish_entry.get('emoji', '')
-            # shiny chance
-            fish_shiny_mult = float(fish_entry.get('shiny_mult', 1.0))
-            shiny_chance = float(SHINY_BASE) * fish_shiny_mult * weather_shiny_mult
-            is_shiny = random.random() < shiny_chance
-
-        # Determine weight class by probability
-        try:
-            probs = [WEIGHT_CLASS_PROBS.get(n, 0) for n in WEIGHT_CLASS_NAMES]
-            wc = random.choices(WEIGHT_CLASS_NAMES, weights=probs, k=1)[0]
-        except Exception:
-            wc = random.choice(WEIGHT_CLASS_NAMES)
-
-        # Determine a base_weight (kg) for the fish: per-fish override 'base_weight' (expected integer),
-        # otherwise derive from rarity default range midpoint.
-        try:
-            source = fish_entry if fish_entry else (selected_special if selected_special else {})
-            if source and (source.get('base_weight') is not None):
-                base_w = float(source.get('base_weight'))
-            else:
-                wmin, wmax = WEIGHT_BY_RARITY.get(picked_rarity, (0.5, 2.0))
-                base_w = (float(wmin) + float(wmax)) / 2.0
-        except Exception:
-            base_w = 1.0
-
-        # Percent ranges per class: try to get from config, otherwise use defaults
-        try:
-            pct_ranges = WEIGHT_CLASS_PCT_RANGES
-        except Exception:
-            pct_ranges = {
-                'tiny': (0.5, 0.7),
-                'normal': (0.9, 1.1),
-                'huge': (1.5, 2.5),
-                'gigantic': (5.0, 7.0),
-            }
-
-        try:
-            pmin, pmax = pct_ranges.get(wc, (0.9, 1.1))
-            weight = round(base_w * random.uniform(float(pmin), float(pmax)), 2)
-        except Exception:
-            weight = round(base_w * random.uniform(0.9, 1.1), 2)
-
-        # Apply weather weight multiplier if present (e.g., storm/rain buffs)
-        try:
-            w_mult = float(w_info.get('buff', {}).get('weight_mult', 1.0)) if isinstance(w_info, dict) else 1.0
-            weight = round(weight * w_mult * user_weight_mult, 2)
-        except Exception:
-            pass
-
-        # Price computation: allow per-fish override
-        try:
-            price_per_kg = (fish_entry.get('price_per_kg') if fish_entry and fish_entry.get('price_per_kg') is not None else (selected_special.get('price_per_kg') if selected_special and selected_special.get('price_per_kg') is not None else PRICE_PER_KG_BY_RARITY.get(picked_rarity, 10)))
-        except Exception:
-            price_per_kg = PRICE_PER_KG_BY_RARITY.get(picked_rarity, 10)
-        sell_price = int(price_per_kg * weight * (SHINY_SELL_MULT if is_shiny else 1))
-
-        # Build fish object and persist
-        fish_obj = {
-            "id": str(uuid.uuid4()),
-            "name": fish_name,
-            "rarity": picked_rarity,
-            "weight": weight,
-            "weight_class": wc,
-            "price_per_kg": price_per_kg,
-            "sell_price": sell_price,
-            "caught_at": int(time.time()),
-            "shiny": bool(is_shiny),
-        }
-        try:
-            if hasattr(self.bot, "data"):
-                await self.bot.data.add_caught_fish(ctx.author.id, fish_obj)
-        except Exception:
-            pass
-
-        dropped_item_ids = []
-        # Very small chance to drop an item like before
-        try:
-            try:
-                from game_items import ITEMS as GAME_ITEMS
-            except Exception:
-                GAME_ITEMS = {}
-            drop_chance = 0.00036
-            if GAME_ITEMS and random.random() < drop_chance:
-                item_id = random.choice(list(GAME_ITEMS.keys()))
-                try:
-                    if hasattr(self.bot, "data"):
-                        await self.bot.data.add_item(ctx.author.id, item_id)
-                except Exception:
-                    pass
-                dropped_item_ids.append(item_id)
-        except Exception:
-            pass
-
-        # Prepare breakdowns for display (single-catch result)
-        try:
-            breakdown_normal = {picked_rarity: {}}
-            breakdown_shiny = {picked_rarity: {}}
-            if is_shiny:
-                breakdown_shiny[picked_rarity][fish_name] = 1
-            else:
-                breakdown_normal[picked_rarity][fish_name] = 1
-        except Exception:
-            breakdown_normal = {picked_rarity: {fish_name: 1}} if not is_shiny else {picked_rarity: {}}
-            breakdown_shiny = {picked_rarity: {fish_name: 1}} if is_shiny else {picked_rarity: {}}
-
-        # Award XP once per successful catch (không tính theo số cá)
-        try:
-            xp_amount = int(XP_PER_CATCH)
-        except Exception:
-            xp_amount = 20
-        try:
-            # dispatch sự kiện để cog riêng xử lý XP / level
-            if hasattr(self.bot, "dispatch"):
-                self.bot.dispatch("fish_caught", ctx.author.id, xp_amount, ctx.channel.id)
-        except Exception:
-            pass
-
-        # --- GEMS: tính gem trao thưởng theo độ hiếm và thời tiết (ví dụ: epic -> gem)
-        gems_awarded = 0
-        try:
-            gp = GEM_SETTINGS.get('gem_per_rarity', {}) if isinstance(GEM_SETTINGS, dict) else {}
-            for r in breakdown_normal.keys():
-                cnt = sum(breakdown_normal.get(r, {}).values()) + sum(breakdown_shiny.get(r, {}).values())
-                gems_awarded += cnt * int(gp.get(r, 0))
-            # Nếu thời tiết aurora hoặc có gem multiplier trong buff thì áp dụng
-            w_key, w_info = self.get_current_weather()
-            wm = 1
-            try:
-                wm = int(w_info.get('buff', {}).get('gem_mult', GEM_SETTINGS.get('aurora_multiplier', 1)))
-            except Exception:
-                wm = int(GEM_SETTINGS.get('aurora_multiplier', 1))
-            gems_awarded = int(gems_awarded * wm)
-            if gems_awarded > 0 and hasattr(self.bot, 'data'):
-                await self.bot.data.add_gems(ctx.author.id, gems_awarded)
-        except Exception:
-            gems_awarded = 0
-
-        # 6) Render kết quả bắt được
-        # Tạo map tên cá -> emoji để hiển thị emoji trong kết quả
-        FISH_EMO_MAP: Dict[str, str] = {}
-        for pool in FISH_POOLS.values():
-            for f in pool:
-                FISH_EMO_MAP[f.get("name", "")] = f.get("emoji", "")
-        # Thêm cá đặc biệt vào map emoji
-        for w in WEATHER_CONFIG.values():
-            for f in w.get("special_fish", []):
-                FISH_EMO_MAP[f.get("name", "")] = f.get("emoji", "")
-
-        def fmt_bucket_normal_shiny(normal_bucket: Dict[str, int], shiny_bucket: Dict[str, int], use_emoji: bool = True) -> str:
-            # Combine and show shiny first with sparkle emoji, then normal. Optionally suppress fish emoji for compact display.
-            names = set(list(normal_bucket.keys()) + list(shiny_bucket.keys()))
-            if not names:
-                return "_Trống_"
-            parts = []
-            for n in sorted(names):
-                s = shiny_bucket.get(n, 0)
-                g = normal_bucket.get(n, 0)
-                em = FISH_EMO_MAP.get(n, "")
-                # shiny entries
-                if s > 0:
-                    if em and use_emoji:
-                        parts.append(f"{SPARKLE}{em} ×{s}")
-                    else:
-                        parts.append(f"{SPARKLE}{n} ×{s}")
-                # normal entries
-                if g > 0:
-                    if em and use_emoji:
-                        parts.append(f"{em} ×{g}")
-                    else:
-                        parts.append(f"{n} ×{g}")
-            return ", ".join(parts)
-
-        # Compute totals and rarity lines for display
-        try:
-            total_caught = sum(sum(b.values()) for b in breakdown_normal.values()) + sum(sum(b.values()) for b in breakdown_shiny.values())
-        except Exception:
-            total_caught = 1
-        rarity_lines = []
-        for r in FISHING_CONFIG.keys():
-            nb = breakdown_normal.get(r, {})
-            sb = breakdown_shiny.get(r, {})
-            if nb or sb:
-                rarity_lines.append(
-                    f"**{RARITY_DISPLAY.get(r, r.title())}** ({perc.get(r, 0.0):.1f}%): {fmt_bucket_normal_shiny(nb, sb, use_emoji=False)}"
-                )
-
-        # Hiển thị thời tiết hiện tại
-        weather_name, weather_info = self.get_current_weather()
-        weather_display = weather_info.get("name", weather_name)
-        color = 0x58D68D
-
-        # Fish summary
-        try:
-            caught = fish_obj
-            em = FISH_EMO_MAP.get(caught.get('name', ''), '')
-            shiny_mark = SPARKLE if caught.get('shiny') else ''
-            fish_summary = f"{shiny_mark}{em} **{caught.get('name')}** — {RARITY_DISPLAY.get(caught.get('rarity'), caught.get('rarity'))} | {caught.get('weight')}kg ({caught.get('weight_class')}) | Giá ước tính: **{caught.get('sell_price'):,}** coins"
-        except Exception:
-            fish_summary = "_Không có dữ liệu con cá_"
-
-        # Chuẩn bị nội dung embed; thêm thông tin item rớt nếu có
-        description_text = f"Thời tiết: **{weather_display}**\n\n**Cá bạn câu được:**\n{fish_summary}\n\n" + "\n".join(rarity_lines)
-        if dropped_item_ids:
-            try:
-                from game_items import ITEMS as GAME_ITEMS
-            except Exception:
-                GAME_ITEMS = {}
-            for item_id in dropped_item_ids:
-                it = GAME_ITEMS.get(item_id, {})
-                disp = f"{it.get('emoji','')} {it.get('name', item_id)}" if it else item_id
-                description_text += f"\n**Cổ vật** (??): {disp}"
-        # Thông báo thêm gem nếu có
-        try:
-            if 'gems_awarded' in locals() and gems_awarded > 0:
-                description_text += f"\n💎 **Gems nhận được:** {gems_awarded}"
-        except Exception:
-            pass
-
-        result = discord.Embed(
-            title=f"🎣 Thành công! **{ctx.author.display_name}** đã câu được **{total_caught}** con",
-            description=description_text,
-            color=color
-        )
-        result.set_footer(text=f"Cần: Lv.{lvl} — {tier['name']}")
-        # Gửi kết quả công khai vào kênh (để không bị ẩn nếu dùng Slash Command)
-        await ctx.channel.send(embed=result)
-
-    @commands.hybrid_command(name="weather", help="Xem thời tiết hiện tại và các thông tin liên quan (buff / special fish).")
-    async def weather(self, ctx: commands.Context):
-        # Hiển thị weather hiện tại (key, tên hiển thị, duration, rate, buff, special fish list)
-        key, info = self.get_current_weather()
-        name = info.get('name', key)
-        rate = info.get('rate', 'N/A')
-        buff = info.get('buff', {}) if isinstance(info, dict) else {}
-        specials = info.get('special_fish', []) if isinstance(info, dict) else []
-
-        # Visuals mapping (Emoji & Color)
-        visuals = {
-            "clear":  {"emoji": "☀️", "color": 0xF1C40F},
-            "rain":   {"emoji": "🌧️", "color": 0x3498DB},
-            "storm":  {"emoji": "⛈️", "color": 0x8E44AD},
-            "fog":    {"emoji": "🌫️", "color": 0x95A5A6},
-            "meteor": {"emoji": "🌠", "color": 0xE67E22},
-            "aurora": {"emoji": "🌌", "color": 0x1ABC9C},
-        }
-        vis = visuals.get(key, {"emoji": "🌦️", "color": 0x3498DB})
-
-        # Compute normalized rate as percent of total weather weights (rate / sum of all rates)
-        try:
-            rate_val = float(rate)
-            try:
-                total_rate = sum(float(v.get('rate', 0)) for v in WEATHER_CONFIG.values())
-            except Exception:
-                total_rate = 0.0
-            if total_rate and total_rate > 0:
-                rate_disp = f"{(rate_val / total_rate) * 100:.1f}%"
-            else:
-                rate_disp = f"{rate_val*100:.1f}%" if 0 <= rate_val <= 1 else f"{rate_val:.2f}"
-        except Exception:
-            rate_disp = str(rate)
-
-        if self.weather_end_time and self.weather_end_time > time.time():
-            duration_display = f"<t:{int(self.weather_end_time)}:R>"
-        else:
-            duration_display = "Đang chuyển đổi..."
-
-        embed = discord.Embed(title=f"{vis['emoji']} Thời tiết: {name}", description=f"Hiện tại đang là **{name}**.", color=vis['color'])
-        
-        # Info field with buffs
-        info_txt = f"⏱️ **Kết thúc:** {duration_display}\n📊 **Tỉ lệ:** {rate_disp}"
-        if buff:
-            buff_parts = []
-            if 'luck' in buff: buff_parts.append(f"🍀 Luck: +{buff['luck']}")
-            if 'weight_mult' in buff: buff_parts.append(f"⚖️ Weight: x{buff['weight_mult']}")
-            if 'shiny_mult' in buff: buff_parts.append(f"✨ Shiny: x{buff['shiny_mult']}")
-            if 'gem_mult' in buff: buff_parts.append(f"💎 Gem: x{buff['gem_mult']}")
-            if buff_parts:
-                info_txt += "\n\n**✨ Hiệu ứng (Buffs):**\n" + "\n".join([f"> {b}" for b in buff_parts])
-        
-        embed.add_field(name="ℹ️ Thông tin chung", value=info_txt, inline=False)
-
-        # Special fish breakdown: compute per-catch probability while this weather is active
-        if specials:
-            # Group by rarity
-            sp_by_rarity = {}
-            for s in specials:
-                r = s.get('rarity')
-                sp_by_rarity.setdefault(r, []).append(s)
-
-            total_base_weight = sum(cfg.get('base_weight', 0) for cfg in FISHING_CONFIG.values())
-            sp_lines = []
-            for rarity, arr in sp_by_rarity.items():
-                n_same = len(arr)
-                pool = FISH_POOLS.get(rarity, [])
-                pool_len = len(pool)
-                for s in arr:
-                    # chance when rarity chosen (either explicit or auto-derived from pool size)
-                    raw_ch = s.get('chance')
-                    if raw_ch is None:
-                        raw_ch = (SPECIAL_VS_NORMAL_SCALE / pool_len) if pool_len else 0.0
-                    # Probability of picking this rarity
-                    base_w = FISHING_CONFIG.get(rarity, {}).get('base_weight', 0)
-                    p_r = (base_w / total_base_weight) if total_base_weight else 0.0
-                    # Given that rarity was chosen, we select one special uniformly among same-rarity specials, then apply its chance
-                    per_catch_prob = p_r * (1.0 / n_same) * raw_ch
-                    sp_lines.append(f"> {s.get('emoji','')} **{s.get('name')}** ({rarity}) — `{per_catch_prob*100:.3f}%`")
-            embed.add_field(name="🐟 Cá đặc biệt", value="\n".join(sp_lines), inline=False)
-        else:
-            embed.add_field(name="🐟 Cá đặc biệt", value="> *Không có cá đặc biệt trong thời tiết này.*", inline=False)
-
-        await ctx.send(embed=embed, ephemeral=True if ctx.interaction else False)
-
-    @commands.hybrid_command(name="testluck", help="Test tỷ lệ câu cá với Luck tùy chỉnh (Simulation).")
-    async def testluck(self, ctx, luck_val: float = 0.0, trials: int = 10000):
-        """Chạy thử nghiệm thuật toán câu cá với chỉ số Luck nhất định."""
-        results = {r: 0 for r in FISHING_CONFIG.keys()}
-        
-        # Pre-calculate weights for speed
-        rarities = []
-        weights = []
-        for r, cfg in FISHING_CONFIG.items():
-            base = cfg["base_weight"]
-            factor = cfg["luck_factor"]
-            w = base * (1 + (luck_val * factor / 100.0))
-            rarities.append(r)
-            weights.append(w)
-            
-        # Run simulation
-        picks = random.choices(rarities, weights=weights, k=trials)
-        for p in picks:
-            results[p] += 1
-            
-        lines = [f">>Simulation (Luck={luck_val}, Trials={trials})<<"]
-        for r in FISHING_CONFIG.keys():
-            count = results[r]
-            p = (count / trials) * 100
-            lines.append(f"{r.capitalize():<10}: {count:<5} ({p:.2f}%)")
-            
-        await ctx.send("```\n" + "\n".join(lines) + "\n```")
-
-    @fish.error
-    async def fish_error(self, ctx: commands.Context, error: Exception):
-        if isinstance(error, commands.CommandOnCooldown):
-            await ctx.send(f"⏳ Chờ **{error.retry_after:.1f}s** rồi câu tiếp nhé!", delete_after=3)
-        elif isinstance(error, commands.MaxConcurrencyReached):
-            await ctx.send("⏳ Đang xử lý lệnh trước của bạn, vui lòng đợi...", delete_after=3)
-        else:
-            await ctx.send("❌ Lỗi khi câu cá, thử lại sau.")
-
-
-async def setup(bot: commands.Bot):
+# cogs/fish.py
+import random
+import asyncio
+import functools
+import discord
+import time
+from discord.ext import commands
+from typing import Dict
+
+# ---- Thử import cấu hình chung (nếu có) ----
+try:
+    from game_config import (
+        ROD_TIERS, MAX_ROD_LEVEL, BASE_CHALLENGE, XP_PER_CATCH, FISH_POOLS,
+        RARITY_DISPLAY, RARITY_COLORS, WEATHER_CONFIG, GEM_SETTINGS,
+        FISHING_CONFIG, BASE_LUCK,
+        PRICE_PER_KG_BY_RARITY, WEIGHT_BY_RARITY, WEIGHT_CLASS_BOUNDS, WEIGHT_CLASS_NAMES, WEIGHT_CLASS_PROBS,
+        SHINY_BASE, SHINY_SELL_MULT, SPECIAL_VS_NORMAL_SCALE, FISH_INVENTORY_LIMIT, FISH_BATCH,
+        WEATHER_FORECAST_COUNT, BASE_XP_PER_LEVEL
+    )
+except Exception:
+    # Fallback cấu hình mặc định nếu chưa tạo game_config.py
+    ROD_TIERS = {
+        1: {"name": "Cần Tre",        "cost": 0,     "bonus": 0, "len_add": 0, "timeout_sub": 0.0},
+        2: {"name": "Cần Gỗ",         "cost": 500,   "bonus": 1, "len_add": 2, "timeout_sub": 0.5},
+        3: {"name": "Cần Sắt",        "cost": 2000,  "bonus": 2, "len_add": 4, "timeout_sub": 1.0},
+        4: {"name": "Cần Carbon",     "cost": 8000,  "bonus": 3, "len_add": 6, "timeout_sub": 1.5},
+        5: {"name": "Cần Huyền Thoại","cost": 25000, "bonus": 4, "len_add": 8, "timeout_sub": 2.0},
+    }
+    MAX_ROD_LEVEL = max(ROD_TIERS)
+    FISH_POOLS = {}
+    RARITY_DISPLAY = {"common": "Common", "uncommon": "Uncommon", "rare": "Rare", "epic": "Epic"}
+    RARITY_COLORS  = {"common": 0x95A5A6, "uncommon": 0x2ECC71, "rare": 0x3498DB, "epic": 0xF1C40F}
+    WEATHER_CONFIG = {}
+    BASE_CHALLENGE = {"len_min": 4, "len_max": 5, "timeout": 5.0}
+    XP_PER_CATCH = 20
+    GEM_SETTINGS = {"gem_per_rarity": {"epic": 1}, "aurora_multiplier": 2, "daily_min": 1, "daily_max": 3, "sell_item_gems_default": 1}
+    FISHING_CONFIG = {
+        "trash":     {"base_weight": 10000, "luck_factor": 0.0},
+        "common":    {"base_weight": 5000,  "luck_factor": 0.1},
+        "uncommon":  {"base_weight": 2500,  "luck_factor": 0.5},
+        "rare":      {"base_weight": 1000,  "luck_factor": 1.0},
+        "epic":      {"base_weight": 500,   "luck_factor": 2.0},
+        "legendary": {"base_weight": 100,   "luck_factor": 5.0},
+        "mythical":  {"base_weight": 10,    "luck_factor": 15.0},
+    }
+    BASE_LUCK = 1
+    PRICE_PER_KG_BY_RARITY = {"trash": 5, "common": 10, "uncommon": 30, "rare": 120, "epic": 500}
+    WEIGHT_BY_RARITY = {"common": (0.2, 1.5), "uncommon": (0.5, 3.0), "rare": (1.0, 6.0), "epic": (2.0, 10.0)}
+    WEIGHT_CLASS_BOUNDS = [0.0, 1.0, 3.0, 7.0, 9999.0]
+    WEIGHT_CLASS_NAMES = ["tiny", "normal", "huge", "gigantic"]
+    WEIGHT_CLASS_PROBS = {"tiny": 0.15, "normal": 0.60, "huge": 0.23, "gigantic": 0.02}  # fallback probs
+    SHINY_BASE = 0.001  # 0.1% base chance
+    SHINY_SELL_MULT = 20  # giá bán gấp 20 lần
+    SPECIAL_VS_NORMAL_SCALE = 0.8
+    FISH_INVENTORY_LIMIT = 40
+    FISH_BATCH = {"max_casts": 10, "len_per_cast": 3, "timeout_per_cast": 2.0, "cooldown_per_cast": 10}
+    WEATHER_FORECAST_COUNT = 5
+    BASE_XP_PER_LEVEL = 100
+
+from fishing_engine import get_engine, HAS_NUMPY
+from fish_catalog import EMOJI as FISH_EMO_MAP, BY_RARITY as FISH_BY_RARITY
+from weather import get_timeline
+from record_book import GLOBAL_KEY as GLOBAL_RECORDS
+from coherence import is_stale_write
+
+# ===== Cấu hình thử thách (emoji) =====
+EMO_D = "<:D_:1469386519784587489>"
+EMO_F = "<:F_:1469386706753945803>"
+EMO_J = "<:J_:1469386607357333504>"
+EMO_K = "<:K_:1469386724646850804>"
+EMO_SET = [EMO_D, EMO_F, EMO_J, EMO_K]
+SPARKLE = "✨"  # emoji lấp lánh hiển thị trước emoji cá
+# Giới hạn số lần mô phỏng của /testluck (không có NumPy thì mô phỏng bằng vòng lặp Python, chậm hơn nhiều)
+TESTLUCK_MAX_TRIALS = 20_000_000 if HAS_NUMPY else 200_000
+
+# Emoji & màu hiển thị của từng thời tiết
+WEATHER_VISUALS = {
+    "clear":  {"emoji": "☀️", "color": 0xF1C40F},
+    "rain":   {"emoji": "🌧️", "color": 0x3498DB},
+    "storm":  {"emoji": "⛈️", "color": 0x8E44AD},
+    "fog":    {"emoji": "🌫️", "color": 0x95A5A6},
+    "meteor": {"emoji": "🌠", "color": 0xE67E22},
+    "aurora": {"emoji": "🌌", "color": 0x1ABC9C},
+}
+
+MAP_EMO_TO_CHAR = {
+    EMO_D: "d",
+    EMO_F: "f",
+    EMO_J: "j",
+    EMO_K: "k",
+}
+
+def gen_challenge(n_min: int, n_max: int):
+    """Sinh chuỗi emoji và đáp án tương ứng."""
+    n = random.randint(n_min, n_max)
+    chosen = [random.choice(EMO_SET) for _ in range(n)]
+    display = " - ".join(chosen)
+    expected = "".join(MAP_EMO_TO_CHAR[e] for e in chosen)
+    return display, expected
+
+def _clamp_casts(casts, bot=None, user_id=None) -> int:
+    """Số lần câu thực tế: trong [1, max_casts] và (nếu biết kho) không vượt số chỗ trống."""
+    try:
+        casts = int(casts)
+    except Exception:
+        casts = 1
+    casts = max(1, min(int(FISH_BATCH.get("max_casts", 1)), casts))
+    data = getattr(bot, "data", None)
+    if data is not None and user_id is not None:
+        try:
+            casts = max(1, min(casts, FISH_INVENTORY_LIMIT - data.get_fish_count(user_id)))
+        except Exception:
+            pass
+    return casts
+
+
+def _fish_cooldown(ctx: commands.Context):
+    """Cooldown của /fish tỉ lệ với số lần câu THỰC TẾ (đã cắt theo chỗ trống trong kho):
+    câu N lần một lượt = N lần câu lẻ."""
+    casts = _clamp_casts(ctx.kwargs.get("casts", 1), ctx.bot, ctx.author.id)
+    return commands.Cooldown(1, float(FISH_BATCH.get("cooldown_per_cast", 10)) * casts)
+
+
+def normalize_letters(s: str) -> str:
+    """Chuẩn hóa input: chỉ giữ d/f/j/k, bỏ khoảng trắng, lower."""
+    s = s.lower()
+    return "".join(c for c in s if c in ("d", "f", "j", "k"))
+
+
+class FishCog(commands.Cog, name="Fishing"):
+    """Lệnh câu cá cơ bản"""
+    # --- Helper for weighted fish selection ---
+    def pick_fish_by_rate(self, rarity):
+        # Bảng alias dựng sẵn trong FishingEngine (O(1) mỗi lần bốc)
+        return get_engine().pick_species(rarity)
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        # Thời tiết tính thẳng từ thời gian (weather.py), không cần task nền
+        self.timeline = get_timeline()
+
+    def get_current_weather(self, guild_id=None):
+        return self.timeline.current(guild_id)
+
+    @commands.hybrid_command(
+        name="fish",
+        aliases=["f"],
+        help="Câu cá: Gõ đúng chuỗi emoji (dfjk) trong thời gian giới hạn. /fish [số lần] để câu nhiều lần với thử thách dài hơn.",
+        cooldown_after_parsing=True,  # cooldown phụ thuộc số lần câu
+    )
+    @commands.dynamic_cooldown(_fish_cooldown, type=commands.BucketType.user)  # cooldown theo user
+    @commands.max_concurrency(1, per=commands.BucketType.user, wait=False)  # mỗi user một thử thách, lệnh thừa bị từ chối
+    async def fish(self, ctx: commands.Context, casts: int = 1):
+        # Câu nhiều lần: chỉ câu đủ số chỗ trống còn lại trong kho (cùng cách tính với cooldown)
+        casts = _clamp_casts(casts, self.bot, ctx.author.id)
+        # Check inventory limit
+        if hasattr(self.bot, "data"):
+            try:
+                current_fish = self.bot.data.get_fish_count(ctx.author.id)
+                if current_fish >= FISH_INVENTORY_LIMIT:
+                    msg = f"🚫 **Kho cá đã đầy ({FISH_INVENTORY_LIMIT}/{FISH_INVENTORY_LIMIT})!**\nBạn cần bán bớt cá bằng lệnh `/sell` hoặc `/sellall` trước khi câu tiếp."
+                    if ctx.interaction:
+                        await ctx.send(msg, ephemeral=True)
+                    else:
+                        await ctx.send(msg)
+                    return
+            except Exception:
+                pass
+
+        # 1) Thời tiết + chỉ số hiệu lực (cần + item + pet + thời tiết) — StatsService đã cache sẵn,
+        # chỉ tính lại khi trang bị / pet / cần / thời tiết thay đổi
+        try:
+            w_key, w_info = self.get_current_weather(ctx.guild.id if ctx.guild else None)
+        except Exception:
+            w_key, w_info = None, {}
+        stats = self.bot.data.stats.get(ctx.author.id, w_key)
+        lvl = stats["rod_level"]
+        tier = ROD_TIERS.get(lvl, ROD_TIERS[1])
+        n_min, n_max = stats["len_min"], stats["len_max"]
+        timeout = stats["timeout"]
+        total_timeout_add = stats["timeout_add"]
+        total_len_sub = stats["len_sub"]
+        luck = stats["luck"]
+        user_weight_mult = stats["weight_mult"]
+        # Câu nhiều lần: mỗi lần thêm emoji và thời gian
+        extra = casts - 1
+        if extra:
+            n_min += extra * int(FISH_BATCH.get("len_per_cast", 0))
+            n_max += extra * int(FISH_BATCH.get("len_per_cast", 0))
+            timeout += extra * float(FISH_BATCH.get("timeout_per_cast", 0.0))
+
+        # 2) Tạo thử thách
+        challenge_emojis, expected_letters = gen_challenge(n_min, n_max)
+
+        demo = f"{EMO_D}=d  {EMO_F}=f  {EMO_J}=j  {EMO_K}=k"
+        embed = discord.Embed(
+            title="🎣 Thử thách câu cá" + (f" ×{casts}" if casts > 1 else ""),
+            description=(
+                f"**{ctx.author.display_name}**\n"
+                f"Trong **{timeout:.1f}s**, hãy nhập **chỉ** các chữ cái **dfjk** đúng với chuỗi emoji sau (theo thứ tự):\n"
+                f"{challenge_emojis}\n"
+            ),
+            color=0xE67E22,
+        )
+        bonus_parts = []
+        if total_timeout_add:
+            bonus_parts.append(f"+{total_timeout_add:.1f}s time")
+        if total_len_sub:
+            bonus_parts.append(f"-{int(total_len_sub)} len")
+        # show current rod & user's luck in footer
+        try:
+            footer_luck = f" | Luck hiện tại: {luck:.2f}"
+        except Exception:
+            footer_luck = ""
+        embed.set_footer(text=f"Cấp cần: Lv.{lvl} — {tier['name']}{footer_luck}")
+        
+        # Xử lý hiển thị thử thách (Ephemeral nếu là Slash Command)
+        if ctx.interaction:
+            guide_msg = await ctx.send(embed=embed, ephemeral=True)
+        else:
+            # Text command: Xóa lệnh gọi và gửi tin nhắn thường
+            try:
+                await ctx.message.delete()
+            except Exception:
+                pass
+            guide_msg = await ctx.send(embed=embed)
+
+        # 3) Chờ input trong thời gian 'timeout' (ChallengeRegistry: main.on_message giao tin nhắn theo kênh + user)
+        try:
+            reply: discord.Message = await self.bot.challenges.wait(ctx.channel.id, ctx.author.id, timeout)
+        except asyncio.TimeoutError:
+            await ctx.send(f"⏰ {ctx.author.mention} Quá chậm! Cá đã bơi mất!")
+            return
+
+        user_letters = normalize_letters(reply.content)
+
+        # 4) Kiểm tra kết quả
+        if user_letters != expected_letters:
+            await ctx.send(f"❌ {ctx.author.mention} Nhập sai chuỗi, cá đã bơi mất!")
+            return
+
+        # --- THUẬT TOÁN CÂU CÁ (Weighted Random + Luck) ---
+        # Độ hiếm, loài, shiny, hạng cân và giá đều do FishingEngine bốc; bảng tỉ lệ theo luck
+        # được cache nên `perc` (để hiển thị) đi kèm luôn kết quả. Câu nhiều lần bốc cả lượt
+        # trong một lần gọi, mỗi con độc lập với tỉ lệ y như câu lẻ.
+        caught_fishes, perc = get_engine().roll_many(luck, casts, w_key, user_weight_mult)
+        for fish_obj in caught_fishes:
+            fish_obj.pop("emoji", None)
+
+        dropped_item_ids = []
+        # Very small chance to drop an item like before (tung riêng cho từng lần câu)
+        try:
+            try:
+                from game_items import ITEMS as GAME_ITEMS
+            except Exception:
+                GAME_ITEMS = {}
+            drop_chance = 0.00036
+            for _ in range(casts):
+                if GAME_ITEMS and random.random() < drop_chance:
+                    item_id = random.choice(list(GAME_ITEMS.keys()))
+                    dropped_item_ids.append(item_id)
+        except Exception:
+            pass
+
+        # Prepare breakdowns for display
+        breakdown_normal: Dict[str, Dict[str, int]] = {}
+        breakdown_shiny: Dict[str, Dict[str, int]] = {}
+        for fish_obj in caught_fishes:
+            bucket = breakdown_shiny if fish_obj["shiny"] else breakdown_normal
+            names = bucket.setdefault(fish_obj["rarity"], {})
+            names[fish_obj["name"]] = names.get(fish_obj["name"], 0) + 1
+
+        # Award XP once per successful cast (không tính theo số cá), cộng XP thưởng (xp_flat)
+        # từ item trang bị + pet đang dùng; được ghi cùng lần ghi cá bên dưới
+        try:
+            xp_amount = int(XP_PER_CATCH)
+        except Exception:
+            xp_amount = 20
+        xp_gain = (xp_amount + int(stats.get("xp_flat", 0))) * casts
+
+        # --- GEMS: tính gem trao thưởng theo độ hiếm và thời tiết (ví dụ: epic -> gem)
+        gems_awarded = 0
+        try:
+            gp = GEM_SETTINGS.get('gem_per_rarity', {}) if isinstance(GEM_SETTINGS, dict) else {}
+            for r in set(breakdown_normal) | set(breakdown_shiny):
+                cnt = sum(breakdown_normal.get(r, {}).values()) + sum(breakdown_shiny.get(r, {}).values())
+                gems_awarded += cnt * int(gp.get(r, 0))
+            # Nếu thời tiết aurora hoặc có gem multiplier trong buff thì áp dụng
+            wm = 1
+            try:
+                wm = int(w_info.get('buff', {}).get('gem_mult', GEM_SETTINGS.get('aurora_multiplier', 1)))
+            except Exception:
+                wm = int(GEM_SETTINGS.get('aurora_multiplier', 1))
+            gems_awarded = int(gems_awarded * wm)
+        except Exception:
+            gems_awarded = 0
+
+        # Lưu cá ($push ... $each) + vật phẩm rớt + gems + XP / level bằng một lần ghi duy nhất
+        level_up = None
+        try:
+            if hasattr(self.bot, "data"):
+                async with self.bot.data.user_txn(ctx.author.id) as u:
+                    for fish_obj, fid in zip(caught_fishes, u.add_caught_fishes(caught_fishes)):
+                        fish_obj["id"] = fid
+                    for item_id in dropped_item_ids:
+                        u.add_item(item_id)
+                    if gems_awarded > 0:
+                        u.add_gems(gems_awarded)
+                    level_up = u.gain_xp(xp_gain, BASE_XP_PER_LEVEL)
+        except Exception as e:
+            # Cả lượt câu nằm trong lần ghi này: ghi lỗi nghĩa là không có gì được lưu
+            print(f"⚠️ Lỗi khi lưu kết quả câu cá của {ctx.author.id} ({casts} lần): {e}")
+            if is_stale_write(e):
+                await ctx.send(f"⚠️ {ctx.author.mention} Dữ liệu của bạn vừa được cập nhật ở nơi khác nên lượt câu này chưa được lưu, hãy câu lại.")
+            else:
+                await ctx.send(f"❌ {ctx.author.mention} Không lưu được kết quả câu cá (cá, gems, XP chưa được cộng), thử lại sau.")
+            return
+        try:
+            # Thông báo lên cấp do cog profile xử lý (dữ liệu đã ghi ở trên)
+            if level_up and level_up[1] > level_up[0] and hasattr(self.bot, "dispatch"):
+                self.bot.dispatch("level_up", ctx.author.id, *level_up, ctx.channel.id)
+        except Exception:
+            pass
+
+        # Sổ kỷ lục theo loài: O(log K) mỗi con, chỉ ghi khi có kỷ lục mới
+        new_records = []
+        try:
+            if hasattr(self.bot, "data"):
+                new_records = await self.bot.data.records.record_catches(ctx.author.id, caught_fishes, w_key)
+        except Exception:
+            pass
+
+        # 6) Render kết quả bắt được
+        def fmt_bucket_normal_shiny(normal_bucket: Dict[str, int], shiny_bucket: Dict[str, int], use_emoji: bool = True) -> str:
+            # Combine and show shiny first with sparkle emoji, then normal. Optionally suppress fish emoji for compact display.
+            names = set(list(normal_bucket.keys()) + list(shiny_bucket.keys()))
+            if not names:
+                return "_Trống_"
+            parts = []
+            for n in sorted(names):
+                s = shiny_bucket.get(n, 0)
+                g = normal_bucket.get(n, 0)
+                em = FISH_EMO_MAP.get(n, "")
+                # shiny entries
+                if s > 0:
+                    if em and use_emoji:
+                        parts.append(f"{SPARKLE}{em} ×{s}")
+                    else:
+                        parts.append(f"{SPARKLE}{n} ×{s}")
+                # normal entries
+                if g > 0:
+                    if em and use_emoji:
+                        parts.append(f"{em} ×{g}")
+                    else:
+                        parts.append(f"{n} ×{g}")
+            return ", ".join(parts)
+
+        # Compute totals and rarity lines for display
+        try:
+            total_caught = sum(sum(b.values()) for b in breakdown_normal.values()) + sum(sum(b.values()) for b in breakdown_shiny.values())
+        except Exception:
+            total_caught = 1
+        rarity_lines = []
+        for r in FISHING_CONFIG.keys():
+            nb = breakdown_normal.get(r, {})
+            sb = breakdown_shiny.get(r, {})
+            if nb or sb:
+                rarity_lines.append(
+                    f"**{RARITY_DISPLAY.get(r, r.title())}** ({perc.get(r, 0.0):.1f}%): {fmt_bucket_normal_shiny(nb, sb, use_emoji=False)}"
+                )
+
+        # Hiển thị thời tiết hiện tại
+        weather_display = w_info.get("name", w_key)
+        color = 0x58D68D
+
+        # Fish summary (câu nhiều lần: con giá cao nhất trước, kèm tổng giá)
+        try:
+            lines = []
+            for caught in sorted(caught_fishes, key=lambda f: f.get('sell_price', 0), reverse=True):
+                em = FISH_EMO_MAP.get(caught.get('name', ''), '')
+                shiny_mark = SPARKLE if caught.get('shiny') else ''
+                lines.append(f"{shiny_mark}{em} **{caught.get('name')}** — {RARITY_DISPLAY.get(caught.get('rarity'), caught.get('rarity'))} | {caught.get('weight')}kg ({caught.get('weight_class')}) | Giá ước tính: **{caught.get('sell_price'):,}** coins")
+            if len(caught_fishes) > 1:
+                total_value = sum(int(f.get('sell_price', 0)) for f in caught_fishes)
+                lines.append(f"Tổng giá ước tính: **{total_value:,}** coins")
+            fish_summary = "\n".join(lines) or "_Không có dữ liệu con cá_"
+        except Exception:
+            fish_summary = "_Không có dữ liệu con cá_"
+
+        # Chuẩn bị nội dung embed; thêm thông tin item rớt nếu có
+        description_text = f"Thời tiết: **{weather_display}**\n\n**Cá bạn câu được:**\n{fish_summary}\n\n" + "\n".join(rarity_lines)
+        if dropped_item_ids:
+            try:
+                from game_items import ITEMS as GAME_ITEMS
+            except Exception:
+                GAME_ITEMS = {}
+            for item_id in dropped_item_ids:
+                it = GAME_ITEMS.get(item_id, {})
+                disp = f"{it.get('emoji','')} {it.get('name', item_id)}" if it else item_id
+                description_text += f"\n**Cổ vật** (??): {disp}"
+        # Chỉ báo khi đứng đầu bảng của loài / toàn server (top-K còn lại xem bằng /records)
+        best_records = sorted({key for key, _, is_best in new_records if is_best})
+        if best_records:
+            names = ", ".join("toàn server" if k == GLOBAL_RECORDS else k for k in best_records)
+            description_text += f"\n🏆 **Kỷ lục mới:** {names}! Xem `/records`"
+        # Thông báo thêm gem nếu có
+        try:
+            if 'gems_awarded' in locals() and gems_awarded > 0:
+                description_text += f"\n💎 **Gems nhận được:** {gems_awarded}"
+        except Exception:
+            pass
+
+        result = discord.Embed(
+            title=f"🎣 Thành công! **{ctx.author.display_name}** đã câu được **{total_caught}** con",
+            description=description_text,
+            color=color
+        )
+        result.set_footer(text=f"Cần: Lv.{lvl} — {tier['name']}")
+        # Gửi kết quả công khai vào kênh (để không bị ẩn nếu dùng Slash Command)
+        await ctx.channel.send(embed=result)
+
+    @commands.hybrid_command(name="weather", help="Xem thời tiết hiện tại, dự báo và các thông tin liên quan (buff / special fish).")
+    async def weather(self, ctx: commands.Context):
+        # Hiển thị weather hiện tại (key, tên hiển thị, duration, rate, buff, special fish list) + dự báo
+        guild_id = ctx.guild.id if ctx.guild else None
+        periods = self.timeline.forecast(guild_id, WEATHER_FORECAST_COUNT)
+        key, info = self.get_current_weather(guild_id)
+        name = info.get('name', key)
+        rate = info.get('rate', 'N/A')
+        buff = info.get('buff', {}) if isinstance(info, dict) else {}
+        specials = info.get('special_fish', []) if isinstance(info, dict) else []
+
+        vis = WEATHER_VISUALS.get(key, {"emoji": "🌦️", "color": 0x3498DB})
+
+        # Compute normalized rate as percent of total weather weights (rate / sum of all rates)
+        try:
+            rate_val = float(rate)
+            try:
+                total_rate = sum(float(v.get('rate', 0)) for v in WEATHER_CONFIG.values())
+            except Exception:
+                total_rate = 0.0
+            if total_rate and total_rate > 0:
+                rate_disp = f"{(rate_val / total_rate) * 100:.1f}%"
+            else:
+                rate_disp = f"{rate_val*100:.1f}%" if 0 <= rate_val <= 1 else f"{rate_val:.2f}"
+        except Exception:
+            rate_disp = str(rate)
+
+        if periods and periods[0][1] > time.time():
+            duration_display = f"<t:{int(periods[0][1])}:R>"
+        else:
+            duration_display = "Đang chuyển đổi..."
+
+        embed = discord.Embed(title=f"{vis['emoji']} Thời tiết: {name}", description=f"Hiện tại đang là **{name}**.", color=vis['color'])
+        
+        # Info field with buffs
+        info_txt = f"⏱️ **Kết thúc:** {duration_display}\n📊 **Tỉ lệ:** {rate_disp}"
+        if buff:
+            buff_parts = []
+            if 'luck' in buff: buff_parts.append(f"🍀 Luck: +{buff['luck']}")
+            if 'weight_mult' in buff: buff_parts.append(f"⚖️ Weight: x{buff['weight_mult']}")
+            if 'shiny_mult' in buff: buff_parts.append(f"✨ Shiny: x{buff['shiny_mult']}")
+            if 'gem_mult' in buff: buff_parts.append(f"💎 Gem: x{buff['gem_mult']}")
+            if buff_parts:
+                info_txt += "\n\n**✨ Hiệu ứng (Buffs):**\n" + "\n".join([f"> {b}" for b in buff_parts])
+        
+        embed.add_field(name="ℹ️ Thông tin chung", value=info_txt, inline=False)
+
+        # Special fish breakdown: compute per-catch probability while this weather is active
+        if specials:
+            # Group by rarity
+            sp_by_rarity = {}
+            for s in specials:
+                r = s.get('rarity')
+                sp_by_rarity.setdefault(r, []).append(s)
+
+            total_base_weight = sum(cfg.get('base_weight', 0) for cfg in FISHING_CONFIG.values())
+            sp_lines = []
+            for rarity, arr in sp_by_rarity.items():
+                n_same = len(arr)
+                pool_len = len(FISH_BY_RARITY.get(rarity, []))
+                for s in arr:
+                    # chance when rarity chosen (either explicit or auto-derived from pool size)
+                    raw_ch = s.get('chance')
+                    if raw_ch is None:
+                        raw_ch = (SPECIAL_VS_NORMAL_SCALE / pool_len) if pool_len else 0.0
+                    # Probability of picking this rarity
+                    base_w = FISHING_CONFIG.get(rarity, {}).get('base_weight', 0)
+                    p_r = (base_w / total_base_weight) if total_base_weight else 0.0
+                    # Given that rarity was chosen, we select one special uniformly among same-rarity specials, then apply its chance
+                    per_catch_prob = p_r * (1.0 / n_same) * raw_ch
+                    sp_lines.append(f"> {s.get('emoji','')} **{s.get('name')}** ({rarity}) — `{per_catch_prob*100:.3f}%`")
+            embed.add_field(name="🐟 Cá đặc biệt", value="\n".join(sp_lines), inline=False)
+        else:
+            embed.add_field(name="🐟 Cá đặc biệt", value="> *Không có cá đặc biệt trong thời tiết này.*", inline=False)
+
+        # Dự báo: các đợt thời tiết tiếp theo (tính trước được vì thời tiết tất định theo thời gian)
+        if len(periods) > 1:
+            fc_lines = []
+            for start, end, w in periods[1:]:
+                w_vis = WEATHER_VISUALS.get(w, {"emoji": "🌦️"})
+                w_name = WEATHER_CONFIG.get(w, {}).get("name", w)
+                fc_lines.append(f"> <t:{int(start)}:t> – <t:{int(end)}:t> {w_vis['emoji']} **{w_name}**")
+            embed.add_field(name="🔮 Dự báo", value="\n".join(fc_lines), inline=False)
+
+        await ctx.send(embed=embed, ephemeral=True if ctx.interaction else False)
+
+    @commands.hybrid_command(name="testluck", help="Mô phỏng câu cá với Luck tùy chỉnh: /testluck [luck] [số lần] [thời tiết].")
+    async def testluck(self, ctx, luck_val: float = 0.0, trials: int = 1_000_000, weather: str | None = None):
+        """Mô phỏng trọn vẹn `trials` lần câu (loài, cá thời tiết, shiny, cân nặng, giá, gem) với Luck cho trước."""
+        trials = max(1, min(int(trials), TESTLUCK_MAX_TRIALS))
+        if weather is not None and weather not in WEATHER_CONFIG:
+            await ctx.send(f"❌ Thời tiết không hợp lệ. Chọn: {', '.join(WEATHER_CONFIG.keys())}")
+            return
+        # Mô phỏng nặng CPU: chạy trong executor để không chặn event loop
+        loop = asyncio.get_running_loop()
+        report = await loop.run_in_executor(
+            None, functools.partial(get_engine().simulate_catches, luck_val, trials, weather)
+        )
+
+        lines = [f">>Simulation (Luck={luck_val}, Trials={trials:,}, Weather={weather or 'none'})<<"]
+        for r in FISHING_CONFIG.keys():
+            count, p, lo, hi = report["rarity"].get(r, (0, 0.0, 0.0, 0.0))
+            lines.append(f"{r.capitalize():<10}: {count:<9} ({p*100:.3f}% ±{(hi-lo)*50:.3f})")
+        lines.append("")
+        lines.append("Top species:")
+        for name, (count, p, lo, hi) in list(report["species"].items())[:10]:
+            lines.append(f"  {name:<22}: {p*100:.3f}%")
+        _, sp, _, _ = report["shiny"]
+        coins, c_lo, c_hi = report["coins"]
+        gems, g_lo, g_hi = report["gems"]
+        lines.append("")
+        lines.append(f"Shiny      : {sp*100:.4f}%")
+        lines.append(f"Coins/cast : {coins:,.1f} (95% CI {c_lo:,.1f} – {c_hi:,.1f})")
+        lines.append(f"Gems/cast  : {gems:.3f} (95% CI {g_lo:.3f} – {g_hi:.3f})")
+        lines.append(f"XP/cast    : {report['xp']:.0f}")
+
+        await ctx.send("```\n" + "\n".join(lines) + "\n```")
+
+    @fish.error
+    async def fish_error(self, ctx: commands.Context, error: Exception):
+        if isinstance(error, commands.CommandOnCooldown):
+            await ctx.send(f"⏳ Chờ **{error.retry_after:.1f}s** rồi câu tiếp nhé!", delete_after=3)
+        elif isinstance(error, commands.MaxConcurrencyReached):
+            await ctx.send("⏳ Đang xử lý lệnh trước của bạn, vui lòng đợi...", delete_after=3)
+        elif not is_stale_write(error):  # StaleWriteError: on_command_error (main.py) báo người chơi
+            await ctx.send("❌ Lỗi khi câu cá, thử lại sau.")
+
+
+async def setup(bot: commands.Bot):
     await bot.add_cog(FishCog(bot))
\ No newline at end of file
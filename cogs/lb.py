@@ -2,70 +2,45 @@
 from __future__ import annotations
 import discord
 from discord.ext import commands
-from typing import Dict, Tuple, List, Optional, Any
+from typing import Tuple, List, Optional, Any
+from user_resolver import UserResolver
+from fish_catalog import SPECIES as FISH_SPECIES, EMOJI as FISH_EMO_MAP
 
 EMBED_COLOR = 0x9B59B6  # Purple
 
+# Tên lệnh con -> (bảng trong DataManager.leaderboards, tiêu đề, đơn vị)
+BOARD_INFO = {
+    "cash": ("wallet", "💰 Tiền", "coins"),
+    "gem": ("gems", "💎 Gem", "gems"),
+    "level": ("level", "⭐ Cấp độ", ""),
+    "fish": ("fish", "🐟 Cá đắt nhất", "coins"),
+}
+BOARD_ALIASES = {"money": "cash", "wallet": "cash", "gems": "gem", "lv": "level", "lvl": "level"}
+
 class LeaderboardCog(commands.Cog, name="Leaderboard"):
     """Hiển thị bảng xếp hạng người chơi."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-
-    def _read_all_users(self) -> Dict[str, Dict]:
-        """Reads all user data from the DataManager."""
-        try:
-            # Prefer the public API if available
-            if hasattr(self.bot.data, "read_all_users"):
-                return self.bot.data.read_all_users()
-        except Exception:
-            pass
-        # Fallback to the old method
-        try:
-            data = self.bot.data._read_sync()
-            return data.get("USERS", {})
-        except Exception:
-            return {}
-
-    async def _get_user_mention(self, user_id: int) -> str:
-        """Gets a user mention, fetching the user if not in cache."""
-        user = self.bot.get_user(user_id)
-        if user is None:
-            try:
-                user = await self.bot.fetch_user(user_id)
-            except discord.NotFound:
-                return f"<Unknown User {user_id}>"
-        return user.mention
+        # Tra tên user theo lô (gather + TTL cache), dùng chung với bot nếu main.py đã tạo
+        self.users: UserResolver = getattr(bot, "user_resolver", None) or UserResolver(bot)
 
     # =========================
     # Leaderboard: Most Expensive Fish
     # =========================
-    def _make_fish_leaderboard(self, limit: int) -> List[Tuple[int, int, str]]:
+    def _make_fish_leaderboard(self, limit: int) -> List[Tuple[int, int, str, str]]:
         """
         Creates a leaderboard of users with the most expensive single fish.
-        Returns a list of (user_id, sell_price, fish_name).
+        Returns a list of (user_id, sell_price, fish_name, fish_rarity).
+        Đọc từ bảng xếp hạng dựng sẵn trong DataManager (O(k)), không quét toàn bộ user.
         """
-        users = self._read_all_users()
-        rows: List[Tuple[int, int, str, str]] = []  # (user_id, price, fish_name, fish_rarity)
-
-        for uid_str, udata in users.items():
-            user_fishes = udata.get("fishes", [])
-            if not user_fishes:
+        rows: List[Tuple[int, int, str, str]] = []
+        for _, uid_str, price, extra in self.bot.data.leaderboards.top("fish", limit):
+            name, rarity = extra or ("Unknown Fish", "")
+            try:
+                rows.append((int(uid_str), price, name, rarity))
+            except ValueError:
                 continue
-
-            # Find the most expensive fish for the current user
-            most_expensive_fish = max(user_fishes, key=lambda f: f.get("sell_price", 0))
-            price = most_expensive_fish.get("sell_price", 0)
-
-            if price > 0:
-                try:
-                    uid = int(uid_str)
-                    rows.append((uid, price, most_expensive_fish.get("name", "Unknown Fish"), most_expensive_fish.get("rarity", "")))
-                except ValueError:
-                    continue
-        
-        # Sort by price descending
-        rows.sort(key=lambda x: -x[1])
-        return rows[:limit]
+        return rows
 
     # =========================
     # Leaderboard: Currency (Cash & Gems)
@@ -75,26 +50,18 @@ class LeaderboardCog(commands.Cog, name="Leaderboard"):
         Creates a leaderboard for a given currency (wallet or gems).
         Returns a list of (user_id, amount).
         """
-        users = self._read_all_users()
         rows: List[Tuple[int, int]] = []
+        for _, uid_str, amount, _ in self.bot.data.leaderboards.top(currency_type, limit):
+            try:
+                rows.append((int(uid_str), amount))
+            except ValueError:
+                continue
+        return rows
 
-        for uid_str, udata in users.items():
-            amount = udata.get(currency_type, 0)
-            if amount > 0:
-                try:
-                    uid = int(uid_str)
-                    rows.append((uid, amount))
-                except ValueError:
-                    continue
-        
-        # Sort by amount descending
-        rows.sort(key=lambda x: -x[1])
-        return rows[:limit]
-        
     @commands.hybrid_group(
         name="top",
         aliases=["lb"],
-        help="Hiển thị bảng xếp hạng. Sử dụng `/top [fish|cash|gem]`.",
+        help="Hiển thị bảng xếp hạng. Sử dụng `/top [fish|cash|gem|level|me]`.",
         invoke_without_command=True
     )
     async def top(self, ctx: commands.Context):
@@ -104,7 +71,9 @@ class LeaderboardCog(commands.Cog, name="Leaderboard"):
             description="Sử dụng lệnh con để xem chi tiết:\n" 
                         "• `/top fish`: Top cá nhân có con cá đắt nhất.\n" 
                         "• `/top cash`: Top người chơi giàu nhất.\n" 
-                        "• `/top gem`: Top người chơi nhiều gem nhất.",
+                        "• `/top gem`: Top người chơi nhiều gem nhất.\n" 
+                        "• `/top level`: Top người chơi cấp cao nhất.\n" 
+                        "• `/top me`: Hạng của bạn và những người xung quanh.",
             color=EMBED_COLOR
         )
         await ctx.send(embed=embed)
@@ -121,9 +90,10 @@ class LeaderboardCog(commands.Cog, name="Leaderboard"):
             await ctx.send(embed=embed)
             return
 
+        labels = await self.users.labels(uid for uid, *_ in rows)
         lines = []
         for i, (uid, price, fish_name, fish_rarity) in enumerate(rows, start=1):
-            mention = await self._get_user_mention(uid)
+            mention = labels[uid]
             lines.append(f"**{i}.** {mention} - **{fish_name}** ({fish_rarity}) - **{price:,}** coins")
 
         embed = discord.Embed(title=title, description="\n".join(lines), color=EMBED_COLOR)
@@ -141,9 +111,10 @@ class LeaderboardCog(commands.Cog, name="Leaderboard"):
             await ctx.send(embed=embed)
             return
 
+        labels = await self.users.labels(uid for uid, _ in rows)
         lines = []
         for i, (uid, amount) in enumerate(rows, start=1):
-            mention = await self._get_user_mention(uid)
+            mention = labels[uid]
             lines.append(f"**{i}.** {mention} — **{amount:,}** coins")
 
         embed = discord.Embed(title=title, description="\n".join(lines), color=EMBED_COLOR)
@@ -161,13 +132,115 @@ class LeaderboardCog(commands.Cog, name="Leaderboard"):
             await ctx.send(embed=embed)
             return
 
+        labels = await self.users.labels(uid for uid, _ in rows)
         lines = []
         for i, (uid, amount) in enumerate(rows, start=1):
-            mention = await self._get_user_mention(uid)
+            mention = labels[uid]
             lines.append(f"**{i}.** {mention} — **{amount:,}** gems")
 
         embed = discord.Embed(title=title, description="\n".join(lines), color=EMBED_COLOR)
         await ctx.send(embed=embed)
 
+    @top.command(name="level", aliases=["lv", "lvl"], help="Bảng xếp hạng cấp độ.")
+    async def top_level(self, ctx: commands.Context, limit: int = 10):
+        """Bảng xếp hạng cấp độ (cùng cấp thì so XP)."""
+        limit = max(1, min(limit, 25)) # Clamp limit
+        rows = self.bot.data.leaderboards.top("level", limit)
+
+        title = "⭐ Bảng Xếp Hạng Cấp Độ"
+        if not rows:
+            embed = discord.Embed(title=title, description="Chưa có dữ liệu về cấp độ của người chơi.", color=EMBED_COLOR)
+            await ctx.send(embed=embed)
+            return
+
+        labels = await self.users.labels(int(row[1]) for row in rows)
+        lines = []
+        for rank, uid_str, (level, xp), _ in rows:
+            mention = labels[int(uid_str)]
+            lines.append(f"**{rank}.** {mention} — **Lv.{level}** ({xp:,} XP)")
+
+        embed = discord.Embed(title=title, description="\n".join(lines), color=EMBED_COLOR)
+        await ctx.send(embed=embed)
+
+    @top.command(name="me", aliases=["rank"], help="Hạng của bạn: `/top me [cash|gem|level|fish]`.")
+    async def top_me(self, ctx: commands.Context, board: str = "cash"):
+        """Hạng của người gọi trên mọi bảng + những người xung quanh trên một bảng."""
+        key = BOARD_ALIASES.get(board.lower(), board.lower())
+        if key not in BOARD_INFO:
+            await ctx.send(f"❌ Bảng không hợp lệ. Chọn một trong: {', '.join(BOARD_INFO)}.")
+            return
+        lbs = self.bot.data.leaderboards
+        uid = ctx.author.id
+
+        summary = []
+        for name, (board_name, label, _) in BOARD_INFO.items():
+            r = lbs.rank(board_name, uid)
+            total = lbs.size(board_name)
+            summary.append(f"{label}: **#{r:,}** / {total:,}" if r else f"{label}: _chưa xếp hạng_")
+
+        board_name, label, unit = BOARD_INFO[key]
+        rank, rows = lbs.around(board_name, uid, 2)
+        if rank is None:
+            near = "_Bạn chưa có hạng trên bảng này._"
+        else:
+            labels = await self.users.labels(int(row[1]) for row in rows)
+            lines = []
+            for r, uid_str, score, extra in rows:
+                mention = labels[int(uid_str)]
+                if board_name == "level":
+                    value = f"**Lv.{score[0]}** ({score[1]:,} XP)"
+                elif board_name == "fish":
+                    value = f"**{(extra or ('?', ''))[0]}** - **{score:,}** {unit}"
+                else:
+                    value = f"**{score:,}** {unit}"
+                marker = "👉 " if uid_str == str(uid) else ""
+                lines.append(f"{marker}**{r}.** {mention} — {value}")
+            near = "\n".join(lines)
+
+        embed = discord.Embed(title=f"🏅 Hạng của {ctx.author.display_name}", description="\n".join(summary), color=EMBED_COLOR)
+        embed.add_field(name=f"{label} — xung quanh bạn", value=near, inline=False)
+        await ctx.send(embed=embed)
+
+    # =========================
+    # Sổ kỷ lục theo loài
+    # =========================
+    @staticmethod
+    def _find_species(query: str) -> str | None:
+        q = query.strip().lower()
+        exact = [n for n in FISH_SPECIES if n.lower() == q]
+        if exact:
+            return exact[0]
+        partial = [n for n in FISH_SPECIES if q in n.lower()]
+        return partial[0] if len(partial) == 1 else None
+
+    @commands.hybrid_command(name="records", aliases=["record", "kyluc"], help="Sổ kỷ lục: `/records global` hoặc `/records <tên cá>`.")
+    async def records(self, ctx: commands.Context, *, target: str = "global"):
+        """Top con cá nặng nhất / đắt nhất từng câu được (theo loài hoặc toàn server)."""
+        book = self.bot.data.records
+        if target.strip().lower() in ("global", "all", "server"):
+            species, title = None, "🏆 Sổ Kỷ Lục Toàn Server"
+        else:
+            species = self._find_species(target)
+            if species is None:
+                await ctx.send(f"❌ Không tìm thấy loài cá **{target}** (hoặc tên khớp nhiều loài).")
+                return
+            title = f"🏆 Sổ Kỷ Lục: {FISH_EMO_MAP.get(species, '')} {species}"
+
+        embed = discord.Embed(title=title, color=EMBED_COLOR)
+        for metric, label in (("weight", "⚖️ Nặng nhất"), ("value", "💰 Đắt nhất")):
+            entries = book.top(species, metric)
+            if not entries:
+                embed.add_field(name=label, value="_Chưa có kỷ lục._", inline=False)
+                continue
+            # Chỉ cần mention, không gọi API tra user
+            mentions = self.users.mentions(int(e["uid"]) for e in entries)
+            lines = []
+            for i, e in enumerate(entries, start=1):
+                shiny = "✨" if e.get("shiny") else ""
+                fish = f"{shiny}{e.get('name')} " if species is None else shiny
+                lines.append(f"**{i}.** {mentions[int(e['uid'])]} — {fish}**{e.get('weight')}kg** | **{e.get('sell_price', 0):,}** coins (<t:{int(e.get('caught_at', 0))}:d>)")
+            embed.add_field(name=label, value="\n".join(lines), inline=False)
+        await ctx.send(embed=embed)
+
 async def setup(bot: commands.Bot):
     await bot.add_cog(LeaderboardCog(bot))
\ No newline at end of file
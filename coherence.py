@@ -0,0 +1,164 @@
+# coherence.py
+"""Kênh đồng bộ cache giữa nhiều process dùng chung một database.
+
+Mỗi lần ghi, DataManager phát một sự kiện `{origin, coll, id, fields, version}`;
+các process khác nhận sự kiện và vá (nếu sự kiện kèm document) hoặc tải lại /
+loại bản cache của mình.
+
+- LocalBus: chạy trong cùng process (test, benchmark, nhiều DataManager một process).
+- MongoChangeStreamBus: dùng change stream của Mongo (cần replica set) cho production.
+
+Chọn bằng biến môi trường DATA_COHERENCE=off|local|mongo.
+"""
+from __future__ import annotations
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+Event = Dict[str, Any]
+Handler = Callable[[Event], Awaitable[None]]
+
+
+class StaleWriteError(RuntimeError):
+    """Update bị từ chối vì document đã bị process khác sửa (version không khớp).
+    Cache của user đã được tải lại trước khi lỗi này được ném ra."""
+
+    def __init__(self, coll: str, _id: str):
+        super().__init__(f"Dữ liệu {coll}/{_id} đã bị thay đổi bởi process khác, hãy thử lại.")
+        self.coll = coll
+        self.id = _id
+
+
+def is_stale_write(error: BaseException | None) -> bool:
+    """True nếu `error` (hoặc lỗi gốc được bọc trong `.original`, vd. CommandInvokeError) là StaleWriteError."""
+    while error is not None:
+        if isinstance(error, StaleWriteError):
+            return True
+        error = getattr(error, "original", None)
+    return False
+
+
+class CoherenceBus:
+    name = "base"
+
+    async def start(self, node_id: str, handler: Handler) -> None:
+        """Bắt đầu nhận sự kiện của các node khác (bỏ qua sự kiện có origin == node_id)."""
+        raise NotImplementedError
+
+    async def publish(self, event: Event) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+
+class LocalHub:
+    """Nơi các LocalBus trong cùng process đăng ký để nhận sự kiện của nhau."""
+    _default: "LocalHub | None" = None
+
+    def __init__(self):
+        self.peers: list["LocalBus"] = []
+
+    @classmethod
+    def default(cls) -> "LocalHub":
+        if cls._default is None:
+            cls._default = cls()
+        return cls._default
+
+
+class LocalBus(CoherenceBus):
+    name = "local"
+
+    def __init__(self, hub: LocalHub | None = None):
+        self.hub = hub or LocalHub.default()
+        self.node_id: str | None = None
+        self._handler: Handler | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self, node_id: str, handler: Handler) -> None:
+        self.node_id, self._handler = node_id, handler
+        self.hub.peers.append(self)
+
+    async def publish(self, event: Event) -> None:
+        for peer in list(self.hub.peers):
+            if peer is self or peer._handler is None or peer.node_id == event.get("origin"):
+                continue
+            task = asyncio.ensure_future(peer._handler(dict(event)))
+            peer._tasks.add(task)
+            task.add_done_callback(peer._tasks.discard)
+
+    async def close(self) -> None:
+        if self in self.hub.peers:
+            self.hub.peers.remove(self)
+        for task in list(self._tasks):
+            task.cancel()
+        self._tasks.clear()
+
+
+class MongoChangeStreamBus(CoherenceBus):
+    """Nghe change stream của các collection. Chính các lần ghi đã là sự kiện nên `publish`
+    không làm gì; node ghi được nhận biết qua field `updated_by` trong document."""
+    name = "mongo"
+
+    def __init__(self, db, collections=("users", "guilds"), retry_delay: float = 2.0):
+        self.db = db
+        self.collections = tuple(collections)
+        self.retry_delay = float(retry_delay)
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self, node_id: str, handler: Handler) -> None:
+        for coll in self.collections:
+            self._tasks.append(asyncio.create_task(self._watch(coll, node_id, handler)))
+
+    async def _watch(self, coll: str, node_id: str, handler: Handler) -> None:
+        resume_token = None
+        while True:
+            try:
+                async with self.db[coll].watch(full_document="updateLookup", resume_after=resume_token) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        doc = change.get("fullDocument")
+                        if doc is not None and doc.get("updated_by") == node_id:
+                            continue
+                        fields = list((change.get("updateDescription") or {}).get("updatedFields", {}).keys())
+                        await handler({
+                            "origin": doc.get("updated_by") if doc else None,
+                            "coll": coll,
+                            "id": change.get("documentKey", {}).get("_id"),
+                            "fields": sorted({f.split(".", 1)[0] for f in fields}) or None,
+                            "version": doc.get("version") if doc else None,
+                            "doc": doc,
+                        })
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Change stream {coll} bị ngắt (sẽ kết nối lại): {e}")
+                await asyncio.sleep(self.retry_delay)
+
+    async def publish(self, event: Event) -> None:
+        return None
+
+    async def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._tasks.clear()
+
+
+def open_bus(store, kind: str | None = None) -> CoherenceBus | None:
+    """Tạo bus theo `kind` hoặc DATA_COHERENCE. Trả về None nếu tắt (mặc định)."""
+    kind = (kind or os.getenv("DATA_COHERENCE") or "off").lower()
+    if kind in ("off", "none", "0", ""):
+        return None
+    if kind == "local":
+        return LocalBus()
+    if kind == "mongo":
+        db = getattr(store, "db", None)
+        if db is None:
+            raise ValueError("DATA_COHERENCE=mongo cần storage backend Mongo.")
+        return MongoChangeStreamBus(db)
+    raise ValueError(f"DATA_COHERENCE không hợp lệ: {kind!r} (off|local|mongo)")
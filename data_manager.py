@@ -1,647 +1,2002 @@
-# data_manager.py
-from __future__ import annotations
-import asyncio
-import random
-import string
-import re
-import os
-from pathlib import Path
-from typing import Dict, Any
-try:
-    from motor.motor_asyncio import AsyncIOMotorClient
-except ImportError:
-    AsyncIOMotorClient = None
-
-
-class DataManager:
-    """Quản lý dữ liệu MongoDB với Write-Through Cache.
-    Phù hợp cho Render/Heroku vì dữ liệu lưu trên Cloud.
-    """
-    def __init__(self, data_file: Path):
-        # MongoDB Connection
-        # Lấy URI từ biến môi trường hoặc dùng localhost nếu test máy nhà
-        if AsyncIOMotorClient is None:
-            raise ImportError("❌ Thư viện 'motor' chưa được cài đặt. Hãy chạy lệnh: pip install motor dnspython")
-
-        self.mongo_uri = os.getenv("MONGO_URI", "mongodb://localhost:27017")
-        self.client = AsyncIOMotorClient(self.mongo_uri)
-        self.db = self.client["fishing_bot"]
-        self.users_col = self.db["users"]
-        self.guilds_col = self.db["guilds"]
-
-        # Cache (RAM) - Lưu toàn bộ user vào đây để đọc nhanh (Sync Getters)
-        self._users_cache: Dict[str, Any] = {}
-        self._guilds_cache: Dict[str, Any] = {}
-        self._initialized = False
-
-    async def initialize(self):
-        """Load dữ liệu từ Mongo vào RAM khi bot khởi động."""
-        if self._initialized:
-            return
-            
-        print("⏳ Đang tải dữ liệu từ MongoDB...")
-        async for user in self.users_col.find():
-            self._users_cache[user["_id"]] = user
-        
-        async for guild in self.guilds_col.find():
-            self._guilds_cache[guild["_id"]] = guild
-        print(f"✅ Đã tải {len(self._users_cache)} users và {len(self._guilds_cache)} guilds.")
-        self._initialized = True
-
-    def _ensure_user(self, user_id: str):
-        """Tạo user mới trong cache nếu chưa có."""
-        if user_id not in self._users_cache:
-            self._users_cache[user_id] = self._empty_user()
-            self._users_cache[user_id]["_id"] = user_id
-
-    # ---------- Model ----------
-    @staticmethod
-    def _empty_user() -> Dict[str, Any]:
-        # THÊM ví tiền (wallet), XP và Level, rod info vào hồ sơ user
-        return {
-            "wallet": 0,
-            "gems": 0,
-            "xp": 0,
-            "level": 1,
-            "rod_level": 1,
-            "max_rod_level": 1,
-            "inventory": {
-                "common": {},
-                "uncommon": {},
-                "rare": {},
-                "epic": {},
-                "legendary": {},
-                "mythical": {},
-                "unreal": {},
-            },
-            # shiny_inventory: lưu số lượng cá shiny theo bậc -> tên
-            "shiny_inventory": {
-                "common": {},
-                "uncommon": {},
-                "rare": {},
-                "epic": {},
-                "legendary": {},
-                "mythical": {},
-                "unreal": {},
-            },
-            # items: mapping item_id -> count (vật phẩm có thể bán; keys là IDs từ game_items.ITEMS)
-            "items": {},
-            # equipped_items: list of item IDs currently equipped
-            "equipped_items": [],
-            # eggs: danh sách trứng đang ấp/chờ nở; mỗi egg là dict với các khóa: id, tier, hatch_at (epoch)
-            "eggs": [],
-            # pets: danh sách pet_id mà user sở hữu (pet passive buffs)
-            "pets": [],
-            # active_pets: danh sách pet_id đang được kích hoạt (áp dụng buffs)
-            "active_pets": [],
-            # last_daily: epoch timestamp của lần nhận daily cuối
-            "last_daily": 0,
-            # fishes: list of caught fish objects. Each fish is a dict with keys like:
-            # id, name, rarity, weight (kg), weight_class, caught_at, variation (optional), price_per_kg (optional)
-            "fishes": [],
-            # aquarium: dict of fish_id -> {added_at: timestamp}
-            "aquarium": {},
-        }
-
-    def _generate_unique_fish_id(self, user_id: int) -> str:
-        """Generate a unique 4-char alphanumeric fish id for the given user."""
-        chars = string.ascii_letters + string.digits
-        uid = str(user_id)
-        existing = {f.get("id") for f in self._users_cache.get(uid, self._empty_user()).get("fishes", [])}
-        for _ in range(500):
-            cand = ''.join(random.choices(chars, k=4))
-            if cand not in existing:
-                return cand
-        # fallback (extremely unlikely)
-        return ''.join(random.choices(chars, k=4))
-
-    # ---------- Inventory ----------
-    def get_inventory(self, user_id: int) -> Dict[str, Dict[str, int]]:
-        """Lấy kho đồ dạng {rarity: {fish_name: count}}."""
-        return self._users_cache.get(str(user_id), self._empty_user()).get("inventory", {})
-
-    async def set_inventory(self, user_id: int, new_inventory: Dict[str, Dict[str, int]]) -> None:
-        """Ghi đè kho đồ (dùng sau các thao tác như bán).
-        new_inventory nên có đủ các bậc: common/uncommon/rare/epic (sẽ được chuẩn hóa).
-        """
-        uid = str(user_id)
-        self._ensure_user(uid)
-
-        # Chuẩn hóa dữ liệu để luôn có đủ các bậc
-        normalized = {
-            "common": dict(new_inventory.get("common", {})),
-            "uncommon": dict(new_inventory.get("uncommon", {})),
-            "rare": dict(new_inventory.get("rare", {})),
-            "epic": dict(new_inventory.get("epic", {})),
-            "legendary": dict(new_inventory.get("legendary", {})),
-            "mythical": dict(new_inventory.get("mythical", {})),
-            "unreal": dict(new_inventory.get("unreal", {})),
-        }
-        self._users_cache[uid]["inventory"] = normalized
-        await self.users_col.update_one({"_id": uid}, {"$set": {"inventory": normalized}}, upsert=True)
-
-    # ---------- Items (vật phẩm) ----------
-    def get_items(self, user_id: int) -> Dict[str, int]:
-        """Trả về dict item_name -> count."""
-        return self._users_cache.get(str(user_id), self._empty_user()).get("items", {})
-
-    async def add_item(self, user_id: int, item_id: str, count: int = 1) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        items = self._users_cache[uid].setdefault("items", {})
-        items[item_id] = items.get(item_id, 0) + int(count)
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {"items": items}}, upsert=True)
-
-    async def remove_item(self, user_id: int, item_id: str, count: int = 1) -> bool:
-        """Giảm số lượng item; trả về True nếu thành công, False nếu không đủ."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        items = self._users_cache[uid].setdefault("items", {})
-        cur = int(items.get(item_id, 0))
-        if cur < count:
-            return False
-        if cur == count:
-            items.pop(item_id, None)
-        else:
-            items[item_id] = cur - count
-            
-        await self.users_col.update_one({"_id": uid}, {"$set": {"items": items}}, upsert=True)
-        return True
-
-    def get_equipped_items(self, user_id: int) -> list[str]:
-        return list(self._users_cache.get(str(user_id), self._empty_user()).get("equipped_items", []))
-
-    async def set_equipped_items(self, user_id: int, equipped: list[str]) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid]["equipped_items"] = list(equipped)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"equipped_items": list(equipped)}}, upsert=True)
-
-    # ---------- Eggs & Pets ----------
-    def get_eggs(self, user_id: int) -> list[dict]:
-        return list(self._users_cache.get(str(user_id), self._empty_user()).get("eggs", []))
-
-    async def add_egg(self, user_id: int, egg: dict) -> str:
-        """egg should be dict with keys at least: id, tier, hatch_at."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid].setdefault("eggs", []).append(dict(egg))
-        await self.users_col.update_one({"_id": uid}, {"$push": {"eggs": dict(egg)}}, upsert=True)
-        return egg.get("id")
-
-    async def remove_egg(self, user_id: int, egg_id: str) -> bool:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        eggs = self._users_cache[uid].setdefault("eggs", [])
-        new = [e for e in eggs if e.get("id") != egg_id]
-        if len(new) == len(eggs):
-            return False
-        self._users_cache[uid]["eggs"] = new
-        await self.users_col.update_one({"_id": uid}, {"$set": {"eggs": new}}, upsert=True)
-        return True
-
-    def get_pets(self, user_id: int) -> list[str]:
-        return list(self._users_cache.get(str(user_id), self._empty_user()).get("pets", []))
-
-    async def add_pet(self, user_id: int, pet_id: str) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid].setdefault("pets", []).append(pet_id)
-        await self.users_col.update_one({"_id": uid}, {"$push": {"pets": pet_id}}, upsert=True)
-
-    async def remove_pet(self, user_id: int, pet_id: str) -> bool:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        pets = self._users_cache[uid].setdefault("pets", [])
-        if pet_id not in pets:
-            return False
-        pets.remove(pet_id)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"pets": pets}}, upsert=True)
-        return True
-
-    # ---------- Active pets (đang sử dụng) ----------
-    def get_active_pets(self, user_id: int) -> list[str]:
-        return list(self._users_cache.get(str(user_id), self._empty_user()).get("active_pets", []))
-
-    async def set_active_pets(self, user_id: int, active: list[str]) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid]["active_pets"] = list(active)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"active_pets": list(active)}}, upsert=True)
-
-    async def add_active_pet(self, user_id: int, pet_id: str) -> bool:
-        """Add pet to active list; return True if added, False if already active."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        act = self._users_cache[uid].setdefault("active_pets", [])
-        if pet_id in act:
-            return False
-        act.append(pet_id)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"active_pets": act}}, upsert=True)
-        return True
-
-    async def remove_active_pet(self, user_id: int, pet_id: str) -> bool:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        act = self._users_cache[uid].setdefault("active_pets", [])
-        if pet_id not in act:
-            return False
-        act.remove(pet_id)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"active_pets": act}}, upsert=True)
-        return True
-
-    async def add_fish(self, user_id: int, rarity: str, fish_name: str) -> None:
-        """Tăng 1 con cá vào kho."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-
-        rarity = rarity.lower()
-        inv = self._users_cache[uid]["inventory"]
-        inv.setdefault(rarity, {})
-        inv[rarity][fish_name] = inv[rarity].get(fish_name, 0) + 1
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {f"inventory.{rarity}.{fish_name}": inv[rarity][fish_name]}}, upsert=True)
-
-    async def reset_inventory(self, user_id: int) -> None:
-        """Xóa sạch kho đồ (không ảnh hưởng ví)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        empty_inv = {"common": {}, "uncommon": {}, "rare": {}, "epic": {}}
-        self._users_cache[uid]["inventory"] = empty_inv
-        self._users_cache[uid]["shiny_inventory"] = empty_inv
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {"inventory": empty_inv, "shiny_inventory": empty_inv}}, upsert=True)
-
-    # ---------- Fish objects (new model) ----------
-    def get_fish_objects(self, user_id: int) -> list:
-        """Return list of fish objects the user owns."""
-        return list(self._users_cache.get(str(user_id), self._empty_user()).get("fishes", []))
-
-    async def add_caught_fish(self, user_id: int, fish: dict) -> str:
-        """Add a fish object to user's 'fishes' list. Returns fish id."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        lst = self._users_cache[uid].setdefault("fishes", [])
-        fish_copy = dict(fish)
-        fid = fish_copy.get("id")
-        # Ensure id follows 4-char alnum format and is unique per-user
-        if not isinstance(fid, str) or not re.fullmatch(r'[A-Za-z0-9]{4}', fid):
-            fid = self._generate_unique_fish_id(user_id)
-        else:
-            existing = {f.get("id") for f in lst}
-            if fid in existing:
-                fid = self._generate_unique_fish_id(user_id)
-        fish_copy["id"] = fid
-        lst.append(fish_copy)
-        
-        await self.users_col.update_one({"_id": uid}, {"$push": {"fishes": fish_copy}}, upsert=True)
-        return fid
-
-    async def remove_fish_by_id(self, user_id: int, fish_id: str) -> bool:
-        """Remove a fish by its id; return True if removed, False if not found."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        lst = self._users_cache[uid].setdefault("fishes", [])
-        new = [f for f in lst if f.get("id") != fish_id]
-        if len(new) == len(lst):
-            return False
-        self._users_cache[uid]["fishes"] = new
-        await self.users_col.update_one({"_id": uid}, {"$set": {"fishes": new}}, upsert=True)
-        return True
-
-    async def migrate_inventory_to_objects(self, user_id: int, game_config_defaults: dict | None = None) -> int:
-        """Helper to migrate legacy inventory counts to fish objects."""
-        uid = str(user_id)
-        if uid not in self._users_cache:
-            return 0
-        u = self._users_cache[uid]
-        inv = u.get('inventory', {})
-        migr_count = 0
-        # fallbacks
-        price_map = (game_config_defaults or {}).get('PRICE_PER_KG_BY_RARITY', {})
-        weight_map = (game_config_defaults or {}).get('WEIGHT_BY_RARITY', {})
-        
-        # Import config once outside loop
-        try:
-            from game_config import PRICE_PER_KG_BY_RARITY as CFG_PRICE, WEIGHT_CLASS_PCT_RANGES as CFG_PCT_RANGES, FISH_POOLS as CFG_POOLS
-        except Exception:
-            CFG_PRICE, CFG_PCT_RANGES, CFG_POOLS = {}, {"normal": (0.9, 1.1)}, {}
-            
-        import random
-        import time
-
-        for rarity, bucket in inv.items():
-            for name, cnt in list(bucket.items()):
-                for _ in range(int(cnt)):
-                    # generate fish object using per-fish base_weight and price if available
-                    # look up fish definition in FISH_POOLS by rarity and name
-                    fish_def = None
-                    try:
-                        pool = CFG_POOLS.get(rarity, [])
-                        for ent in pool:
-                            if ent.get('name') == name:
-                                fish_def = ent
-                                break
-                    except Exception:
-                        fish_def = None
-                    # determine base weight
-                    if fish_def and fish_def.get('base_weight') is not None:
-                        base_w = float(fish_def.get('base_weight'))
-                    else:
-                        wmin, wmax = weight_map.get(rarity, (0.5, 2.0))
-                        base_w = (float(wmin) + float(wmax)) / 2.0
-                    # sample weight using normal class pct (migrate to normal class)
-                    try:
-                        pmin, pmax = CFG_PCT_RANGES.get('normal', (0.9, 1.1))
-                        weight = round(base_w * random.uniform(float(pmin), float(pmax)), 2)
-                    except Exception:
-                        weight = round(base_w, 2)
-                    # determine price_per_kg (per-fish override > provided map > rarity map)
-                    if fish_def and fish_def.get('price_per_kg') is not None:
-                        price_per_kg = int(fish_def.get('price_per_kg'))
-                    else:
-                        price_per_kg = int(price_map.get(rarity, CFG_PRICE.get(rarity, 10)))
-                    fish_obj = {
-                        'id': self._generate_unique_fish_id(user_id),
-                        'name': name,
-                        'rarity': rarity,
-                        'weight': weight,
-                        'weight_class': 'normal',
-                        'price_per_kg': price_per_kg,
-                        'sell_price': int(price_per_kg * weight),
-                        'caught_at': int(time.time()),
-                        'shiny': False,
-                    }
-                    self._users_cache[uid].setdefault('fishes', []).append(fish_obj)
-                    migr_count += 1
-        # Clear legacy inventory
-        empty_inv = {"common": {}, "uncommon": {}, "rare": {}, "epic": {}}
-        self._users_cache[uid]['inventory'] = empty_inv
-        
-        # Update Mongo with both changes
-        await self.users_col.update_one(
-            {"_id": uid}, 
-            {"$set": {"fishes": self._users_cache[uid]['fishes'], "inventory": empty_inv}}, 
-            upsert=True
-        )
-        return migr_count
-
-    # ---------- Shiny fish support ----------
-    def get_shiny_inventory(self, user_id: int) -> Dict[str, Dict[str, int]]:
-        """Lấy kho cá shiny: {rarity: {fish_name: count}}."""
-        return self._users_cache.get(str(user_id), self._empty_user()).get("shiny_inventory", {"common": {}, "uncommon": {}, "rare": {}, "epic": {}, "legendary": {}, "mythical": {}, "unreal": {}})
-
-    async def set_shiny_inventory(self, user_id: int, new_shiny_inventory: Dict[str, Dict[str, int]]) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        normalized = {
-            "common": dict(new_shiny_inventory.get("common", {})),
-            "uncommon": dict(new_shiny_inventory.get("uncommon", {})),
-            "rare": dict(new_shiny_inventory.get("rare", {})),
-            "epic": dict(new_shiny_inventory.get("epic", {})),
-            "legendary": dict(new_shiny_inventory.get("legendary", {})),
-            "mythical": dict(new_shiny_inventory.get("mythical", {})),
-            "unreal": dict(new_shiny_inventory.get("unreal", {})),
-        }
-        self._users_cache[uid]["shiny_inventory"] = normalized
-        await self.users_col.update_one({"_id": uid}, {"$set": {"shiny_inventory": normalized}}, upsert=True)
-
-    async def add_shiny_fish(self, user_id: int, rarity: str, fish_name: str, count: int = 1) -> None:
-        """Tăng số lượng cá shiny."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        rarity = rarity.lower()
-        shin = self._users_cache[uid].setdefault("shiny_inventory", {})
-        shin.setdefault(rarity, {})
-        shin[rarity][fish_name] = shin[rarity].get(fish_name, 0) + int(count)
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {f"shiny_inventory.{rarity}.{fish_name}": shin[rarity][fish_name]}}, upsert=True)
-
-    async def remove_shiny_fish(self, user_id: int, rarity: str, fish_name: str, count: int = 1) -> bool:
-        """Giảm số lượng cá shiny; trả về True nếu thành công, False nếu không đủ."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        shin = self._users_cache[uid].setdefault("shiny_inventory", {})
-        bucket = shin.setdefault(rarity.lower(), {})
-        cur = int(bucket.get(fish_name, 0))
-        if cur < count:
-            return False
-        if cur == count:
-            bucket.pop(fish_name, None)
-        else:
-            bucket[fish_name] = cur - count
-            
-        await self.users_col.update_one({"_id": uid}, {"$set": {"shiny_inventory": shin}}, upsert=True)
-        return True
-
-    # ---------- Aquarium (new) ----------
-    def get_aquarium(self, user_id: int) -> dict:
-        """Lấy dữ liệu bể cá của người chơi."""
-        return self._users_cache.get(str(user_id), self._empty_user()).get("aquarium", {})
-
-    async def set_aquarium(self, user_id: int, aquarium_data: dict) -> None:
-        """Ghi đè toàn bộ dữ liệu bể cá."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid]["aquarium"] = dict(aquarium_data)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"aquarium": dict(aquarium_data)}}, upsert=True)
-
-    # ---------- Wallet ----------
-    def get_balance(self, user_id: int) -> int:
-        """Lấy số dư ví (coins)."""
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("wallet", 0))
-
-    async def add_money(self, user_id: int, amount: int) -> int:
-        """Cộng (hoặc trừ nếu âm) tiền vào ví. Trả về số dư mới (>= 0)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        cur = int(self._users_cache[uid].get("wallet", 0))
-        new_val = max(0, cur + int(amount))
-        self._users_cache[uid]["wallet"] = new_val
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {"wallet": new_val}}, upsert=True)
-        return new_val
-
-    async def set_money(self, user_id: int, amount: int) -> int:
-        """Đặt số dư ví về một giá trị cụ thể (>= 0)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        val = max(0, int(amount))
-        self._users_cache[uid]["wallet"] = val
-        await self.users_col.update_one({"_id": uid}, {"$set": {"wallet": val}}, upsert=True)
-        return val
-
-    # ---------- Gems (mới) ----------
-    def get_gems(self, user_id: int) -> int:
-        """Lấy số lượng gem hiện tại."""
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("gems", 0))
-
-    async def add_gems(self, user_id: int, amount: int) -> int:
-        """Cộng (hoặc trừ) gem vào tài khoản. Trả về số gem mới (>=0)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        cur = int(self._users_cache[uid].get("gems", 0))
-        new_val = max(0, cur + int(amount))
-        self._users_cache[uid]["gems"] = new_val
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {"gems": new_val}}, upsert=True)
-        return new_val
-
-    async def set_gems(self, user_id: int, amount: int) -> int:
-        """Đặt gem về một giá trị cụ thể (>=0)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        val = max(0, int(amount))
-        self._users_cache[uid]["gems"] = val
-        await self.users_col.update_one({"_id": uid}, {"$set": {"gems": val}}, upsert=True)
-        return val
-
-    # ---------- Daily timestamp (mới) ----------
-    def get_last_daily(self, user_id: int) -> int:
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("last_daily", 0))
-
-    async def set_last_daily(self, user_id: int, timestamp: int) -> None:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        self._users_cache[uid]["last_daily"] = int(timestamp)
-        await self.users_col.update_one({"_id": uid}, {"$set": {"last_daily": int(timestamp)}}, upsert=True)
-
-    # ---------- XP & Level ----------
-    def get_xp(self, user_id: int) -> int:
-        """Lấy XP hiện thời của user."""
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("xp", 0))
-
-    async def add_xp(self, user_id: int, amount: int) -> int:
-        """Cộng XP (dương hoặc âm). Trả về XP mới."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        cur = int(self._users_cache[uid].get("xp", 0))
-        new_val = max(0, cur + int(amount))
-        self._users_cache[uid]["xp"] = new_val
-        
-        await self.users_col.update_one({"_id": uid}, {"$set": {"xp": new_val}}, upsert=True)
-        return new_val
-
-    async def set_xp(self, user_id: int, amount: int) -> int:
-        """Đặt XP về giá trị cụ thể (>=0)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        val = max(0, int(amount))
-        self._users_cache[uid]["xp"] = val
-        await self.users_col.update_one({"_id": uid}, {"$set": {"xp": val}}, upsert=True)
-        return val
-
-    def get_level(self, user_id: int) -> int:
-        """Lấy cấp hiện thời của user."""
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("level", 1))
-
-    async def set_level(self, user_id: int, level: int) -> int:
-        """Đặt cấp cho user (>=1)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        level = max(1, int(level))
-        self._users_cache[uid]["level"] = level
-        await self.users_col.update_one({"_id": uid}, {"$set": {"level": level}}, upsert=True)
-        return level
-
-
-    # ---------- Rod (cần câu) ----------
-    def get_rod_level(self, user_id: int) -> int:
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("rod_level", 1))
-
-    async def set_rod_level(self, user_id: int, level: int) -> int:
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        level = max(1, int(level))
-        self._users_cache[uid]["rod_level"] = level
-        await self.users_col.update_one({"_id": uid}, {"$set": {"rod_level": level}}, upsert=True)
-        return level
-
-    def get_max_rod_level(self, user_id: int) -> int:
-        """Lấy cấp cần cao nhất mà user từng mua/so hữu."""
-        return int(self._users_cache.get(str(user_id), self._empty_user()).get("max_rod_level", 1))
-
-    async def set_max_rod_level(self, user_id: int, level: int) -> int:
-        """Cập nhật max_rod_level (không giảm)."""
-        uid = str(user_id)
-        self._ensure_user(uid)
-        
-        level = max(1, int(level))
-        current = int(self._users_cache[uid].get("max_rod_level", 1))
-        if level > current:
-            self._users_cache[uid]["max_rod_level"] = level
-            await self.users_col.update_one({"_id": uid}, {"$set": {"max_rod_level": level}}, upsert=True)
-            return level
-        return current
-
-
-    # ---------- Public getter phục vụ leaderboard/khác ----------
-    def read_all_users(self) -> Dict[str, dict]:
-        """Trả về toàn bộ USERS (chỉ đọc) để làm leaderboard, thống kê, v.v."""
-        return self._users_cache
-
-    # ---------- Guild Config (Prefix & Channels) ----------
-    def get_guild_prefix(self, guild_id: int) -> str | None:
-        """Lấy prefix riêng của guild, trả về None nếu chưa set."""
-        return self._guilds_cache.get(str(guild_id), {}).get("prefix")
-
-    async def set_guild_prefix(self, guild_id: int, prefix: str) -> None:
-        gid = str(guild_id)
-        g = self._guilds_cache.setdefault(gid, {})
-        g["prefix"] = prefix
-        await self.guilds_col.update_one({"_id": gid}, {"$set": {"prefix": prefix}}, upsert=True)
-
-    def get_allowed_channels(self, guild_id: int) -> list[int]:
-        """Trả về danh sách ID kênh cho phép. Nếu rỗng -> cho phép tất cả."""
-        return list(self._guilds_cache.get(str(guild_id), {}).get("allowed_channels", []))
-
-    async def add_allowed_channel(self, guild_id: int, channel_id: int) -> None:
-        gid = str(guild_id)
-        g = self._guilds_cache.setdefault(gid, {})
-        channels = g.setdefault("allowed_channels", [])
-        if channel_id not in channels:
-            channels.append(channel_id)
-            await self.guilds_col.update_one({"_id": gid}, {"$set": {"allowed_channels": channels}}, upsert=True)
-
-    async def remove_allowed_channel(self, guild_id: int, channel_id: int) -> bool:
-        gid = str(guild_id)
-        g = self._guilds_cache.setdefault(gid, {})
-        channels = g.setdefault("allowed_channels", [])
-        if channel_id in channels:
-            channels.remove(channel_id)
-            await self.guilds_col.update_one({"_id": gid}, {"$set": {"allowed_channels": channels}}, upsert=True)
-            return True
-        return False
-
-    async def clear_allowed_channels(self, guild_id: int) -> None:
-        gid = str(guild_id)
-        if gid in self._guilds_cache:
-            self._guilds_cache[gid]["allowed_channels"] = []
-            await self.guilds_col.update_one({"_id": gid}, {"$set": {"allowed_channels": []}}, upsert=True)
\ No newline at end of file
+# data_manager.py
+from __future__ import annotations
+import asyncio
+import random
+import string
+import re
+import os
+import copy
+import pickle
+import zlib
+import functools
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict
+from uuid import uuid4
+from storage import StorageBackend, open_backend, get_path, set_path, unset_path, match_value
+from coherence import CoherenceBus, StaleWriteError, open_bus
+from stats_service import StatsService, STAT_FIELDS
+from leaderboard import Leaderboards
+from record_book import RecordBook
+from fish_aggregates import FishAggregates
+import aquarium_ledger
+from egg_scheduler import EggScheduler
+
+
+# Id cá: 4 ký tự base-62, cấp tuần tự theo bộ đếm `fish_seq` của từng user
+_B62 = string.digits + string.ascii_uppercase + string.ascii_lowercase
+_FISH_ID_SPACE = 62 ** 4
+
+
+def _b62(n: int, width: int = 4) -> str:
+    out = []
+    for _ in range(width):
+        n, r = divmod(n, 62)
+        out.append(_B62[r])
+    return "".join(reversed(out))
+
+
+def _serialized(fn):
+    """Chạy mutator trong khoá của user (tham số đầu tiên) để các thay đổi của cùng user tuần tự."""
+    @functools.wraps(fn)
+    async def wrapper(self, user_id, *args, **kwargs):
+        async with self.user_lock(user_id):
+            return await fn(self, user_id, *args, **kwargs)
+    return wrapper
+
+
+class _UserLock:
+    """Khoá reentrant theo task: task đang giữ khoá có thể vào lại (txn bên trong mutator, ...)."""
+    __slots__ = ("_lock", "_owner", "_depth", "waiters")
+
+    def __init__(self):
+        self._lock = asyncio.Lock()
+        self._owner: asyncio.Task | None = None
+        self._depth = 0
+        self.waiters = 0
+
+    def idle(self) -> bool:
+        return self._owner is None and self.waiters == 0
+
+    async def acquire(self) -> float | None:
+        """Trả về thời gian chờ (giây), hoặc None nếu vào lại khoá đang giữ."""
+        task = asyncio.current_task()
+        if self._owner is task:
+            self._depth += 1
+            return None
+        start = time.perf_counter()
+        self.waiters += 1
+        try:
+            await self._lock.acquire()
+        finally:
+            self.waiters -= 1
+        self._owner, self._depth = task, 1
+        return time.perf_counter() - start
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            self._lock.release()
+
+
+def _env_flag(name: str, default: bool = False) -> bool:
+    val = os.getenv(name)
+    if val is None:
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
+class _PendingUpdate:
+    """Gộp nhiều update Mongo ($set/$unset/$inc/$push/$pull) của cùng một user thành một update.
+
+    Cache luôn được cập nhật trước khi ghi, nên khi hai thao tác đụng nhau trên cùng
+    một path (hoặc path cha/con), ta thay bằng `$set` giá trị hiện tại trong cache
+    (hoặc `$unset` nếu path không còn trong cache).
+    """
+
+    def __init__(self):
+        self.ops: Dict[str, Dict[str, Any]] = {}
+        # `version` của document trong DB khi update đầu tiên được xếp hàng (kiểm tra lúc flush)
+        self.base_version: int | None = None
+
+    def __bool__(self) -> bool:
+        return any(self.ops.values())
+
+    def paths(self) -> list[str]:
+        return [p for fields in self.ops.values() for p in fields]
+
+    def _find(self, path: str) -> str | None:
+        for op, fields in self.ops.items():
+            if path in fields:
+                return op
+        return None
+
+    def _drop(self, path: str) -> None:
+        for fields in self.ops.values():
+            fields.pop(path, None)
+
+    def _set_from_cache(self, doc: dict, path: str) -> None:
+        self._drop(path)
+        if _has_path(doc, path):
+            self.ops.setdefault("$set", {})[path] = get_path(doc, path)
+        else:
+            self.ops.setdefault("$unset", {})[path] = ""
+
+    def merge(self, doc: dict, update: Dict[str, Dict[str, Any]]) -> None:
+        for op, fields in update.items():
+            for path, value in fields.items():
+                self._merge_one(doc, op, path, value)
+
+    def _merge_one(self, doc: dict, op: str, path: str, value: Any) -> None:
+        # Path cha đang chờ ghi -> chỉ cần làm mới path cha từ cache
+        parts = path.split(".")
+        for i in range(1, len(parts)):
+            ancestor = ".".join(parts[:i])
+            if self._find(ancestor) is not None:
+                self._set_from_cache(doc, ancestor)
+                return
+        # Path con đang chờ ghi -> gom về path hiện tại
+        prefix = path + "."
+        descendants = [p for p in self.paths() if p.startswith(prefix)]
+        if descendants:
+            for p in descendants:
+                self._drop(p)
+            self._set_from_cache(doc, path)
+            return
+
+        existing = self._find(path)
+        if existing is None:
+            if op == "$push":
+                each = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+                value = {"$each": list(each)}
+            self.ops.setdefault(op, {})[path] = value
+        elif op in ("$set", "$unset") and existing in ("$set", "$unset"):
+            # Ghi đè / xoá giá trị tuyệt đối: thao tác sau thắng
+            self._drop(path)
+            self.ops.setdefault(op, {})[path] = value
+        elif existing == op == "$inc":
+            self.ops["$inc"][path] += value
+        elif existing == op == "$push":
+            each = value["$each"] if isinstance(value, dict) and "$each" in value else [value]
+            self.ops["$push"][path]["$each"].extend(each)
+        elif existing == op == "$pull" and self._merge_pull_in(path, value):
+            pass
+        else:
+            self._set_from_cache(doc, path)
+
+    def _merge_pull_in(self, path: str, value: Any) -> bool:
+        """Gộp hai `$pull` dạng `{field: {"$in": [...]}}` cùng field thành một."""
+        cur = self.ops["$pull"][path]
+        if not (isinstance(cur, dict) and isinstance(value, dict) and len(cur) == len(value) == 1):
+            return False
+        (field, cond), (field2, cond2) = next(iter(cur.items())), next(iter(value.items()))
+        if field != field2 or not (isinstance(cond, dict) and isinstance(cond2, dict)):
+            return False
+        if set(cond) != {"$in"} or set(cond2) != {"$in"}:
+            return False
+        seen = set(cond["$in"])
+        cond["$in"] = list(cond["$in"]) + [v for v in cond2["$in"] if v not in seen]
+        return True
+
+    def requeue(self, doc: dict, older: "_PendingUpdate") -> None:
+        """Gộp lại một batch ghi thất bại (cũ hơn) vào update đang chờ."""
+        self.base_version = older.base_version
+        for path in older.paths():
+            if _has_path(doc, path):
+                self._merge_one(doc, "$set", path, get_path(doc, path))
+            else:
+                self._merge_one(doc, "$unset", path, "")
+
+    def build(self) -> Dict[str, Dict[str, Any]]:
+        return {op: copy.deepcopy(fields) for op, fields in self.ops.items() if fields}
+
+
+_MISSING = object()
+
+
+def _has_path(doc: dict, path: str) -> bool:
+    cur: Any = doc
+    for key in path.split("."):
+        if not isinstance(cur, dict) or key not in cur:
+            return False
+        cur = cur[key]
+    return True
+
+
+class UserTxn:
+    """Gom các thay đổi của một user thành một update_one duy nhất (xem DataManager.user_txn)."""
+
+    def __init__(self, dm: "DataManager", uid: str):
+        self._dm = dm
+        self.uid = uid
+        self.doc: Dict[str, Any] = {}
+        self._update = _PendingUpdate()
+        self._backup: Dict[str, Any] = {}
+
+    async def __aenter__(self) -> "UserTxn":
+        self._lock = self._dm.user_lock(self.uid)
+        await self._lock.__aenter__()
+        try:
+            await self._dm._ensure_user(self.uid)
+        except BaseException:
+            await self._lock.__aexit__(None, None, None)
+            raise
+        self.doc = self._dm._users_cache[self.uid]
+        self._dm._pin(self.uid)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        stats_touched = any(f in self._backup for f in STAT_FIELDS)
+        try:
+            if exc_type is not None:
+                self.rollback()
+                return False
+            if self._update:
+                try:
+                    await self._dm._write_user(self.uid, self._update.build())
+                except Exception:
+                    self.rollback()
+                    raise
+            return False
+        finally:
+            if stats_touched:
+                self._dm.stats.invalidate(self.uid)
+            self._dm._unpin(self.uid)
+            await self._lock.__aexit__(None, None, None)
+
+    def rollback(self) -> None:
+        if self._dm._users_cache.get(self.uid) is not self.doc:
+            # Cache đã được tải lại (StaleWriteError): bản cũ bị bỏ, không khôi phục / cập nhật gì
+            self._backup.clear()
+            self._update = _PendingUpdate()
+            return
+        for field, value in self._backup.items():
+            if value is _MISSING:
+                self.doc.pop(field, None)
+            else:
+                self.doc[field] = value
+        if self._backup:
+            self._dm.leaderboards.touch(self.uid, self.doc, self._backup)
+        if "eggs" in self._backup:
+            self._dm.eggs.sync_user(self.uid, self.doc.get("eggs"))
+        self._backup.clear()
+        self._update = _PendingUpdate()
+
+    def _touch(self, path: str) -> None:
+        field = path.split(".", 1)[0]
+        if field not in self._backup:
+            self._backup[field] = copy.deepcopy(self.doc.get(field, _MISSING))
+
+    # ---------- Primitive intents ----------
+    def get(self, path: str, default: Any = None) -> Any:
+        val = get_path(self.doc, path)
+        return default if val is None else val
+
+    def set(self, path: str, value: Any) -> None:
+        self._touch(path)
+        set_path(self.doc, path, value)
+        self._update.merge(self.doc, {"$set": {path: value}})
+
+    def inc(self, path: str, amount: int | float) -> int | float:
+        self._touch(path)
+        new_val = (self.get(path, 0)) + amount
+        set_path(self.doc, path, new_val)
+        self._update.merge(self.doc, {"$inc": {path: amount}})
+        return new_val
+
+    def push(self, path: str, *values: Any) -> None:
+        self._touch(path)
+        lst = self.get(path)
+        if not isinstance(lst, list):
+            lst = []
+            set_path(self.doc, path, lst)
+        lst.extend(values)
+        self._update.merge(self.doc, {"$push": {path: {"$each": list(values)}}})
+
+    def unset(self, path: str) -> None:
+        self._touch(path)
+        unset_path(self.doc, path)
+        self._update.merge(self.doc, {"$unset": {path: ""}})
+
+    def pull(self, path: str, cond: Any) -> list:
+        """Xoá các phần tử khớp `cond` khỏi list; trả về các phần tử đã xoá."""
+        lst = self.get(path)
+        if not isinstance(lst, list):
+            return []
+        removed = [e for e in lst if match_value(e, cond)]
+        if removed:
+            self._touch(path)
+            lst[:] = [e for e in lst if not match_value(e, cond)]
+            self._update.merge(self.doc, {"$pull": {path: cond}})
+        return removed
+
+    # ---------- Domain helpers (cùng ngữ nghĩa với các setter của DataManager) ----------
+    def _add_clamped(self, field: str, amount: int) -> int:
+        cur = int(self.doc.get(field, 0))
+        amount = max(int(amount), -cur)
+        if amount == 0:
+            return cur
+        return int(self.inc(field, amount))
+
+    def add_money(self, amount: int) -> int:
+        return self._add_clamped("wallet", amount)
+
+    def add_gems(self, amount: int) -> int:
+        return self._add_clamped("gems", amount)
+
+    def add_xp(self, amount: int) -> int:
+        return self._add_clamped("xp", amount)
+
+    def set_xp(self, amount: int) -> int:
+        val = max(0, int(amount))
+        self.set("xp", val)
+        return val
+
+    def set_level(self, level: int) -> int:
+        level = max(1, int(level))
+        self.set("level", level)
+        return level
+
+    def set_last_daily(self, timestamp: int) -> None:
+        self.set("last_daily", int(timestamp))
+
+    def gain_xp(self, amount: int, xp_per_level: int) -> tuple[int, int, int]:
+        """Cộng XP và tính lên cấp (XP dư chuyển sang cấp sau, mỗi lần lên cấp thưởng
+        level*15 gems). Trả về (cấp cũ, cấp mới, gems thưởng)."""
+        total_xp = self.add_xp(amount)
+        start_level = cur_level = int(self.get("level", 1))
+        gems = 0
+        while total_xp >= xp_per_level * cur_level:
+            total_xp -= xp_per_level * cur_level
+            cur_level += 1
+            gems += cur_level * 15
+        if cur_level > start_level:
+            self.set_level(cur_level)
+            self.set_xp(total_xp)
+            if gems > 0:
+                self.add_gems(gems)
+        return start_level, cur_level, gems
+
+    def add_item(self, item_id: str, count: int = 1) -> int:
+        return int(self.inc(f"items.{item_id}", int(count)))
+
+    def add_caught_fish(self, fish: dict) -> str:
+        self._touch("fish_seq")
+        seq = self.doc.get("fish_seq")
+        fish_copy = self._dm._prepare_fish(self.uid, fish)
+        if self.doc.get("fish_seq") != seq:
+            self._update.merge(self.doc, {"$set": {"fish_seq": self.doc["fish_seq"]}})
+        self.push("fishes", fish_copy)
+        self._dm._index_fish(self.uid, fish_copy)
+        return fish_copy["id"]
+
+    def add_caught_fishes(self, fishes) -> list[str]:
+        """Thêm nhiều cá bằng MỘT `$push: {fishes: {$each: [...]}}`; trả về các id."""
+        self._touch("fish_seq")
+        seq = self.doc.get("fish_seq")
+        ids = []
+        for fish in fishes:
+            # Từng con vào cache + index ngay (id của con sau không trùng con trước);
+            # các `$push` được _PendingUpdate gộp thành một `$each`
+            fish_copy = self._dm._prepare_fish(self.uid, fish)
+            self.push("fishes", fish_copy)
+            self._dm._index_fish(self.uid, fish_copy)
+            ids.append(fish_copy["id"])
+        if self.doc.get("fish_seq") != seq:
+            self._update.merge(self.doc, {"$set": {"fish_seq": self.doc["fish_seq"]}})
+        return ids
+
+    def remove_fishes(self, fish_ids) -> list[dict]:
+        """Xoá các cá theo id bằng một `$pull ... $in`; trả về các cá đã xoá."""
+        wanted = set(fish_ids)
+        lst = self.get("fishes")
+        if not wanted or not isinstance(lst, list):
+            return []
+        removed = [f for f in lst if f.get("id") in wanted]
+        if removed:
+            self._touch("fishes")
+            lst[:] = [f for f in lst if f.get("id") not in wanted]
+            self._dm._unindex_fishes(self.uid, removed)
+            ids = [f.get("id") for f in removed]
+            self._update.merge(self.doc, {"$pull": {"fishes": {"id": {"$in": ids}}}})
+            # Cá đang nuôi bị bán / xoá thì cũng rời thủy cung (thu nhập đã sinh được giữ lại)
+            aquarium = self.doc.get("aquarium") or {}
+            if any(fid in aquarium for fid in ids):
+                self.aquarium_remove(ids)
+        return removed
+
+    # ---------- Aquarium (sổ thu nhập, xem aquarium_ledger.py) ----------
+    def _aquarium_state(self, now: int) -> tuple[dict, dict]:
+        """(aquarium, aqua_ledger) hiện tại; bể kiểu cũ được chuyển đổi (và ghi) ở lần đầu."""
+        aquarium = self.doc.get("aquarium") or {}
+        ledger = self.doc.get("aqua_ledger")
+        if aquarium_ledger.is_legacy(aquarium, ledger):
+            fishes = self._dm._fish_map(self.uid)
+            entries, ledger = aquarium_ledger.from_legacy(aquarium, fishes, now)
+            self.set("aquarium", entries)
+            self.set("aqua_ledger", ledger)
+            aquarium = entries
+        return aquarium, ledger or aquarium_ledger.empty()
+
+    def aquarium_add(self, fish: dict, now: int | None = None) -> dict:
+        """Thả cá vào bể: chốt thu nhập tới `now` rồi tăng rate. Trả về ô vừa thêm."""
+        now = int(now or time.time())
+        aquarium, ledger = self._aquarium_state(now)
+        entry = {"added_at": now, "rate": aquarium_ledger.fish_rate(fish), "name": fish.get("name", "Unknown")}
+        self.set(f"aquarium.{fish['id']}", entry)
+        self.set("aqua_ledger", aquarium_ledger.settle(ledger, now, aquarium_ledger.total_rate(self.doc["aquarium"])))
+        return entry
+
+    def aquarium_remove(self, fish_ids, now: int | None = None) -> list[str]:
+        """Lấy cá khỏi bể (theo id); trả về các id thực sự đã lấy ra."""
+        now = int(now or time.time())
+        aquarium, ledger = self._aquarium_state(now)
+        removed = [fid for fid in dict.fromkeys(fish_ids) if fid in aquarium]
+        if removed:
+            for fid in removed:
+                self.unset(f"aquarium.{fid}")
+            self.set("aqua_ledger", aquarium_ledger.settle(ledger, now, aquarium_ledger.total_rate(self.doc.get("aquarium") or {})))
+        return removed
+
+    def collect_aquarium(self, now: int | None = None) -> int:
+        """Thu hoạch thu nhập chờ vào ví; trả về số coins (0 nếu chưa đủ 1 coin)."""
+        now = int(now or time.time())
+        _, ledger = self._aquarium_state(now)
+        amount, new = aquarium_ledger.collect(ledger, now)
+        if amount > 0:
+            self.set("aqua_ledger", new)
+            self.inc("wallet", amount)
+        return amount
+
+
+class DataManager:
+    """Quản lý dữ liệu MongoDB với Write-Through Cache.
+    Phù hợp cho Render/Heroku vì dữ liệu lưu trên Cloud.
+
+    Bật `write_behind` (hoặc biến môi trường DATA_WRITE_BEHIND=1) để các setter chỉ cập nhật
+    cache rồi trả về ngay; một task nền gộp thay đổi theo user và gửi một `bulk_write`
+    mỗi `flush_interval` giây hoặc khi số user chờ ghi vượt `flush_max_pending`.
+
+    Nơi lưu trữ do `backend` quyết định (DATA_BACKEND=mongo|sqlite|json, xem storage.py);
+    backend sqlite/json dùng `data_file` nên chạy được mà không cần Mongo.
+    """
+    def __init__(
+        self,
+        data_file: Path,
+        *,
+        write_behind: bool | None = None,
+        flush_interval: float | None = None,
+        flush_max_pending: int | None = None,
+        lazy_users: bool | None = None,
+        max_cached_users: int | None = None,
+        max_cache_bytes: int | None = None,
+        backend: StorageBackend | str | None = None,
+        snapshot: bool | None = None,
+        snapshot_path: Path | str | None = None,
+        snapshot_interval: float | None = None,
+        coherence: CoherenceBus | str | None = None,
+    ):
+        # Storage backend: Mongo (mặc định nếu có motor), SQLite hoặc file JSON (xem storage.py)
+        self.data_file = Path(data_file) if data_file else None
+        if isinstance(backend, StorageBackend):
+            self.store = backend
+        else:
+            self.store = open_backend(self.data_file, backend)
+
+        # Cache (RAM) - Lưu user vào đây để đọc nhanh (Sync Getters).
+        # Chế độ lazy (DATA_LAZY_USERS=1): user chỉ được tải khi cần (ensure_loaded) và
+        # user ít dùng bị loại theo LRU khi vượt max_cached_users / max_cache_bytes.
+        self._users_cache: "OrderedDict[str, Any]" = OrderedDict()
+        self.lazy_users = _env_flag("DATA_LAZY_USERS") if lazy_users is None else bool(lazy_users)
+        self.max_cached_users = int(max_cached_users if max_cached_users is not None else os.getenv("DATA_CACHE_MAX_USERS", 5000))
+        self.max_cache_bytes = int(max_cache_bytes if max_cache_bytes is not None else os.getenv("DATA_CACHE_MAX_BYTES", 0))
+        self._entry_sizes: Dict[str, int] = {}
+        self._cache_bytes = 0
+        self._pins: Dict[str, int] = {}
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+        # Dữ liệu dẫn xuất theo user (dựng lại được từ document): index id -> cá
+        self._fish_index: Dict[str, list] = {}
+        # Chỉ số hiệu lực (cần + item + pet + thời tiết), xem stats_service.py
+        self.stats = StatsService(self)
+        # Bảng xếp hạng (ví, gem, level, cá đắt nhất) cập nhật theo từng lần ghi, xem leaderboard.py.
+        # Không phụ thuộc cache: user bị loại khỏi cache (lazy) vẫn giữ hạng. Riêng ghi từ process
+        # khác lên user không có trong cache (lazy + coherence) chỉ được thấy sau lần nạp lại.
+        self.leaderboards = Leaderboards(best_fish=self._best_fish)
+        # Sổ kỷ lục theo loài (collection `records` riêng), xem record_book.py
+        self.records = RecordBook(self.store)
+        # Hẹn giờ trứng nở (min-heap theo hatch_at), xem egg_scheduler.py
+        self.eggs = EggScheduler()
+        self._guilds_cache: Dict[str, Any] = {}
+        self._initialized = False
+
+        # Write-behind: các thay đổi chờ ghi, gộp theo user
+        self.write_behind = _env_flag("DATA_WRITE_BEHIND") if write_behind is None else bool(write_behind)
+        self.flush_interval = float(flush_interval if flush_interval is not None else os.getenv("DATA_FLUSH_INTERVAL", 2.0))
+        self.flush_max_pending = int(flush_max_pending if flush_max_pending is not None else os.getenv("DATA_FLUSH_MAX_PENDING", 200))
+        self._pending: Dict[str, _PendingUpdate] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_wakeup = asyncio.Event()
+        self._flush_task: asyncio.Task | None = None
+
+        # Snapshot cục bộ (pickle + zlib) để khởi động lại nhanh: nạp snapshot rồi chỉ tải
+        # các document có `updated_at` mới hơn thời điểm chụp.
+        self.snapshot_enabled = _env_flag("DATA_SNAPSHOT") if snapshot is None else bool(snapshot)
+        default_snap = (self.data_file.with_suffix(".snapshot") if self.data_file else Path("data") / "cache.snapshot")
+        self.snapshot_path = Path(snapshot_path or os.getenv("DATA_SNAPSHOT_PATH") or default_snap)
+        self.snapshot_interval = float(snapshot_interval if snapshot_interval is not None else os.getenv("DATA_SNAPSHOT_INTERVAL", 300))
+        self._snapshot_task: asyncio.Task | None = None
+
+        # Đồng bộ cache giữa nhiều process (xem coherence.py). Khi bật, mỗi lần ghi phát sự kiện
+        # cho các node khác và update `$set` được kiểm tra `version` (optimistic concurrency).
+        self.node_id = os.getenv("DATA_NODE_ID") or uuid4().hex[:12]
+        self.bus = coherence if isinstance(coherence, CoherenceBus) else open_bus(self.store, coherence)
+
+        # Khoá theo user: mutation của cùng một user chạy tuần tự, user khác chạy song song
+        self._user_locks: Dict[str, _UserLock] = {}
+        self._lock_stats = {"acquired": 0, "contended": 0, "wait_total": 0.0, "wait_max": 0.0}
+        self._lock_hot: Dict[str, list] = {}  # uid -> [số lần phải chờ, tổng thời gian chờ]
+
+    async def initialize(self):
+        """Load dữ liệu từ storage backend vào RAM khi bot khởi động."""
+        if self._initialized:
+            return
+            
+        print(f"⏳ Đang tải dữ liệu ({self.store.name})...")
+        if not (self.snapshot_enabled and await self._load_snapshot()):
+            if not self.lazy_users:
+                async for user in self.store.iter_docs("users"):
+                    self._users_cache[user["_id"]] = user
+            
+            async for guild in self.store.iter_docs("guilds"):
+                self._guilds_cache[guild["_id"]] = guild
+        print(f"✅ Đã tải {len(self._users_cache)} users và {len(self._guilds_cache)} guilds.")
+        await self._seed_indexes()
+        await self.records.load()
+        self._initialized = True
+        if self.write_behind and self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if self.snapshot_enabled and self.snapshot_interval > 0 and self._snapshot_task is None:
+            self._snapshot_task = asyncio.create_task(self._snapshot_loop())
+        if self.bus is not None:
+            await self.bus.start(self.node_id, self._on_peer_event)
+
+    async def _seed_indexes(self) -> None:
+        """Dựng các bảng xếp hạng + heap trứng một lần khi khởi động. Chế độ lazy đọc lướt
+        toàn bộ collection users (không giữ document trong cache)."""
+        if not self.lazy_users:
+            self.leaderboards.seed(self._users_cache.items())
+            self.eggs.seed(self._users_cache.items())
+            return
+        eggs = []
+        async for user in self.store.iter_docs("users"):
+            uid = user["_id"]
+            doc = self._users_cache.get(uid, user)
+            self.leaderboards.touch(uid, doc)
+            if doc.get("eggs"):
+                eggs.append((uid, {"eggs": doc["eggs"]}))
+        self.eggs.seed(eggs)
+
+    # ---------- Snapshot (warm restart) ----------
+    # Lùi mốc thời gian khi tải phần thay đổi để bù lệch đồng hồ giữa các process/máy
+    SNAPSHOT_SKEW = 5.0
+
+    async def checkpoint(self) -> int:
+        """Ghi snapshot cache ra file (nguyên tử). Trả về số user đã ghi.
+        Hàng đợi write-behind được flush trước để snapshot không chứa dữ liệu chưa có trong DB.
+        """
+        if self._pending:
+            await self.flush()
+        taken_at = time.time()
+        # pickle ngay trên event loop để có ảnh chụp nhất quán; nén + ghi file ở thread khác
+        raw = pickle.dumps(
+            {
+                "version": 1,
+                "backend": self.store.name,
+                "taken_at": taken_at,
+                "users": dict(self._users_cache),
+                "guilds": self._guilds_cache,
+            },
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        await asyncio.get_running_loop().run_in_executor(None, self._write_snapshot_file, raw)
+        return len(self._users_cache)
+
+    def _write_snapshot_file(self, raw: bytes) -> None:
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.snapshot_path.with_suffix(self.snapshot_path.suffix + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(zlib.compress(raw, 3))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.snapshot_path)
+
+    def _read_snapshot_file(self) -> dict | None:
+        try:
+            with open(self.snapshot_path, "rb") as f:
+                return pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+
+    async def _load_snapshot(self) -> bool:
+        """Nạp snapshot + các document thay đổi sau đó. Trả về False nếu không dùng được snapshot."""
+        try:
+            snap = await asyncio.get_running_loop().run_in_executor(None, self._read_snapshot_file)
+        except Exception as e:
+            print(f"⚠️ Không đọc được snapshot {self.snapshot_path}: {e}")
+            return False
+        if not snap or snap.get("version") != 1 or snap.get("backend") != self.store.name:
+            return False
+        self._users_cache.update(snap.get("users", {}))
+        self._guilds_cache.update(snap.get("guilds", {}))
+        since = float(snap.get("taken_at", 0)) - self.SNAPSHOT_SKEW
+        changed = 0
+        async for user in self.store.find_modified_since("users", since):
+            # Ở chế độ lazy chỉ làm mới user đang có trong cache, phần còn lại tải khi cần
+            if not self.lazy_users or user["_id"] in self._users_cache:
+                self._users_cache[user["_id"]] = user
+                changed += 1
+        async for guild in self.store.find_modified_since("guilds", since):
+            self._guilds_cache[guild["_id"]] = guild
+            changed += 1
+        if self.lazy_users:
+            for uid in self._users_cache:
+                self._account(uid)
+            self._evict()
+        print(f"📦 Đã nạp snapshot ({len(snap.get('users', {}))} users) + {changed} document thay đổi.")
+        return True
+
+    async def _snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            try:
+                await self.checkpoint()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Lỗi khi ghi snapshot: {e}")
+
+    # ---------- Persistence ----------
+    async def _write_user(self, uid: str, update: Dict[str, Dict[str, Any]]) -> None:
+        """Ghi một update Mongo cho user. Cache phải được cập nhật TRƯỚC khi gọi hàm này.
+        Ở chế độ write-behind, update được gộp vào hàng đợi thay vì ghi ngay.
+        """
+        doc = self._users_cache.get(uid)
+        expected = int(doc.get("version", 0)) if doc is not None else 0
+        update = self._stamp(doc, update)
+        self.leaderboards.touch(uid, doc, self._update_fields(update))
+        if not self.write_behind:
+            # Giữ user trong cache khi đang ghi để không bị LRU loại rồi tải lại bản cũ
+            self._pin(uid)
+            try:
+                # `$set` giá trị tuyệt đối chỉ được ghi nếu DB vẫn là phiên bản cache đã đọc;
+                # `$inc`/`$push`/`$pull` giao hoán được nên không cần kiểm tra
+                if self.bus is not None and expected > 0 and self._has_absolute_set(update):
+                    ok = await self.store.update_one("users", uid, update, where={"version": expected}, upsert=False)
+                    if not ok:
+                        await self._reload_user(uid)
+                        raise StaleWriteError("users", uid)
+                else:
+                    await self.store.update_one("users", uid, update)
+            finally:
+                self._unpin(uid)
+            self._after_write(uid)
+            await self._publish("users", uid, update)
+            return
+        pending = self._pending.get(uid)
+        if pending is None:
+            pending = self._pending[uid] = _PendingUpdate()
+            pending.base_version = expected
+        pending.merge(self._users_cache.get(uid, {}), update)
+        if len(self._pending) >= self.flush_max_pending:
+            self._flush_wakeup.set()
+        self._after_write(uid)
+
+    _META_FIELDS = ("updated_at", "updated_by", "version")
+
+    def _stamp(self, doc: dict | None, update: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Thêm `updated_at` (tải phần thay đổi sau snapshot), `updated_by` và `$inc version`
+        vào update, đồng thời cập nhật các field đó trong cache."""
+        now = time.time()
+        meta = {"updated_at": now}
+        if self.bus is not None:
+            meta["updated_by"] = self.node_id
+        if doc is not None:
+            doc.update(meta)
+            doc["version"] = int(doc.get("version", 0)) + 1
+        return {
+            **update,
+            "$set": {**update.get("$set", {}), **meta},
+            "$inc": {**update.get("$inc", {}), "version": 1},
+        }
+
+    @classmethod
+    def _update_fields(cls, update: Dict[str, Dict[str, Any]]) -> set:
+        """Các field cấp cao nhất mà update đụng tới (bỏ field meta)."""
+        return {p.split(".", 1)[0] for ops in update.values() for p in ops} - set(cls._META_FIELDS)
+
+    @classmethod
+    def _has_absolute_set(cls, update: Dict[str, Dict[str, Any]]) -> bool:
+        return any(path not in cls._META_FIELDS for path in update.get("$set", {}))
+
+    async def _publish(self, coll: str, _id: str, update: Dict[str, Dict[str, Any]]) -> None:
+        if self.bus is None:
+            return
+        cache = self._users_cache if coll == "users" else self._guilds_cache
+        fields = sorted(self._update_fields(update))
+        try:
+            await self.bus.publish({
+                "origin": self.node_id,
+                "coll": coll,
+                "id": _id,
+                "fields": fields,
+                "version": cache.get(_id, {}).get("version"),
+            })
+        except Exception as e:
+            print(f"⚠️ Không phát được sự kiện đồng bộ cache: {e}")
+
+    async def _reload_user(self, uid: str) -> None:
+        """Thay bản cache của user bằng bản mới nhất trong storage."""
+        doc = await self.store.find_one("users", uid)
+        if doc is None:
+            self._users_cache.pop(uid, None)
+            self.leaderboards.remove(uid)
+            self.eggs.sync_user(uid, None)
+        else:
+            self._users_cache[uid] = doc
+            self.leaderboards.touch(uid, doc)
+            self.eggs.sync_user(uid, doc.get("eggs"))
+        self._drop_user_derived(uid)
+        if self.lazy_users:
+            self._account(uid)
+
+    async def _on_peer_event(self, event: Dict[str, Any]) -> None:
+        """Sự kiện ghi từ process khác: vá hoặc tải lại / loại bản cache tương ứng."""
+        _id, doc = event.get("id"), event.get("doc")
+        if _id is None:
+            return
+        if event.get("coll") == "guilds":
+            doc = doc or await self.store.find_one("guilds", _id)
+            if doc is not None:
+                self._guilds_cache[_id] = doc
+            return
+        cached = self._users_cache.get(_id)
+        if cached is None and self.lazy_users:
+            return
+        version = event.get("version")
+        if cached is not None and version is not None and int(version) <= int(cached.get("version", 0)):
+            return
+        async with self.user_lock(_id):
+            if self.write_behind and _id in self._pending:
+                await self.flush()
+            if doc is not None:
+                self._users_cache[_id] = doc
+                self._drop_user_derived(_id)
+                self.leaderboards.touch(_id, doc)
+                self.eggs.sync_user(_id, doc.get("eggs"))
+            elif self.lazy_users and not self._is_pinned(_id):
+                # Chế độ lazy: chỉ cần loại, lần dùng sau sẽ tải lại
+                self._users_cache.pop(_id, None)
+                self._drop_user_derived(_id)
+                self._cache_bytes -= self._entry_sizes.pop(_id, 0)
+            else:
+                await self._reload_user(_id)
+
+    def _after_write(self, uid: str) -> None:
+        """Cập nhật kích thước ước lượng của user sau khi ghi và loại bớt user lạnh nếu vượt ngân sách."""
+        if self.lazy_users:
+            self._account(uid)
+            self._evict()
+
+    async def _write_user_where(
+        self, uid: str, update: Dict[str, Dict[str, Any]], where: Dict[str, Any],
+        apply: Callable[[dict], None] | None = None,
+    ) -> bool:
+        """Ghi có điều kiện ngay xuống storage (không qua hàng đợi write-behind).
+        Trả về False nếu document không thoả `where`. `apply(doc)` (nếu có) cập nhật cache
+        chỉ SAU KHI ghi thành công, trước khi cập nhật bảng xếp hạng / phát sự kiện.
+        """
+        if self.write_behind and uid in self._pending:
+            # Điều kiện phải được kiểm tra trên dữ liệu đã ghi đủ
+            await self.flush()
+        doc = self._users_cache.get(uid)
+        saved = {f: doc[f] for f in self._META_FIELDS if f in doc} if doc is not None else {}
+        update = self._stamp(doc, update)
+        self._pin(uid)
+        ok = False
+        try:
+            ok = await self.store.update_one("users", uid, update, where=where, upsert=False)
+        finally:
+            self._unpin(uid)
+            if not ok and doc is not None:
+                for f in self._META_FIELDS:
+                    doc.pop(f, None)
+                doc.update(saved)
+        if ok and apply is not None and doc is not None:
+            apply(doc)
+        self._after_write(uid)
+        if ok:
+            self.leaderboards.touch(uid, doc, self._update_fields(update))
+            await self._publish("users", uid, update)
+        return ok
+
+    async def flush(self) -> int:
+        """Ghi toàn bộ thay đổi đang chờ bằng một `bulk_write`. Trả về số user đã ghi."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            batch = {uid: p for uid, p in batch.items() if p}
+            if not batch:
+                return 0
+            requests = [(uid, p.build()) for uid, p in batch.items()]
+            # Có đồng bộ nhiều process: update chứa `$set` tuyệt đối chỉ được ghi nếu DB vẫn ở
+            # `version` lúc xếp hàng (như _write_user); phần còn lại đi chung một bulk_write
+            guarded = {
+                uid: batch[uid].base_version for uid, update in requests
+                if self.bus is not None and batch[uid].base_version and self._has_absolute_set(update)
+            }
+            plain = [(uid, u) for uid, u in requests if uid not in guarded]
+            checked = [(uid, u) for uid, u in requests if uid in guarded]
+            failed: Dict[str, _PendingUpdate] = {}
+            stale: list[str] = []
+            error: Exception | None = None
+            for uid in batch:
+                self._pin(uid)
+            try:
+                if plain:
+                    try:
+                        await self.store.bulk_update("users", plain)
+                    except Exception as e:
+                        error = e
+                        failed.update((uid, batch[uid]) for uid, _ in plain)
+                results = await asyncio.gather(
+                    *(self.store.update_one("users", uid, u, where={"version": guarded[uid]}, upsert=False)
+                      for uid, u in checked),
+                    return_exceptions=True,
+                )
+                for (uid, _), res in zip(checked, results):
+                    if isinstance(res, Exception):
+                        error = error or res
+                        failed[uid] = batch[uid]
+                    elif not res:
+                        stale.append(uid)
+            finally:
+                for uid in batch:
+                    self._unpin(uid)
+            # Đưa phần ghi lỗi trở lại hàng đợi (cache vẫn là bản mới nhất)
+            for uid, older in failed.items():
+                cur = self._pending.setdefault(uid, _PendingUpdate())
+                cur.requeue(self._users_cache.get(uid, {}), older)
+            # Process khác đã sửa user trước: bỏ thay đổi cục bộ, tải lại bản trong DB
+            for uid in stale:
+                self._pending.pop(uid, None)
+                await self._reload_user(uid)
+                print(f"⚠️ Bỏ thay đổi chờ ghi của user {uid}: dữ liệu đã bị process khác sửa.")
+            self._evict()
+            written = [(uid, u) for uid, u in requests if uid not in failed and uid not in stale]
+            for uid, update in written:
+                await self._publish("users", uid, update)
+            if error is not None:
+                raise error
+            return len(written)
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️ Lỗi khi ghi dữ liệu chờ (sẽ thử lại): {e}")
+
+    async def close(self) -> None:
+        """Dừng các task nền, ghi nốt mọi thay đổi còn chờ và chụp snapshot (gọi khi tắt bot)."""
+        if self.bus is not None:
+            await self.bus.close()
+        for attr in ("_flush_task", "_snapshot_task"):
+            task = getattr(self, attr)
+            if task is None:
+                continue
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            setattr(self, attr, None)
+        try:
+            if self._pending:
+                await self.flush()
+            await self.records.flush()
+            if self.snapshot_enabled and self._initialized:
+                await self.checkpoint()
+        finally:
+            await self.store.close()
+
+    # ---------- Per-user locks ----------
+    @asynccontextmanager
+    async def user_lock(self, *user_ids: int):
+        """Giữ khoá của một hoặc nhiều user: `async with data.user_lock(a, b): ...`.
+        Khoá luôn được lấy theo thứ tự id tăng dần nên thao tác nhiều user (chuyển tiền, ...)
+        không thể deadlock lẫn nhau. Khoá reentrant trong cùng một task; nếu đã giữ khoá
+        của một user thì hãy lấy MỌI khoá cần thiết trong cùng một lần gọi.
+        """
+        uids = sorted({str(u) for u in user_ids})
+        held: list[tuple[str, _UserLock]] = []
+        try:
+            for uid in uids:
+                lock = self._user_locks.get(uid)
+                if lock is None:
+                    lock = self._user_locks[uid] = _UserLock()
+                contended = not lock.idle() and lock._owner is not asyncio.current_task()
+                waited = await lock.acquire()
+                held.append((uid, lock))
+                if waited is not None:
+                    self._record_lock_wait(uid, waited, contended)
+            yield
+        finally:
+            for uid, lock in reversed(held):
+                lock.release()
+                if lock.idle():
+                    self._user_locks.pop(uid, None)
+
+    def _record_lock_wait(self, uid: str, waited: float, contended: bool) -> None:
+        st = self._lock_stats
+        st["acquired"] += 1
+        if not contended:
+            return
+        st["contended"] += 1
+        st["wait_total"] += waited
+        st["wait_max"] = max(st["wait_max"], waited)
+        hot = self._lock_hot.setdefault(uid, [0, 0.0])
+        hot[0] += 1
+        hot[1] += waited
+
+    def lock_stats(self, top: int = 10) -> Dict[str, Any]:
+        """Thống kê khoá user: số lần lấy khoá, số lần phải chờ, thời gian chờ và các user 'nóng' nhất."""
+        hot = sorted(self._lock_hot.items(), key=lambda kv: kv[1][1], reverse=True)[:top]
+        return {
+            **self._lock_stats,
+            "held": sum(1 for lock in self._user_locks.values() if lock._owner is not None),
+            "hot_users": [{"user_id": uid, "waits": n, "wait_total": round(w, 4)} for uid, (n, w) in hot],
+        }
+
+    def user_txn(self, user_id: int) -> "UserTxn":
+        """Unit-of-work cho một user: `async with data.user_txn(uid) as u: ...`.
+        Mọi thay đổi được áp vào cache ngay và ghi bằng MỘT update khi thoát khối;
+        nếu khối lỗi hoặc ghi thất bại thì cache được khôi phục.
+        """
+        return UserTxn(self, str(user_id))
+
+    async def _ensure_user(self, user_id: str):
+        """Đảm bảo user có trong cache (tải từ Mongo ở chế độ lazy, tạo mới nếu chưa có)."""
+        if self.lazy_users:
+            await self.ensure_loaded(user_id)
+        elif user_id not in self._users_cache:
+            self._users_cache[user_id] = self._empty_user()
+            self._users_cache[user_id]["_id"] = user_id
+
+    # ---------- Lazy LRU cache ----------
+    async def ensure_loaded(self, user_id: int) -> dict:
+        """Đảm bảo dữ liệu user đã nằm trong cache trước khi dùng các getter đồng bộ.
+        Các lệnh nên `await data.ensure_loaded(uid)` (main.py làm việc này trong before_invoke).
+        """
+        uid = str(user_id)
+        doc = self._users_cache.get(uid)
+        if doc is not None:
+            self._cache_stats["hits"] += 1
+            if self.lazy_users:
+                self._users_cache.move_to_end(uid)
+                self._account(uid)
+            return doc
+        if not self.lazy_users:
+            await self._ensure_user(uid)
+            return self._users_cache[uid]
+        task = self._loading.get(uid)
+        if task is None:
+            self._cache_stats["misses"] += 1
+            task = self._loading[uid] = asyncio.ensure_future(self._load_user(uid))
+        return await asyncio.shield(task)
+
+    async def _load_user(self, uid: str) -> dict:
+        try:
+            doc = await self.store.find_one("users", uid)
+        finally:
+            self._loading.pop(uid, None)
+        if uid not in self._users_cache:
+            if doc is None:
+                doc = self._empty_user()
+                doc["_id"] = uid
+            self._users_cache[uid] = doc
+        self._account(uid)
+        self._evict()
+        return self._users_cache[uid]
+
+    @staticmethod
+    def _estimate_size(doc: dict) -> int:
+        """Ước lượng thô dung lượng (bytes) một user trong RAM, đủ để áp ngân sách bộ nhớ."""
+        return (
+            512
+            + 160 * len(doc.get("fishes", ()))
+            + 64 * (len(doc.get("eggs", ())) + len(doc.get("pets", ())) + len(doc.get("aquarium", ())))
+            + 48 * len(doc.get("items", ()))
+        )
+
+    def _account(self, uid: str) -> None:
+        doc = self._users_cache.get(uid)
+        if doc is None:
+            return
+        size = self._estimate_size(doc)
+        self._cache_bytes += size - self._entry_sizes.get(uid, 0)
+        self._entry_sizes[uid] = size
+
+    def _pin(self, uid: str) -> None:
+        self._pins[uid] = self._pins.get(uid, 0) + 1
+
+    def _unpin(self, uid: str) -> None:
+        left = self._pins.get(uid, 0) - 1
+        if left > 0:
+            self._pins[uid] = left
+        else:
+            self._pins.pop(uid, None)
+
+    def _is_pinned(self, uid: str) -> bool:
+        """User đang có thay đổi chưa ghi / đang ghi / đang trong transaction thì không được loại."""
+        return uid in self._pins or uid in self._pending or uid in self._loading
+
+    def _over_budget(self) -> bool:
+        if self.max_cached_users and len(self._users_cache) > self.max_cached_users:
+            return True
+        return bool(self.max_cache_bytes) and self._cache_bytes > self.max_cache_bytes
+
+    def _evict(self) -> None:
+        if not self.lazy_users or not self._over_budget():
+            return
+        for uid in list(self._users_cache.keys()):
+            if not self._over_budget():
+                break
+            if self._is_pinned(uid):
+                continue
+            self._users_cache.pop(uid, None)
+            self._drop_user_derived(uid)
+            self._cache_bytes -= self._entry_sizes.pop(uid, 0)
+            self._cache_stats["evictions"] += 1
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Thống kê cache user: hits / misses / evictions / số user & dung lượng ước lượng."""
+        return {
+            **self._cache_stats,
+            "users": len(self._users_cache),
+            "bytes": self._cache_bytes,
+            "pinned": sum(1 for uid in self._users_cache if self._is_pinned(uid)),
+        }
+
+    # ---------- Model ----------
+    @staticmethod
+    def _empty_user() -> Dict[str, Any]:
+        # THÊM ví tiền (wallet), XP và Level, rod info vào hồ sơ user
+        return {
+            "wallet": 0,
+            "gems": 0,
+            "xp": 0,
+            "level": 1,
+            "rod_level": 1,
+            "max_rod_level": 1,
+            "inventory": {
+                "common": {},
+                "uncommon": {},
+                "rare": {},
+                "epic": {},
+                "legendary": {},
+                "mythical": {},
+                "unreal": {},
+            },
+            # shiny_inventory: lưu số lượng cá shiny theo bậc -> tên
+            "shiny_inventory": {
+                "common": {},
+                "uncommon": {},
+                "rare": {},
+                "epic": {},
+                "legendary": {},
+                "mythical": {},
+                "unreal": {},
+            },
+            # items: mapping item_id -> count (vật phẩm có thể bán; keys là IDs từ game_items.ITEMS)
+            "items": {},
+            # equipped_items: list of item IDs currently equipped
+            "equipped_items": [],
+            # eggs: danh sách trứng đang ấp/chờ nở; mỗi egg là dict với các khóa: id, tier, hatch_at (epoch)
+            "eggs": [],
+            # pets: danh sách pet_id mà user sở hữu (pet passive buffs)
+            "pets": [],
+            # active_pets: danh sách pet_id đang được kích hoạt (áp dụng buffs)
+            "active_pets": [],
+            # last_daily: epoch timestamp của lần nhận daily cuối
+            "last_daily": 0,
+            # fishes: list of caught fish objects. Each fish is a dict with keys like:
+            # id, name, rarity, weight (kg), weight_class, caught_at, variation (optional), price_per_kg (optional)
+            "fishes": [],
+            # aquarium: dict of fish_id -> {added_at, rate (coins/giờ), name}
+            "aquarium": {},
+            # sổ thu nhập thủy cung: thu nhập chờ = banked + rate × (now - since) (xem aquarium_ledger.py)
+            "aqua_ledger": {"rate": 0.0, "since": 0, "banked": 0.0},
+        }
+
+    def _generate_unique_fish_id(self, user_id: int) -> str:
+        """Cấp id cá 4 ký tự base-62 mới cho user từ bộ đếm `fish_seq` (không random/thử lại).
+        Chỉ bỏ qua các id cũ (random) đang trùng trong index. Bộ đếm trong cache được tăng;
+        người gọi phải ghi lại `fish_seq` cùng với cá mới.
+        """
+        uid = str(user_id)
+        doc = self._users_cache.get(uid)
+        if doc is None:
+            return ''.join(random.choices(_B62, k=4))
+        index = self._fish_map(uid)
+        seq = int(doc.get("fish_seq", 0))
+        for _ in range(len(index) + 1):
+            cand = _b62(seq % _FISH_ID_SPACE)
+            seq += 1
+            if cand not in index:
+                break
+        doc["fish_seq"] = seq
+        return cand
+
+    # ---------- Fish index (id -> fish) + số liệu tổng hợp ----------
+    def _fish_entry(self, uid: str) -> list | None:
+        """[list fishes, độ dài, index id -> cá, FishAggregates] của user; dựng lại khi list
+        `fishes` bị thay thế hoặc đổi độ dài ngoài dự kiến."""
+        doc = self._users_cache.get(uid)
+        lst = doc.get("fishes") if doc is not None else None
+        if not isinstance(lst, list):
+            self._fish_index.pop(uid, None)
+            return None
+        ent = self._fish_index.get(uid)
+        if ent is None or ent[0] is not lst or ent[1] != len(lst):
+            ent = self._fish_index[uid] = [lst, len(lst), {f.get("id"): f for f in lst}, FishAggregates(lst)]
+        return ent
+
+    def _fish_map(self, uid: str) -> Dict[str, dict]:
+        """Index id -> cá của user."""
+        ent = self._fish_entry(uid)
+        return ent[2] if ent is not None else {}
+
+    def _index_fish(self, uid: str, fish: dict) -> None:
+        """Gọi ngay sau khi append `fish` vào list `fishes` trong cache."""
+        ent = self._fish_index.get(uid)
+        lst = self._users_cache.get(uid, {}).get("fishes")
+        if ent is not None and ent[0] is lst and ent[1] + 1 == len(lst):
+            ent[2][fish.get("id")] = fish
+            ent[3].add(fish)
+            ent[1] += 1
+        else:
+            self._fish_index.pop(uid, None)
+
+    def _unindex_fishes(self, uid: str, removed: list[dict]) -> None:
+        """Gọi ngay sau khi xoá `removed` khỏi list `fishes` (tại chỗ) trong cache."""
+        ent = self._fish_index.get(uid)
+        lst = self._users_cache.get(uid, {}).get("fishes")
+        if ent is not None and ent[0] is lst and ent[1] - len(removed) == len(lst):
+            for f in removed:
+                ent[2].pop(f.get("id"), None)
+                ent[3].remove(f)
+            ent[1] -= len(removed)
+        else:
+            self._fish_index.pop(uid, None)
+
+    def _drop_user_derived(self, uid: str) -> None:
+        """Bỏ các cấu trúc dẫn xuất từ document user (khi user bị loại khỏi cache / nạp lại)."""
+        self._fish_index.pop(uid, None)
+        self.stats.invalidate(uid)
+
+    def get_fish(self, user_id: int, fish_id: str) -> dict | None:
+        """Tra cứu một con cá theo id trong O(1)."""
+        return self._fish_map(str(user_id)).get(fish_id)
+
+    def get_fishes_by_ids(self, user_id: int, fish_ids) -> list[dict]:
+        """Trả về các cá theo thứ tự `fish_ids` (bỏ qua id không tồn tại)."""
+        index = self._fish_map(str(user_id))
+        return [index[fid] for fid in fish_ids if fid in index]
+
+    def get_fish_count(self, user_id: int) -> int:
+        """Số cá (object) user đang giữ, không sao chép list."""
+        ent = self._fish_entry(str(user_id))
+        return ent[3].count if ent is not None else 0
+
+    def get_fish_stats(self, user_id: int) -> Dict[str, Any]:
+        """Số liệu kho cá: count, by_rarity, shiny, shiny_by_rarity, value (tổng giá bán),
+        max_price, best (con đắt nhất). Cập nhật O(1) theo mỗi lần thêm/bớt cá."""
+        ent = self._fish_entry(str(user_id))
+        if ent is None:
+            return FishAggregates().as_dict(())
+        return ent[3].as_dict(ent[0])
+
+    def _best_fish(self, uid: str, doc: dict | None) -> dict | None:
+        """Con cá đắt nhất của `doc` (dùng số liệu tổng hợp nếu là bản trong cache)."""
+        if doc is not None and doc is self._users_cache.get(uid):
+            ent = self._fish_entry(uid)
+            return ent[3].best(ent[0]) if ent is not None else None
+        fishes = (doc or {}).get("fishes") or []
+        return max(fishes, key=lambda f: f.get("sell_price", 0) or 0, default=None)
+
+    # ---------- Inventory ----------
+    def get_inventory(self, user_id: int) -> Dict[str, Dict[str, int]]:
+        """Lấy kho đồ dạng {rarity: {fish_name: count}}."""
+        return self._users_cache.get(str(user_id), self._empty_user()).get("inventory", {})
+
+    @_serialized
+    async def set_inventory(self, user_id: int, new_inventory: Dict[str, Dict[str, int]]) -> None:
+        """Ghi đè kho đồ (dùng sau các thao tác như bán).
+        new_inventory nên có đủ các bậc: common/uncommon/rare/epic (sẽ được chuẩn hóa).
+        """
+        uid = str(user_id)
+        await self._ensure_user(uid)
+
+        # Chuẩn hóa dữ liệu để luôn có đủ các bậc
+        normalized = {
+            "common": dict(new_inventory.get("common", {})),
+            "uncommon": dict(new_inventory.get("uncommon", {})),
+            "rare": dict(new_inventory.get("rare", {})),
+            "epic": dict(new_inventory.get("epic", {})),
+            "legendary": dict(new_inventory.get("legendary", {})),
+            "mythical": dict(new_inventory.get("mythical", {})),
+            "unreal": dict(new_inventory.get("unreal", {})),
+        }
+        self._users_cache[uid]["inventory"] = normalized
+        await self._write_user(uid, {"$set": {"inventory": normalized}})
+
+    # ---------- Items (vật phẩm) ----------
+    def get_items(self, user_id: int) -> Dict[str, int]:
+        """Trả về dict item_name -> count."""
+        return self._users_cache.get(str(user_id), self._empty_user()).get("items", {})
+
+    @_serialized
+    async def add_item(self, user_id: int, item_id: str, count: int = 1) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        items = self._users_cache[uid].setdefault("items", {})
+        items[item_id] = items.get(item_id, 0) + int(count)
+        
+        await self._write_user(uid, {"$set": {"items": items}})
+
+    @_serialized
+    async def remove_item(self, user_id: int, item_id: str, count: int = 1) -> bool:
+        """Giảm số lượng item; trả về True nếu thành công, False nếu không đủ."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        items = self._users_cache[uid].setdefault("items", {})
+        cur = int(items.get(item_id, 0))
+        if cur < count:
+            return False
+        if cur == count:
+            items.pop(item_id, None)
+        else:
+            items[item_id] = cur - count
+            
+        await self._write_user(uid, {"$set": {"items": items}})
+        return True
+
+    def get_equipped_items(self, user_id: int) -> list[str]:
+        return list(self._users_cache.get(str(user_id), self._empty_user()).get("equipped_items", []))
+
+    @_serialized
+    async def set_equipped_items(self, user_id: int, equipped: list[str]) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        self._users_cache[uid]["equipped_items"] = list(equipped)
+        self.stats.invalidate(uid)
+        await self._write_user(uid, {"$set": {"equipped_items": list(equipped)}})
+
+    # ---------- Eggs & Pets ----------
+    def get_eggs(self, user_id: int) -> list[dict]:
+        return list(self._users_cache.get(str(user_id), self._empty_user()).get("eggs", []))
+
+    @_serialized
+    async def add_egg(self, user_id: int, egg: dict) -> str:
+        """egg should be dict with keys at least: id, tier, hatch_at."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        self._users_cache[uid].setdefault("eggs", []).append(dict(egg))
+        await self._write_user(uid, {"$push": {"eggs": dict(egg)}})
+        self.eggs.add(uid, egg)
+        return egg.get("id")
+
+    @_serialized
+    async def remove_egg(self, user_id: int, egg_id: str) -> bool:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        eggs = self._users_cache[uid].setdefault("eggs", [])
+        new = [e for e in eggs if e.get("id") != egg_id]
+        if len(new) == len(eggs):
+            return False
+        self._users_cache[uid]["eggs"] = new
+        await self._write_user(uid, {"$set": {"eggs": new}})
+        self.eggs.remove(uid, egg_id)
+        return True
+
+    @_serialized
+    async def buy_eggs(self, user_id: int, eggs: list[dict], coins: int = 0) -> bool:
+        """Mua nhiều trứng trong MỘT update có điều kiện: `$inc wallet -coins` + `$push eggs $each`
+        chỉ khi `wallet >= coins`. Trả về False (không trừ, không thêm gì) nếu không đủ tiền."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        eggs = [dict(e) for e in eggs]
+        coins = max(0, int(coins))
+        if not eggs:
+            return True
+        if self.write_behind and uid in self._pending:
+            # Ghi hết hàng đợi TRƯỚC khi sửa cache: `$set eggs` đang chờ trỏ tới chính list
+            # trong cache, nếu thêm trứng vào đó trước thì `$push` bên dưới sẽ ghi trùng
+            await self.flush()
+        doc = self._users_cache[uid]
+        if int(doc.get("wallet", 0)) < coins:
+            return False
+        update: Dict[str, Dict[str, Any]] = {"$push": {"eggs": {"$each": eggs}}}
+        if coins:
+            update["$inc"] = {"wallet": -coins}
+
+        def apply(d: dict) -> None:
+            d["wallet"] = int(d.get("wallet", 0)) - coins
+            d.setdefault("eggs", []).extend(eggs)
+
+        ok = await self._write_user_where(uid, update, {"wallet": {"$gte": coins}}, apply=apply)
+        if ok:
+            for egg in eggs:
+                self.eggs.add(uid, egg)
+        return ok
+
+    async def hatch_eggs(self, user_id: int, egg_ids, choose, now: int | None = None) -> list[tuple[dict, str]]:
+        """Nở các trứng đã chín trong `egg_ids` bằng MỘT update: `$pull eggs {id: {$in}}` +
+        `$push pets {$each}`. `choose(egg)` trả về pet_id. Trả về [(trứng, pet_id)] đã nở
+        (trứng đã bị lệnh khác nở hoặc chưa chín thì bỏ qua)."""
+        now = int(now or time.time())
+        wanted = set(egg_ids)
+        async with self.user_txn(user_id) as u:
+            ready = [e for e in u.get("eggs", []) if e.get("id") in wanted and int(e.get("hatch_at", 0)) <= now]
+            hatched = [(e, choose(e)) for e in ready]
+            hatched = [(e, pid) for e, pid in hatched if pid]
+            if hatched:
+                u.pull("eggs", {"id": {"$in": [e.get("id") for e, _ in hatched]}})
+                u.push("pets", *[pid for _, pid in hatched])
+        for egg, _ in hatched:
+            self.eggs.remove(user_id, egg.get("id"))
+        return hatched
+
+    def get_pets(self, user_id: int) -> list[str]:
+        return list(self._users_cache.get(str(user_id), self._empty_user()).get("pets", []))
+
+    @_serialized
+    async def add_pet(self, user_id: int, pet_id: str) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        self._users_cache[uid].setdefault("pets", []).append(pet_id)
+        await self._write_user(uid, {"$push": {"pets": pet_id}})
+
+    @_serialized
+    async def remove_pet(self, user_id: int, pet_id: str) -> bool:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        pets = self._users_cache[uid].setdefault("pets", [])
+        if pet_id not in pets:
+            return False
+        pets.remove(pet_id)
+        await self._write_user(uid, {"$set": {"pets": pets}})
+        return True
+
+    # ---------- Active pets (đang sử dụng) ----------
+    def get_active_pets(self, user_id: int) -> list[str]:
+        return list(self._users_cache.get(str(user_id), self._empty_user()).get("active_pets", []))
+
+    @_serialized
+    async def set_active_pets(self, user_id: int, active: list[str]) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        self._users_cache[uid]["active_pets"] = list(active)
+        self.stats.invalidate(uid)
+        await self._write_user(uid, {"$set": {"active_pets": list(active)}})
+
+    @_serialized
+    async def add_active_pet(self, user_id: int, pet_id: str) -> bool:
+        """Add pet to active list; return True if added, False if already active."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        act = self._users_cache[uid].setdefault("active_pets", [])
+        if pet_id in act:
+            return False
+        act.append(pet_id)
+        self.stats.invalidate(uid)
+        await self._write_user(uid, {"$set": {"active_pets": act}})
+        return True
+
+    @_serialized
+    async def remove_active_pet(self, user_id: int, pet_id: str) -> bool:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        act = self._users_cache[uid].setdefault("active_pets", [])
+        if pet_id not in act:
+            return False
+        act.remove(pet_id)
+        self.stats.invalidate(uid)
+        await self._write_user(uid, {"$set": {"active_pets": act}})
+        return True
+
+    @_serialized
+    async def add_fish(self, user_id: int, rarity: str, fish_name: str) -> None:
+        """Tăng 1 con cá vào kho."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+
+        rarity = rarity.lower()
+        inv = self._users_cache[uid]["inventory"]
+        inv.setdefault(rarity, {})
+        inv[rarity][fish_name] = inv[rarity].get(fish_name, 0) + 1
+        
+        await self._write_user(uid, {"$set": {f"inventory.{rarity}.{fish_name}": inv[rarity][fish_name]}})
+
+    @_serialized
+    async def reset_inventory(self, user_id: int) -> None:
+        """Xóa sạch kho đồ (không ảnh hưởng ví)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        empty_inv = {"common": {}, "uncommon": {}, "rare": {}, "epic": {}}
+        self._users_cache[uid]["inventory"] = empty_inv
+        self._users_cache[uid]["shiny_inventory"] = empty_inv
+        
+        await self._write_user(uid, {"$set": {"inventory": empty_inv, "shiny_inventory": empty_inv}})
+
+    # ---------- Fish objects (new model) ----------
+    def get_fish_objects(self, user_id: int) -> list:
+        """Return list of fish objects the user owns."""
+        return list(self._users_cache.get(str(user_id), self._empty_user()).get("fishes", []))
+
+    @_serialized
+    async def add_caught_fish(self, user_id: int, fish: dict) -> str:
+        """Add a fish object to user's 'fishes' list. Returns fish id."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        seq = self._users_cache[uid].get("fish_seq")
+        fish_copy = self._prepare_fish(uid, fish)
+        self._users_cache[uid].setdefault("fishes", []).append(fish_copy)
+        self._index_fish(uid, fish_copy)
+        
+        update: Dict[str, Dict[str, Any]] = {"$push": {"fishes": fish_copy}}
+        if self._users_cache[uid].get("fish_seq") != seq:
+            update["$set"] = {"fish_seq": self._users_cache[uid]["fish_seq"]}
+        await self._write_user(uid, update)
+        return fish_copy["id"]
+
+    @_serialized
+    async def add_caught_fishes(self, user_id: int, fishes) -> list[str]:
+        """Thêm nhiều cá cùng lúc bằng MỘT `$push ... $each`. Trả về danh sách id."""
+        async with self.user_txn(user_id) as u:
+            return u.add_caught_fishes(fishes)
+
+    def _prepare_fish(self, uid: str, fish: dict) -> dict:
+        """Copy a fish object and make sure its id is a unique 4-char alnum id for this user.
+        Có thể tăng `fish_seq` trong cache (người gọi ghi lại cùng với cá mới).
+        """
+        self._users_cache[uid].setdefault("fishes", [])
+        fish_copy = dict(fish)
+        fid = fish_copy.get("id")
+        # Ensure id follows 4-char alnum format and is unique per-user
+        if not isinstance(fid, str) or not re.fullmatch(r'[A-Za-z0-9]{4}', fid) or fid in self._fish_map(uid):
+            fid = self._generate_unique_fish_id(uid)
+        fish_copy["id"] = fid
+        return fish_copy
+
+    @_serialized
+    async def remove_fish_by_id(self, user_id: int, fish_id: str) -> bool:
+        """Remove a fish by its id; return True if removed, False if not found."""
+        return bool(await self.remove_fish_by_ids(user_id, [fish_id]))
+
+    @_serialized
+    async def remove_fish_by_ids(self, user_id: int, fish_ids) -> list[dict]:
+        """Xoá nhiều cá cùng lúc bằng MỘT `$pull: {fishes: {id: {$in: ids}}}`.
+        Trả về danh sách cá đã xoá (id không tồn tại được bỏ qua).
+        """
+        async with self.user_txn(user_id) as u:
+            return u.remove_fishes(fish_ids)
+
+    @_serialized
+    async def sell_fishes(self, user_id: int, fish_ids, gem_per_rarity: Dict[str, int] | None = None) -> tuple[list[dict], int, int]:
+        """Bán nhiều cá trong MỘT update: `$pull` các cá và `$inc` wallet/gems.
+        Chỉ tính tiền cho những cá thực sự còn trong kho. Trả về (cá đã bán, coins, gems).
+        """
+        gem_per_rarity = gem_per_rarity or {}
+        async with self.user_txn(user_id) as u:
+            sold = u.remove_fishes(fish_ids)
+            earned = sum(int(f.get("sell_price", 0)) for f in sold)
+            gems = sum(int(gem_per_rarity.get(f.get("rarity"), 0)) for f in sold)
+            if earned:
+                u.inc("wallet", earned)
+            if gems:
+                u.inc("gems", gems)
+        return sold, earned, gems
+
+    @_serialized
+    async def migrate_inventory_to_objects(self, user_id: int, game_config_defaults: dict | None = None) -> int:
+        """Helper to migrate legacy inventory counts to fish objects."""
+        uid = str(user_id)
+        if uid not in self._users_cache:
+            return 0
+        u = self._users_cache[uid]
+        inv = u.get('inventory', {})
+        migr_count = 0
+        # fallbacks
+        price_map = (game_config_defaults or {}).get('PRICE_PER_KG_BY_RARITY', {})
+        weight_map = (game_config_defaults or {}).get('WEIGHT_BY_RARITY', {})
+        
+        # Import config once outside loop
+        try:
+            from game_config import PRICE_PER_KG_BY_RARITY as CFG_PRICE, WEIGHT_CLASS_PCT_RANGES as CFG_PCT_RANGES, FISH_POOLS as CFG_POOLS
+        except Exception:
+            CFG_PRICE, CFG_PCT_RANGES, CFG_POOLS = {}, {"normal": (0.9, 1.1)}, {}
+            
+        import random
+        import time
+
+        for rarity, bucket in inv.items():
+            for name, cnt in list(bucket.items()):
+                for _ in range(int(cnt)):
+                    # generate fish object using per-fish base_weight and price if available
+                    # look up fish definition in FISH_POOLS by rarity and name
+                    fish_def = None
+                    try:
+                        pool = CFG_POOLS.get(rarity, [])
+                        for ent in pool:
+                            if ent.get('name') == name:
+                                fish_def = ent
+                                break
+                    except Exception:
+                        fish_def = None
+                    # determine base weight
+                    if fish_def and fish_def.get('base_weight') is not None:
+                        base_w = float(fish_def.get('base_weight'))
+                    else:
+                        wmin, wmax = weight_map.get(rarity, (0.5, 2.0))
+                        base_w = (float(wmin) + float(wmax)) / 2.0
+                    # sample weight using normal class pct (migrate to normal class)
+                    try:
+                        pmin, pmax = CFG_PCT_RANGES.get('normal', (0.9, 1.1))
+                        weight = round(base_w * random.uniform(float(pmin), float(pmax)), 2)
+                    except Exception:
+                        weight = round(base_w, 2)
+                    # determine price_per_kg (per-fish override > provided map > rarity map)
+                    if fish_def and fish_def.get('price_per_kg') is not None:
+                        price_per_kg = int(fish_def.get('price_per_kg'))
+                    else:
+                        price_per_kg = int(price_map.get(rarity, CFG_PRICE.get(rarity, 10)))
+                    fish_obj = {
+                        'id': self._generate_unique_fish_id(user_id),
+                        'name': name,
+                        'rarity': rarity,
+                        'weight': weight,
+                        'weight_class': 'normal',
+                        'price_per_kg': price_per_kg,
+                        'sell_price': int(price_per_kg * weight),
+                        'caught_at': int(time.time()),
+                        'shiny': False,
+                    }
+                    self._users_cache[uid].setdefault('fishes', []).append(fish_obj)
+                    self._index_fish(uid, fish_obj)
+                    migr_count += 1
+        # Clear legacy inventory
+        empty_inv = {"common": {}, "uncommon": {}, "rare": {}, "epic": {}}
+        self._users_cache[uid]['inventory'] = empty_inv
+        
+        # Update Mongo with both changes
+        await self._write_user(uid, {"$set": {"fishes": self._users_cache[uid]['fishes'], "inventory": empty_inv, "fish_seq": self._users_cache[uid].get("fish_seq", 0)}})
+        return migr_count
+
+    # ---------- Shiny fish support ----------
+    def get_shiny_inventory(self, user_id: int) -> Dict[str, Dict[str, int]]:
+        """Lấy kho cá shiny: {rarity: {fish_name: count}}."""
+        return self._users_cache.get(str(user_id), self._empty_user()).get("shiny_inventory", {"common": {}, "uncommon": {}, "rare": {}, "epic": {}, "legendary": {}, "mythical": {}, "unreal": {}})
+
+    @_serialized
+    async def set_shiny_inventory(self, user_id: int, new_shiny_inventory: Dict[str, Dict[str, int]]) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        normalized = {
+            "common": dict(new_shiny_inventory.get("common", {})),
+            "uncommon": dict(new_shiny_inventory.get("uncommon", {})),
+            "rare": dict(new_shiny_inventory.get("rare", {})),
+            "epic": dict(new_shiny_inventory.get("epic", {})),
+            "legendary": dict(new_shiny_inventory.get("legendary", {})),
+            "mythical": dict(new_shiny_inventory.get("mythical", {})),
+            "unreal": dict(new_shiny_inventory.get("unreal", {})),
+        }
+        self._users_cache[uid]["shiny_inventory"] = normalized
+        await self._write_user(uid, {"$set": {"shiny_inventory": normalized}})
+
+    @_serialized
+    async def add_shiny_fish(self, user_id: int, rarity: str, fish_name: str, count: int = 1) -> None:
+        """Tăng số lượng cá shiny."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        rarity = rarity.lower()
+        shin = self._users_cache[uid].setdefault("shiny_inventory", {})
+        shin.setdefault(rarity, {})
+        shin[rarity][fish_name] = shin[rarity].get(fish_name, 0) + int(count)
+        
+        await self._write_user(uid, {"$set": {f"shiny_inventory.{rarity}.{fish_name}": shin[rarity][fish_name]}})
+
+    @_serialized
+    async def remove_shiny_fish(self, user_id: int, rarity: str, fish_name: str, count: int = 1) -> bool:
+        """Giảm số lượng cá shiny; trả về True nếu thành công, False nếu không đủ."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        shin = self._users_cache[uid].setdefault("shiny_inventory", {})
+        bucket = shin.setdefault(rarity.lower(), {})
+        cur = int(bucket.get(fish_name, 0))
+        if cur < count:
+            return False
+        if cur == count:
+            bucket.pop(fish_name, None)
+        else:
+            bucket[fish_name] = cur - count
+            
+        await self._write_user(uid, {"$set": {"shiny_inventory": shin}})
+        return True
+
+    # ---------- Aquarium (new) ----------
+    def get_aquarium(self, user_id: int) -> dict:
+        """Lấy dữ liệu bể cá của người chơi: fish_id -> {added_at, rate, name}."""
+        return self._users_cache.get(str(user_id), self._empty_user()).get("aquarium", {})
+
+    def get_aquarium_income(self, user_id: int, now: float | None = None) -> tuple[float, float]:
+        """(thu nhập chờ, coins/giờ) — O(1) theo sổ thu nhập, không duyệt cá trong bể."""
+        uid = str(user_id)
+        doc = self._users_cache.get(uid, self._empty_user())
+        now = time.time() if now is None else now
+        aquarium, ledger = doc.get("aquarium") or {}, doc.get("aqua_ledger")
+        if aquarium_ledger.is_legacy(aquarium, ledger):
+            # Chưa chuyển đổi (chỉ đọc): tính tạm từ kho, lần ghi kế tiếp sẽ lưu sổ
+            _, ledger = aquarium_ledger.from_legacy(aquarium, self._fish_map(uid), now)
+        ledger = ledger or aquarium_ledger.empty()
+        return aquarium_ledger.pending(ledger, now), float(ledger.get("rate", 0) or 0)
+
+    async def add_to_aquarium(self, user_id: int, fish: dict) -> dict:
+        async with self.user_txn(user_id) as u:
+            return u.aquarium_add(fish)
+
+    async def remove_from_aquarium(self, user_id: int, fish_id: str) -> bool:
+        async with self.user_txn(user_id) as u:
+            return bool(u.aquarium_remove([fish_id]))
+
+    async def collect_aquarium(self, user_id: int) -> int:
+        async with self.user_txn(user_id) as u:
+            return u.collect_aquarium()
+
+    @_serialized
+    async def set_aquarium(self, user_id: int, aquarium_data: dict) -> None:
+        """Ghi đè toàn bộ dữ liệu bể cá (sổ thu nhập được chốt và tính lại rate)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        now = int(time.time())
+        doc = self._users_cache[uid]
+        fishes = self._fish_map(uid)
+        aquarium = {}
+        for fid, data in aquarium_data.items():
+            data = dict(data)
+            if "rate" not in data:
+                fish = fishes.get(fid) or {}
+                data.update(rate=aquarium_ledger.fish_rate(fish), name=fish.get("name", "Unknown"))
+            aquarium[fid] = data
+        ledger = aquarium_ledger.settle(doc.get("aqua_ledger"), now, aquarium_ledger.total_rate(aquarium))
+        doc["aquarium"] = aquarium
+        doc["aqua_ledger"] = ledger
+        await self._write_user(uid, {"$set": {"aquarium": aquarium, "aqua_ledger": ledger}})
+
+    async def collect_all_aquariums(self, batch_size: int = 200, now: int | None = None) -> tuple[int, int]:
+        """Thu hoạch thủy cung cho mọi user trong cache: mỗi batch một `bulk_write`
+        ($inc wallet + $set aqua_ledger). Trả về (số user được cộng, tổng coins).
+        User không có trong cache (lazy) vẫn tích luỹ theo sổ và thu khi dùng /aqua collect."""
+        now = int(now or time.time())
+        uids = [uid for uid, doc in self._users_cache.items()
+                if (doc.get("aqua_ledger") or {}).get("rate") or (doc.get("aqua_ledger") or {}).get("banked", 0) >= 1]
+        users = coins = 0
+        for i in range(0, len(uids), max(1, int(batch_size))):
+            chunk = uids[i:i + max(1, int(batch_size))]
+            async with self.user_lock(*chunk):
+                if self.write_behind and any(uid in self._pending for uid in chunk):
+                    # Không để `$set` đang chờ ghi đè lên / cộng trùng với batch này
+                    await self.flush()
+                requests, saved = [], {}
+                for uid in chunk:
+                    doc = self._users_cache.get(uid)
+                    if doc is None or aquarium_ledger.is_legacy(doc.get("aquarium"), doc.get("aqua_ledger")):
+                        continue
+                    amount, ledger = aquarium_ledger.collect(doc.get("aqua_ledger"), now)
+                    if amount <= 0:
+                        continue
+                    saved[uid] = (doc.get("wallet", 0), doc.get("aqua_ledger"), {f: doc[f] for f in self._META_FIELDS if f in doc})
+                    doc["wallet"] = int(doc.get("wallet", 0)) + amount
+                    doc["aqua_ledger"] = ledger
+                    requests.append((uid, self._stamp(doc, {"$inc": {"wallet": amount}, "$set": {"aqua_ledger": ledger}}), amount))
+                if not requests:
+                    continue
+                for uid in saved:
+                    self._pin(uid)
+                try:
+                    await self.store.bulk_update("users", [(uid, update) for uid, update, _ in requests])
+                except Exception:
+                    # Trả cache về như trước batch
+                    for uid, (wallet, ledger, meta) in saved.items():
+                        doc = self._users_cache.get(uid)
+                        if doc is not None:
+                            doc["wallet"], doc["aqua_ledger"] = wallet, ledger
+                            doc.update(meta)
+                    raise
+                finally:
+                    for uid in saved:
+                        self._unpin(uid)
+                for uid, update, amount in requests:
+                    self.leaderboards.touch(uid, self._users_cache.get(uid), ("wallet",))
+                    await self._publish("users", uid, update)
+                    users += 1
+                    coins += amount
+        return users, coins
+
+    # ---------- Wallet ----------
+    def get_balance(self, user_id: int) -> int:
+        """Lấy số dư ví (coins)."""
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("wallet", 0))
+
+    @_serialized
+    async def add_money(self, user_id: int, amount: int) -> int:
+        """Cộng (hoặc trừ nếu âm) tiền vào ví. Trả về số dư mới (>= 0)."""
+        return await self._add_counter(str(user_id), "wallet", amount)
+
+    async def _add_counter(self, uid: str, field: str, amount: int) -> int:
+        """Cộng/trừ một field số bằng `$inc` (không đọc-rồi-ghi giá trị tuyệt đối).
+        Số âm được trừ có điều kiện `$gte` nên không bao giờ xuống dưới 0; nếu không đủ
+        thì trừ hết phần còn lại (giữ hành vi clamp về 0 như cũ).
+        """
+        await self._ensure_user(uid)
+        amount = int(amount)
+        doc = self._users_cache[uid]
+        if amount > 0:
+            doc[field] = int(doc.get(field, 0)) + amount
+            await self._write_user(uid, {"$inc": {field: amount}})
+        elif amount < 0:
+            if not await self._debit(uid, {field: -amount}):
+                rest = int(doc.get(field, 0))
+                if rest > 0:
+                    await self._debit(uid, {field: rest})
+        return int(doc.get(field, 0))
+
+    async def _debit(self, uid: str, amounts: Dict[str, int]) -> bool:
+        """Trừ nhiều field cùng lúc bằng MỘT `$inc` có filter `$gte` (atomic phía DB).
+        Cache được trừ trước khi chờ ghi để các lệnh đồng thời thấy số dư mới; hoàn lại nếu thất bại.
+        """
+        amounts = {f: int(v) for f, v in amounts.items() if int(v) > 0}
+        if not amounts:
+            return True
+        doc = self._users_cache[uid]
+        if any(int(doc.get(f, 0)) < v for f, v in amounts.items()):
+            return False
+        for f, v in amounts.items():
+            doc[f] = int(doc.get(f, 0)) - v
+        ok = False
+        try:
+            ok = await self._write_user_where(
+                uid,
+                {"$inc": {f: -v for f, v in amounts.items()}},
+                {f: {"$gte": v} for f, v in amounts.items()},
+            )
+        finally:
+            if not ok:
+                for f, v in amounts.items():
+                    doc[f] = int(doc.get(f, 0)) + v
+        return ok
+
+    @_serialized
+    async def try_spend(self, user_id: int, coins: int = 0, gems: int = 0) -> bool:
+        """Trừ coins và/hoặc gems nếu đủ, trong MỘT update có điều kiện.
+        Trả về False (không trừ gì) nếu không đủ — không bao giờ làm âm số dư.
+        """
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        return await self._debit(uid, {"wallet": coins, "gems": gems})
+
+    @_serialized
+    async def set_money(self, user_id: int, amount: int) -> int:
+        """Đặt số dư ví về một giá trị cụ thể (>= 0)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        val = max(0, int(amount))
+        self._users_cache[uid]["wallet"] = val
+        await self._write_user(uid, {"$set": {"wallet": val}})
+        return val
+
+    # ---------- Gems (mới) ----------
+    def get_gems(self, user_id: int) -> int:
+        """Lấy số lượng gem hiện tại."""
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("gems", 0))
+
+    @_serialized
+    async def add_gems(self, user_id: int, amount: int) -> int:
+        """Cộng (hoặc trừ) gem vào tài khoản. Trả về số gem mới (>=0)."""
+        return await self._add_counter(str(user_id), "gems", amount)
+
+    @_serialized
+    async def set_gems(self, user_id: int, amount: int) -> int:
+        """Đặt gem về một giá trị cụ thể (>=0)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        val = max(0, int(amount))
+        self._users_cache[uid]["gems"] = val
+        await self._write_user(uid, {"$set": {"gems": val}})
+        return val
+
+    # ---------- Daily timestamp (mới) ----------
+    def get_last_daily(self, user_id: int) -> int:
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("last_daily", 0))
+
+    @_serialized
+    async def set_last_daily(self, user_id: int, timestamp: int) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        self._users_cache[uid]["last_daily"] = int(timestamp)
+        await self._write_user(uid, {"$set": {"last_daily": int(timestamp)}})
+
+    # ---------- Thông báo trứng nở (opt-in) ----------
+    def get_egg_notify(self, user_id: int) -> bool:
+        return bool(self._users_cache.get(str(user_id), self._empty_user()).get("egg_notify", False))
+
+    @_serialized
+    async def set_egg_notify(self, user_id: int, enabled: bool) -> None:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+
+        self._users_cache[uid]["egg_notify"] = bool(enabled)
+        await self._write_user(uid, {"$set": {"egg_notify": bool(enabled)}})
+
+    # ---------- XP & Level ----------
+    def get_xp(self, user_id: int) -> int:
+        """Lấy XP hiện thời của user."""
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("xp", 0))
+
+    @_serialized
+    async def add_xp(self, user_id: int, amount: int) -> int:
+        """Cộng XP (dương hoặc âm). Trả về XP mới."""
+        return await self._add_counter(str(user_id), "xp", amount)
+
+    @_serialized
+    async def set_xp(self, user_id: int, amount: int) -> int:
+        """Đặt XP về giá trị cụ thể (>=0)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        val = max(0, int(amount))
+        self._users_cache[uid]["xp"] = val
+        await self._write_user(uid, {"$set": {"xp": val}})
+        return val
+
+    def get_level(self, user_id: int) -> int:
+        """Lấy cấp hiện thời của user."""
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("level", 1))
+
+    @_serialized
+    async def set_level(self, user_id: int, level: int) -> int:
+        """Đặt cấp cho user (>=1)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        level = max(1, int(level))
+        self._users_cache[uid]["level"] = level
+        await self._write_user(uid, {"$set": {"level": level}})
+        return level
+
+
+    # ---------- Rod (cần câu) ----------
+    def get_rod_level(self, user_id: int) -> int:
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("rod_level", 1))
+
+    @_serialized
+    async def set_rod_level(self, user_id: int, level: int) -> int:
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        level = max(1, int(level))
+        self._users_cache[uid]["rod_level"] = level
+        self.stats.invalidate(uid)
+        await self._write_user(uid, {"$set": {"rod_level": level}})
+        return level
+
+    def get_max_rod_level(self, user_id: int) -> int:
+        """Lấy cấp cần cao nhất mà user từng mua/so hữu."""
+        return int(self._users_cache.get(str(user_id), self._empty_user()).get("max_rod_level", 1))
+
+    @_serialized
+    async def set_max_rod_level(self, user_id: int, level: int) -> int:
+        """Cập nhật max_rod_level (không giảm)."""
+        uid = str(user_id)
+        await self._ensure_user(uid)
+        
+        level = max(1, int(level))
+        current = int(self._users_cache[uid].get("max_rod_level", 1))
+        if level > current:
+            self._users_cache[uid]["max_rod_level"] = level
+            await self._write_user(uid, {"$set": {"max_rod_level": level}})
+            return level
+        return current
+
+
+    # ---------- Public getter phục vụ leaderboard/khác ----------
+    def read_all_users(self) -> Dict[str, dict]:
+        """Trả về toàn bộ USERS (chỉ đọc) để làm leaderboard, thống kê, v.v.
+        Ở chế độ lazy chỉ gồm các user đang nằm trong cache.
+        """
+        return self._users_cache
+
+    # ---------- Guild Config (Prefix & Channels) ----------
+    async def _write_guild(self, gid: str, update: Dict[str, Dict[str, Any]]) -> None:
+        update = self._stamp(self._guilds_cache.get(gid), update)
+        await self.store.update_one("guilds", gid, update)
+        await self._publish("guilds", gid, update)
+
+    def get_guild_prefix(self, guild_id: int) -> str | None:
+        """Lấy prefix riêng của guild, trả về None nếu chưa set."""
+        return self._guilds_cache.get(str(guild_id), {}).get("prefix")
+
+    async def set_guild_prefix(self, guild_id: int, prefix: str) -> None:
+        gid = str(guild_id)
+        g = self._guilds_cache.setdefault(gid, {})
+        g["prefix"] = prefix
+        await self._write_guild(gid, {"$set": {"prefix": prefix}})
+
+    def get_allowed_channels(self, guild_id: int) -> list[int]:
+        """Trả về danh sách ID kênh cho phép. Nếu rỗng -> cho phép tất cả."""
+        return list(self._guilds_cache.get(str(guild_id), {}).get("allowed_channels", []))
+
+    async def add_allowed_channel(self, guild_id: int, channel_id: int) -> None:
+        gid = str(guild_id)
+        g = self._guilds_cache.setdefault(gid, {})
+        channels = g.setdefault("allowed_channels", [])
+        if channel_id not in channels:
+            channels.append(channel_id)
+            await self._write_guild(gid, {"$set": {"allowed_channels": channels}})
+
+    async def remove_allowed_channel(self, guild_id: int, channel_id: int) -> bool:
+        gid = str(guild_id)
+        g = self._guilds_cache.setdefault(gid, {})
+        channels = g.setdefault("allowed_channels", [])
+        if channel_id in channels:
+            channels.remove(channel_id)
+            await self._write_guild(gid, {"$set": {"allowed_channels": channels}})
+            return True
+        return False
+
+    async def clear_allowed_channels(self, guild_id: int) -> None:
+        gid = str(guild_id)
+        if gid in self._guilds_cache:
+            g = self._guilds_cache[gid]
+            g["allowed_channels"] = []
+            await self._write_guild(gid, {"$set": {"allowed_channels": []}})
\ No newline at end of file
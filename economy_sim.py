@@ -0,0 +1,400 @@
+# economy_sim.py
+"""Mô phỏng kinh tế game ngoài bot (không cần Discord / database).
+
+Mô hình một quần thể người chơi theo các kiểu (ARCHETYPES) qua nhiều ngày: câu cá theo
+nhịp riêng, bán khi đầy kho, nâng cần, mua/ấp trứng, dùng pet, thả cá vào thủy cung và
+thu hoạch, nhận daily. Dùng chung game_config / game_pets, FishingEngine (luật câu cá)
+và compute_stats (chỉ số cần + pet) với bot; người chơi được chia cho một process pool.
+
+Ví dụ:
+    python economy_sim.py --players 2000 --days 30
+    python economy_sim.py --players 500 --days 60 --mix casual=0.5,regular=0.4,grinder=0.1 --json out.json
+"""
+from __future__ import annotations
+import argparse
+import bisect
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List
+
+from fishing_engine import get_engine
+from stats_service import compute_stats
+
+try:
+    from game_config import (
+        ROD_TIERS, MAX_ROD_LEVEL, GEM_SETTINGS, WEATHER_CONFIG, XP_PER_CATCH, BASE_XP_PER_LEVEL,
+        FISH_INVENTORY_LIMIT, DAILY_COINS_RANGE, HOURLY_INCOME_RATE, AQUARIUM_CAPACITY,
+    )
+except Exception:
+    ROD_TIERS = {1: {"name": "Cần Tre", "cost": 0, "luck": 0.0, "len_add": 0, "timeout_sub": 0.0}}
+    MAX_ROD_LEVEL = max(ROD_TIERS)
+    GEM_SETTINGS = {"gem_per_rarity": {}, "daily_min": 1, "daily_max": 3}
+    WEATHER_CONFIG = {}
+    XP_PER_CATCH = 10
+    BASE_XP_PER_LEVEL = 100
+    FISH_INVENTORY_LIMIT = 40
+    DAILY_COINS_RANGE = (100, 400)
+    HOURLY_INCOME_RATE = 0.05
+    AQUARIUM_CAPACITY = {1: 2, 5: 3, 10: 4, 20: 5}
+
+try:
+    from game_pets import PETS, EGG_SHOP, EGG_TIERS, RARITY_WEIGHTS, EGG_LIMIT
+except Exception:
+    PETS, EGG_SHOP, EGG_TIERS, RARITY_WEIGHTS, EGG_LIMIT = {}, {}, {}, {}, 2
+
+# Kiểu người chơi:
+# - sessions / casts: số phiên chơi mỗi ngày và số lần câu mỗi phiên
+# - char_acc: xác suất gõ đúng mỗi ký tự của thử thách (chuỗi dài hơn → dễ trượt hơn)
+# - daily: xác suất nhớ nhận daily mỗi ngày
+# - egg_tier: bậc trứng hay mua; egg_reserve: chỉ mua trứng khi coins >= giá * egg_reserve
+ARCHETYPES: Dict[str, Dict[str, Any]] = {
+    "casual":  {"sessions": 2, "casts": 12, "char_acc": 0.96, "daily": 0.6, "egg_tier": 1, "egg_reserve": 5.0},
+    "regular": {"sessions": 4, "casts": 25, "char_acc": 0.98, "daily": 0.9, "egg_tier": 2, "egg_reserve": 3.0},
+    "grinder": {"sessions": 8, "casts": 50, "char_acc": 0.99, "daily": 1.0, "egg_tier": 3, "egg_reserve": 2.0},
+}
+DEFAULT_MIX = {"casual": 0.6, "regular": 0.3, "grinder": 0.1}
+
+# Giờ thức trong ngày mà các phiên chơi được rải đều
+AWAKE_HOURS = 16.0
+# Giới hạn pet đang dùng như /peton: 3 nếu Lv>=10, ngược lại 2
+PET_SLOTS = ((10, 3), (1, 2))
+
+_CAP_LEVELS = sorted(AQUARIUM_CAPACITY)
+
+
+def aquarium_capacity(level: int) -> int:
+    i = bisect.bisect_right(_CAP_LEVELS, level)
+    return AQUARIUM_CAPACITY[_CAP_LEVELS[i - 1]] if i else 0
+
+
+def pet_slots(level: int) -> int:
+    for lvl_req, slots in PET_SLOTS:
+        if level >= lvl_req:
+            return slots
+    return 0
+
+
+def _weather_weights():
+    # Tỉ lệ thời gian của mỗi thời tiết = rate * duration (weather.py chọn theo rate, giữ trong duration)
+    keys = list(WEATHER_CONFIG.keys())
+    w = [float(WEATHER_CONFIG[k].get("rate", 0)) * float(WEATHER_CONFIG[k].get("duration", 60)) for k in keys]
+    return (keys, w) if keys and sum(w) > 0 else ([None], [1.0])
+
+
+def _hatch(tier: int, rng: random.Random) -> str | None:
+    choices = EGG_TIERS.get(tier) or list(PETS.keys())
+    if not choices:
+        return None
+    weights = [float(RARITY_WEIGHTS.get(PETS.get(pid, {}).get("rarity", "common"), 1)) for pid in choices]
+    if sum(weights) <= 0:
+        return rng.choice(choices)
+    return rng.choices(choices, weights=weights, k=1)[0]
+
+
+def _pet_score(pid: str) -> float:
+    b = PETS.get(pid, {}).get("buffs", {})
+    return float(b.get("luck", 0)) + 10 * (float(b.get("weight_mult", 1) or 1) - 1)
+
+
+class SimPlayer:
+    """Trạng thái một người chơi trong mô phỏng (đơn giản hoá document user của bot)."""
+
+    def __init__(self, archetype: str, rng: random.Random):
+        self.kind = archetype
+        self.cfg = ARCHETYPES[archetype]
+        self.rng = rng
+        self.coins = 0
+        self.gems = 0
+        self.xp = 0
+        self.level = 1
+        self.rod = 1
+        self.fishes: List[dict] = []
+        self.aquarium: List[dict] = []
+        self.aqua_collected_at = 0.0
+        self.eggs: List[tuple] = []  # (hatch_at_hour, tier)
+        self.pets: List[str] = []
+        self.active: List[str] = []
+        self.rod_day: Dict[int, int] = {1: 0}
+        self.minted = 0  # coins sinh ra (bán cá, thủy cung, daily)
+        self.burned = 0  # coins tiêu (cần, trứng)
+        self._stats = None
+
+    def stats(self) -> Dict[str, Any]:
+        if self._stats is None:
+            self._stats = compute_stats(self.rod, (), self.active)
+        return self._stats
+
+    # ----- hành động -----
+    def cast(self, engine, weather_key, gp: Dict[str, int], gem_mult: int) -> None:
+        st = self.stats()
+        n = (st["len_min"] + st["len_max"]) / 2.0
+        if self.rng.random() >= self.cfg["char_acc"] ** n:
+            return
+        buff = (WEATHER_CONFIG.get(weather_key, {}) or {}).get("buff", {}) or {}
+        luck = st["luck"] + float(buff.get("luck", 0))
+        fish, _ = engine.roll(luck, weather_key, st["weight_mult"], self.rng)
+        self.fishes.append(fish)
+        self.gems += int(gp.get(fish["rarity"], 0)) * gem_mult
+        self._gain_xp(int(XP_PER_CATCH) + st["xp_flat"])
+        if len(self.fishes) + len(self.aquarium) >= FISH_INVENTORY_LIMIT:
+            self.sell_all(gp)
+
+    def _gain_xp(self, amount: int) -> None:
+        # Như UserTxn.gain_xp: XP dư chuyển sang cấp sau, mỗi lần lên cấp thưởng level*15 gems
+        self.xp += amount
+        while self.xp >= BASE_XP_PER_LEVEL * self.level:
+            self.xp -= BASE_XP_PER_LEVEL * self.level
+            self.level += 1
+            self.gems += self.level * 15
+
+    def sell_all(self, gp: Dict[str, int]) -> None:
+        earned = sum(int(f["sell_price"]) for f in self.fishes)
+        self.gems += sum(int(gp.get(f["rarity"], 0)) for f in self.fishes)
+        self.coins += earned
+        self.minted += earned
+        self.fishes = []
+
+    def tend_aquarium(self, now: float) -> None:
+        self.collect(now)
+        cap = aquarium_capacity(self.level)
+        pool = sorted(self.aquarium + [f for f in self.fishes if f["rarity"] != "trash"],
+                      key=lambda f: f["sell_price"], reverse=True)
+        keep = pool[:cap]
+        keep_ids = {id(f) for f in keep}
+        self.fishes = [f for f in self.fishes + self.aquarium if id(f) not in keep_ids]
+        self.aquarium = keep
+
+    def collect(self, now: float) -> None:
+        hours = now - self.aqua_collected_at
+        self.aqua_collected_at = now
+        if hours <= 0:
+            return
+        earned = sum(int(f["sell_price"] * HOURLY_INCOME_RATE * hours) for f in self.aquarium)
+        self.coins += earned
+        self.minted += earned
+
+    def daily(self) -> None:
+        coins = self.rng.randint(*DAILY_COINS_RANGE)
+        self.coins += coins
+        self.minted += coins
+        self.gems += self.rng.randint(int(GEM_SETTINGS.get("daily_min", 1)), int(GEM_SETTINGS.get("daily_max", 3)))
+
+    def shop(self, now: float, day: int) -> None:
+        # 1) Nâng cần ngay khi đủ tiền (gems nếu bậc yêu cầu gem_cost)
+        while self.rod < MAX_ROD_LEVEL:
+            tier = ROD_TIERS[self.rod + 1]
+            gem_cost, coin_cost = int(tier.get("gem_cost", 0)), int(tier.get("cost", 0))
+            if gem_cost > 0:
+                if self.gems < gem_cost:
+                    break
+                self.gems -= gem_cost
+            else:
+                if self.coins < coin_cost:
+                    break
+                self.coins -= coin_cost
+                self.burned += coin_cost
+            self.rod += 1
+            self.rod_day.setdefault(self.rod, day)
+            self._stats = None
+        # 2) Nở trứng đã đến giờ, chọn pet tốt nhất theo số ô
+        ready = [e for e in self.eggs if e[0] <= now]
+        if ready:
+            self.eggs = [e for e in self.eggs if e[0] > now]
+            for _, tier in ready:
+                pid = _hatch(tier, self.rng)
+                if pid:
+                    self.pets.append(pid)
+        best = sorted(set(self.pets), key=_pet_score, reverse=True)[:pet_slots(self.level)]
+        if best != self.active:
+            self.active = best
+            self._stats = None
+        # 3) Mua trứng bằng tiền dư
+        tier = self.cfg["egg_tier"]
+        shop = EGG_SHOP.get(tier)
+        if shop:
+            price = int(shop.get("price", 0))
+            while len(self.eggs) < int(EGG_LIMIT) and self.coins >= price * self.cfg["egg_reserve"]:
+                self.coins -= price
+                self.burned += price
+                self.eggs.append((now + float(shop.get("time", 0)) / 3600.0, tier))
+
+
+def _simulate_chunk(args) -> Dict[str, Any]:
+    """Mô phỏng một nhóm người chơi (chạy trong process con)."""
+    kinds, days, seed = args
+    engine = get_engine()
+    gp = GEM_SETTINGS.get("gem_per_rarity", {}) if isinstance(GEM_SETTINGS, dict) else {}
+    w_keys, w_weights = _weather_weights()
+    gem_mults = {k: engine.gem_mult(k) for k in w_keys}
+    wrng = random.Random(seed ^ 0x5EED)
+
+    players = [SimPlayer(kind, random.Random(seed * 7919 + i)) for i, kind in enumerate(kinds)]
+    supply = [0] * days
+    minted = [0] * days
+    burned = [0] * days
+    for day in range(days):
+        day_start = day * 24.0
+        for p in players:
+            if p.rng.random() < p.cfg["daily"]:
+                p.daily()
+            sessions = int(p.cfg["sessions"])
+            for s in range(sessions):
+                now = day_start + AWAKE_HOURS * (s + 0.5) / sessions
+                weather = wrng.choices(w_keys, weights=w_weights, k=1)[0]
+                for _ in range(int(p.cfg["casts"])):
+                    p.cast(engine, weather, gp, gem_mults[weather])
+                p.tend_aquarium(now)
+                p.shop(now, day + 1)
+            supply[day] += p.coins
+        minted[day] = sum(p.minted for p in players)
+        burned[day] = sum(p.burned for p in players)
+
+    return {
+        "players": [
+            {"kind": p.kind, "coins": p.coins, "gems": p.gems, "level": p.level, "rod": p.rod,
+             "rod_day": p.rod_day, "pets": len(p.pets)}
+            for p in players
+        ],
+        "supply": supply,
+        "minted": minted,
+        "burned": burned,
+    }
+
+
+def _percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = (len(sorted_vals) - 1) * q
+    lo, hi = math.floor(k), math.ceil(k)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (k - lo)
+
+
+def _gini(sorted_vals: List[float]) -> float:
+    n, total = len(sorted_vals), sum(sorted_vals)
+    if n == 0 or total <= 0:
+        return 0.0
+    cum = sum((i + 1) * v for i, v in enumerate(sorted_vals))
+    return (2 * cum) / (n * total) - (n + 1) / n
+
+
+def run(players: int, days: int, mix: Dict[str, float] | None = None, workers: int | None = None,
+        seed: int = 1, chunk: int = 50) -> Dict[str, Any]:
+    """Chạy mô phỏng và trả về báo cáo (phân bố tài sản, ngày đạt cần Lv.N, đường cung tiền)."""
+    mix = mix or DEFAULT_MIX
+    kinds_all = list(mix.keys())
+    rng = random.Random(seed)
+    population = rng.choices(kinds_all, weights=[mix[k] for k in kinds_all], k=int(players))
+    jobs = [(population[i:i + chunk], int(days), seed * 100003 + i) for i in range(0, len(population), chunk)]
+
+    results: List[Dict[str, Any]] = []
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or len(jobs) <= 1:
+        results = [_simulate_chunk(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_simulate_chunk, jobs))
+
+    all_players = [p for r in results for p in r["players"]]
+    supply = [sum(r["supply"][d] for r in results) for d in range(days)]
+    minted = [sum(r["minted"][d] for r in results) for d in range(days)]
+    burned = [sum(r["burned"][d] for r in results) for d in range(days)]
+
+    def wealth(group):
+        vals = sorted(float(p["coins"]) for p in group)
+        return {
+            "n": len(vals),
+            "p10": _percentile(vals, 0.10), "p50": _percentile(vals, 0.50),
+            "p90": _percentile(vals, 0.90), "p99": _percentile(vals, 0.99),
+            "mean": (sum(vals) / len(vals)) if vals else 0.0,
+            "gini": _gini(vals),
+            "gems_p50": _percentile(sorted(float(p["gems"]) for p in group), 0.50),
+            "level_p50": _percentile(sorted(float(p["level"]) for p in group), 0.50),
+        }
+
+    def rod_times(group):
+        out = {}
+        for lvl in range(2, MAX_ROD_LEVEL + 1):
+            ds = sorted(p["rod_day"][lvl] for p in group if lvl in p["rod_day"])
+            out[lvl] = {"reached": len(ds) / len(group) if group else 0.0,
+                        "median_day": _percentile(ds, 0.5) if ds else None}
+        return out
+
+    by_kind = {k: [p for p in all_players if p["kind"] == k] for k in kinds_all}
+    n = max(1, len(all_players))
+    return {
+        "players": len(all_players),
+        "days": days,
+        "mix": mix,
+        "wealth": {"all": wealth(all_players), **{k: wealth(g) for k, g in by_kind.items() if g}},
+        "rod_days": {"all": rod_times(all_players), **{k: rod_times(g) for k, g in by_kind.items() if g}},
+        "supply_per_player": [s / n for s in supply],
+        "inflation": [((supply[d] / supply[d - 1]) - 1.0) if d and supply[d - 1] else None for d in range(days)],
+        "minted_per_player": [m / n for m in minted],
+        "burned_per_player": [b / n for b in burned],
+    }
+
+
+def format_report(rep: Dict[str, Any]) -> str:
+    lines = [f"== Economy sim: {rep['players']} players x {rep['days']} days =="]
+    lines.append("")
+    lines.append("Wealth (coins)      n      p10        p50        p90        p99      gini  gems_p50  lvl_p50")
+    for k, w in rep["wealth"].items():
+        lines.append(f"  {k:<10} {w['n']:>7} {w['p10']:>10,.0f} {w['p50']:>10,.0f} {w['p90']:>10,.0f} "
+                     f"{w['p99']:>10,.0f}  {w['gini']:.3f} {w['gems_p50']:>9,.0f} {w['level_p50']:>8.0f}")
+    lines.append("")
+    lines.append("Time to rod Lv.N (median day / % reached)")
+    for k, rods in rep["rod_days"].items():
+        parts = []
+        for lvl, info in rods.items():
+            md = "-" if info["median_day"] is None else f"{info['median_day']:.0f}d"
+            parts.append(f"L{lvl}:{md}/{info['reached'] * 100:.0f}%")
+        lines.append(f"  {k:<10} " + "  ".join(parts))
+    lines.append("")
+    lines.append("Day   supply/player   minted/player   burned/player   inflation")
+    days = rep["days"]
+    step = max(1, days // 15)
+    for d in list(range(0, days, step)) + ([days - 1] if (days - 1) % step else []):
+        inf = rep["inflation"][d]
+        lines.append(f"  {d + 1:>3} {rep['supply_per_player'][d]:>15,.0f} {rep['minted_per_player'][d]:>15,.0f} "
+                     f"{rep['burned_per_player'][d]:>15,.0f}   {'-' if inf is None else f'{inf * 100:+.1f}%'}")
+    return "\n".join(lines)
+
+
+def _parse_mix(text: str | None) -> Dict[str, float] | None:
+    if not text:
+        return None
+    mix = {}
+    for part in text.split(","):
+        k, _, v = part.partition("=")
+        k = k.strip()
+        if k not in ARCHETYPES:
+            raise SystemExit(f"Kiểu người chơi không hợp lệ: {k!r} ({', '.join(ARCHETYPES)})")
+        mix[k] = float(v or 1)
+    return mix
+
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description="Mô phỏng kinh tế game câu cá.")
+    ap.add_argument("--players", type=int, default=1000)
+    ap.add_argument("--days", type=int, default=30)
+    ap.add_argument("--mix", help="vd: casual=0.6,regular=0.3,grinder=0.1")
+    ap.add_argument("--workers", type=int, default=None, help="số process (mặc định = số CPU)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="ghi báo cáo đầy đủ ra file JSON")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    rep = run(args.players, args.days, _parse_mix(args.mix), args.workers, args.seed)
+    print(format_report(rep))
+    print(f"\n({time.perf_counter() - t0:.1f}s)")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rep, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# egg_scheduler.py
+"""Hẹn giờ trứng nở: min-heap (hatch_at, uid, egg_id) cho mọi trứng chưa chín.
+
+DataManager dựng heap một lần khi khởi động (`seed`) và giữ nó cập nhật trong
+add_egg / remove_egg (`add` / `remove`, xoá lười: mục bị huỷ chỉ bị bỏ qua khi tới đỉnh heap).
+`run()` ngủ đúng tới lần nở kế tiếp (hoặc tới khi có trứng mới nở sớm hơn) rồi gọi
+callback cho từng trứng vừa chín — chi phí tỉ lệ với số trứng chín, không phải số user.
+
+Trứng đã chín từ trước khi khởi động không được báo lại (tránh spam sau mỗi lần restart).
+"""
+from __future__ import annotations
+import asyncio
+import heapq
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Tuple
+
+# (hatch_at, uid, egg_id)
+Entry = Tuple[int, str, str]
+
+
+class EggScheduler:
+    def __init__(self):
+        self._heap: List[Entry] = []
+        # (uid, egg_id) -> hatch_at của mục còn hiệu lực
+        self._live: Dict[Tuple[str, str], int] = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    # ---------- Bảo trì ----------
+    def seed(self, docs: Iterable[Tuple[str, dict]], now: float | None = None) -> int:
+        now = time.time() if now is None else now
+        for uid, doc in docs:
+            for egg in doc.get("eggs") or []:
+                entry = self._entry(str(uid), egg, now)
+                if entry is not None:
+                    self._heap.append(entry)
+        heapq.heapify(self._heap)
+        # run() có thể đã chạy (và đang chờ vô hạn) trước khi heap được dựng
+        self._wakeup.set()
+        return len(self._live)
+
+    def _entry(self, uid: str, egg: dict, now: float) -> Entry | None:
+        egg_id, hatch_at = egg.get("id"), int(egg.get("hatch_at", 0) or 0)
+        if not egg_id or hatch_at <= now:
+            return None
+        self._live[(uid, egg_id)] = hatch_at
+        return (hatch_at, uid, egg_id)
+
+    def add(self, uid, egg: dict) -> None:
+        entry = self._entry(str(uid), egg, time.time())
+        if entry is None:
+            return
+        head = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, entry)
+        if head is None or entry[0] < head:
+            self._wakeup.set()
+
+    def remove(self, uid, egg_id: str) -> None:
+        self._live.pop((str(uid), egg_id), None)
+
+    def sync_user(self, uid, eggs: Iterable[dict] | None) -> None:
+        """Đồng bộ lại trứng của một user (document được thay / nạp lại)."""
+        uid = str(uid)
+        keep = {e.get("id") for e in eggs or ()}
+        for key in [k for k in self._live if k[0] == uid and k[1] not in keep]:
+            del self._live[key]
+        for egg in eggs or ():
+            hatch_at = int(egg.get("hatch_at", 0) or 0)
+            if self._live.get((uid, egg.get("id"))) != hatch_at:
+                self.add(uid, egg)
+
+    # ---------- Đọc ----------
+    def next_at(self) -> int | None:
+        """Thời điểm nở sớm nhất còn hiệu lực (dọn các mục đã huỷ ở đỉnh heap)."""
+        while self._heap:
+            hatch_at, uid, egg_id = self._heap[0]
+            if self._live.get((uid, egg_id)) == hatch_at:
+                return hatch_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_ready(self, now: float | None = None) -> List[Entry]:
+        now = time.time() if now is None else now
+        out = []
+        while self._heap and self._heap[0][0] <= now:
+            hatch_at, uid, egg_id = heapq.heappop(self._heap)
+            if self._live.get((uid, egg_id)) == hatch_at:
+                del self._live[(uid, egg_id)]
+                out.append((hatch_at, uid, egg_id))
+        return out
+
+    # ---------- Vòng hẹn giờ ----------
+    async def run(self, on_ready: Callable[[str, str, int], Awaitable[None] | None]) -> None:
+        """Chạy mãi: ngủ tới lần nở kế tiếp rồi gọi `on_ready(uid, egg_id, hatch_at)`."""
+        while True:
+            self._wakeup.clear()
+            nxt = self.next_at()
+            timeout = None if nxt is None else max(0.0, nxt - time.time())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue  # có trứng mới nở sớm hơn: tính lại
+                except asyncio.TimeoutError:
+                    pass
+            for hatch_at, uid, egg_id in self.pop_ready():
+                try:
+                    res = on_ready(uid, egg_id, hatch_at)
+                    if asyncio.iscoroutine(res):
+                        await res
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️ Lỗi khi báo trứng nở ({uid}/{egg_id}): {e}")
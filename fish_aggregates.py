@@ -0,0 +1,85 @@
+# fish_aggregates.py
+"""Số liệu tổng hợp về kho cá của một user, cập nhật O(1) mỗi lần thêm / bớt cá.
+
+DataManager giữ một FishAggregates cạnh index id -> cá (cùng vòng đời: dựng lại khi list
+`fishes` bị thay thế, bỏ khi user bị loại khỏi cache). Bag / profile / giới hạn kho /
+leaderboard đọc từ đây thay vì duyệt lại cả list.
+
+Giá cao nhất: thêm cá là O(1); chỉ khi bán/xoá đúng con đắt nhất mới phải tìm lại (lười,
+ở lần đọc kế tiếp).
+"""
+from __future__ import annotations
+from typing import Any, Dict, Iterable
+
+
+def _price(fish: dict) -> int:
+    try:
+        return int(fish.get("sell_price", 0) or 0)
+    except Exception:
+        return 0
+
+
+class FishAggregates:
+    __slots__ = ("count", "by_rarity", "shiny", "shiny_by_rarity", "value", "_best", "_best_stale")
+
+    def __init__(self, fishes: Iterable[dict] = ()):
+        self.count = 0
+        self.by_rarity: Dict[str, int] = {}
+        self.shiny = 0
+        self.shiny_by_rarity: Dict[str, int] = {}
+        self.value = 0
+        self._best: dict | None = None
+        self._best_stale = False
+        for f in fishes:
+            self.add(f)
+
+    def add(self, fish: dict) -> None:
+        r = fish.get("rarity") or "common"
+        self.count += 1
+        self.by_rarity[r] = self.by_rarity.get(r, 0) + 1
+        if fish.get("shiny"):
+            self.shiny += 1
+            self.shiny_by_rarity[r] = self.shiny_by_rarity.get(r, 0) + 1
+        price = _price(fish)
+        self.value += price
+        if not self._best_stale and (self._best is None or price > _price(self._best)):
+            self._best = fish
+
+    def remove(self, fish: dict) -> None:
+        r = fish.get("rarity") or "common"
+        self.count -= 1
+        left = self.by_rarity.get(r, 0) - 1
+        if left > 0:
+            self.by_rarity[r] = left
+        else:
+            self.by_rarity.pop(r, None)
+        if fish.get("shiny"):
+            self.shiny -= 1
+            left = self.shiny_by_rarity.get(r, 0) - 1
+            if left > 0:
+                self.shiny_by_rarity[r] = left
+            else:
+                self.shiny_by_rarity.pop(r, None)
+        self.value -= _price(fish)
+        if fish is self._best:
+            self._best = None
+            self._best_stale = True
+
+    def best(self, fishes: Iterable[dict]) -> dict | None:
+        """Con cá giá cao nhất; `fishes` (list hiện tại) chỉ được duyệt khi con đắt nhất vừa bị bỏ."""
+        if self._best_stale:
+            self._best = max(fishes, key=_price, default=None)
+            self._best_stale = False
+        return self._best
+
+    def as_dict(self, fishes: Iterable[dict]) -> Dict[str, Any]:
+        best = self.best(fishes)
+        return {
+            "count": self.count,
+            "by_rarity": dict(self.by_rarity),
+            "shiny": self.shiny,
+            "shiny_by_rarity": dict(self.shiny_by_rarity),
+            "value": self.value,
+            "max_price": _price(best) if best else 0,
+            "best": best,
+        }
@@ -0,0 +1,85 @@
+# fish_catalog.py
+"""Danh mục cá dùng chung cho mọi cog, dựng một lần khi import từ game_config.
+
+- SPECIES:          tên cá -> thông tin loài (emoji, rarity, price_per_kg, base_weight, rate,
+                    special, weathers)
+- EMOJI:            tên cá -> emoji (gồm cả cá thời tiết)
+- BY_RARITY:        rarity -> danh sách loài thường (theo thứ tự FISH_POOLS)
+- WEATHER_SPECIALS: weather key -> danh sách cá thời tiết của thời tiết đó
+- SPECIALS:         danh sách cá thời tiết (mỗi (tên, rarity) một lần, kèm các thời tiết có nó)
+
+Các dict/list này dùng chung, chỉ đọc.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List
+
+try:
+    from game_config import FISH_POOLS, WEATHER_CONFIG, PRICE_PER_KG_BY_RARITY, WEIGHT_BY_RARITY
+except Exception:
+    FISH_POOLS = {}
+    WEATHER_CONFIG = {}
+    PRICE_PER_KG_BY_RARITY = {}
+    WEIGHT_BY_RARITY = {}
+
+SPECIES: Dict[str, Dict[str, Any]] = {}
+EMOJI: Dict[str, str] = {}
+BY_RARITY: Dict[str, List[Dict[str, Any]]] = {}
+WEATHER_SPECIALS: Dict[str, List[Dict[str, Any]]] = {}
+SPECIALS: List[Dict[str, Any]] = []
+
+
+def _species(entry: dict, rarity: str, special: bool) -> Dict[str, Any]:
+    if entry.get("base_weight") is not None:
+        base_w = float(entry["base_weight"])
+    else:
+        wmin, wmax = WEIGHT_BY_RARITY.get(rarity, (0.5, 2.0))
+        base_w = (float(wmin) + float(wmax)) / 2.0
+    price = entry.get("price_per_kg")
+    return {
+        "name": entry.get("name", ""),
+        "emoji": entry.get("emoji", ""),
+        "rarity": rarity,
+        "price_per_kg": int(price if price is not None else PRICE_PER_KG_BY_RARITY.get(rarity, 10)),
+        "base_weight": base_w,
+        "rate": float(entry.get("rate", 1)),
+        "special": special,
+        "weathers": [],
+        "chance": entry.get("chance"),
+    }
+
+
+def _build() -> None:
+    for rarity, pool in FISH_POOLS.items():
+        arr = BY_RARITY.setdefault(rarity, [])
+        for f in pool:
+            sp = _species(f, rarity, False)
+            arr.append(sp)
+            SPECIES[sp["name"]] = sp
+    seen: Dict[tuple, Dict[str, Any]] = {}
+    for w_key, w_info in WEATHER_CONFIG.items():
+        lst = WEATHER_SPECIALS.setdefault(w_key, [])
+        for s in w_info.get("special_fish", []) or []:
+            key = (s.get("name"), s.get("rarity"))
+            sp = seen.get(key)
+            if sp is None:
+                sp = seen[key] = _species(s, s.get("rarity"), True)
+                SPECIALS.append(sp)
+            sp["weathers"].append(w_info.get("name", w_key))
+            lst.append(sp)
+            SPECIES.setdefault(sp["name"], sp)
+    # Giống các map cũ: cá thời tiết trùng tên ghi đè emoji của cá thường
+    for sp in SPECIES.values():
+        EMOJI[sp["name"]] = sp["emoji"]
+    for sp in SPECIALS:
+        EMOJI[sp["name"]] = sp["emoji"]
+
+
+def emoji(name: str, default: str = "") -> str:
+    return EMOJI.get(name) or default
+
+
+def species(name: str) -> Dict[str, Any] | None:
+    return SPECIES.get(name)
+
+
+_build()
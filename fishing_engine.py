@@ -0,0 +1,469 @@
+# fishing_engine.py
+"""Bộ máy câu cá: dựng sẵn một lần từ game_config.
+
+- Bảng alias (Vose) cho loài cá trong từng độ hiếm và cho hạng cân → mỗi lần bốc O(1).
+- Bảng độ hiếm phụ thuộc luck nên được tính theo từng giá trị luck và giữ trong một
+  cache LRU có giới hạn (người chơi thường có vài mức luck cố định).
+- `roll()` / `roll_many()` trả về con cá cùng bảng tỉ lệ hiển thị, để lệnh /fish không phải tính lại.
+- `simulate_catches()` mô phỏng hàng triệu lần câu trọn vẹn (loài, cá thời tiết, shiny,
+  hạng cân, giá, gem) bằng NumPy theo lô; không có NumPy thì lặp `roll()`.
+"""
+from __future__ import annotations
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:  # numpy là tuỳ chọn (chỉ dùng cho mô phỏng)
+    np = None
+HAS_NUMPY = np is not None
+
+# Số lần câu mô phỏng trong một lô NumPy (giới hạn bộ nhớ ~ vài trăm MB)
+SIM_CHUNK = 1_000_000
+# z cho khoảng tin cậy 95%
+_Z95 = 1.96
+
+
+class AliasTable:
+    """Bảng alias của Vose: dựng O(n), bốc mẫu O(1) với 2 số ngẫu nhiên."""
+    __slots__ = ("items", "prob", "alias", "n")
+
+    def __init__(self, items: Sequence[Any], weights: Sequence[float]):
+        weights = [max(0.0, float(w)) for w in weights]
+        total = sum(weights)
+        if not items or len(items) != len(weights) or total <= 0:
+            raise ValueError("AliasTable cần danh sách không rỗng với tổng trọng số > 0")
+        n = len(items)
+        self.items = list(items)
+        self.n = n
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
+        scaled = [w * n / total for w in weights]
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s = small.pop()
+            l = large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = (scaled[l] + scaled[s]) - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Phần còn lại (do sai số float) coi như xác suất 1
+        for i in small + large:
+            self.prob[i] = 1.0
+
+    def sample(self, rng=random):
+        i = int(rng.random() * self.n)
+        if i >= self.n:
+            i = self.n - 1
+        return self.items[i] if rng.random() < self.prob[i] else self.items[self.alias[i]]
+
+
+class FishingEngine:
+    """Toàn bộ phần ngẫu nhiên của một lần câu (độ hiếm, loài, shiny, hạng cân, giá)."""
+
+    def __init__(
+        self,
+        fishing_config: Dict[str, Dict[str, float]],
+        fish_pools: Dict[str, List[dict]] | None = None,
+        *,
+        weather_config: Dict[str, dict] | None = None,
+        rarity_display: Dict[str, str] | None = None,
+        weight_class_names: Sequence[str] = ("tiny", "normal", "huge", "gigantic"),
+        weight_class_probs: Dict[str, float] | None = None,
+        weight_class_pct_ranges: Dict[str, Tuple[float, float]] | None = None,
+        weight_by_rarity: Dict[str, Tuple[float, float]] | None = None,
+        price_per_kg_by_rarity: Dict[str, float] | None = None,
+        shiny_base: float = 0.001,
+        shiny_sell_mult: float = 20,
+        special_vs_normal_scale: float = 0.8,
+        gem_settings: Dict[str, Any] | None = None,
+        xp_per_catch: int = 20,
+        cache_size: int = 256,
+    ):
+        self.rarities = list(fishing_config.keys())
+        self._base = [float(fishing_config[r].get("base_weight", 0)) for r in self.rarities]
+        self._factor = [float(fishing_config[r].get("luck_factor", 0)) for r in self.rarities]
+        self.fish_pools = fish_pools or {}
+        self.weather_config = weather_config or {}
+        self.rarity_display = rarity_display or {}
+        self.weight_by_rarity = weight_by_rarity or {}
+        self.price_per_kg_by_rarity = price_per_kg_by_rarity or {}
+        self.weight_class_pct_ranges = weight_class_pct_ranges or {
+            "tiny": (0.5, 0.7), "normal": (0.9, 1.1), "huge": (1.5, 2.5), "gigantic": (5.0, 7.0),
+        }
+        self.shiny_base = float(shiny_base)
+        self.shiny_sell_mult = float(shiny_sell_mult)
+        self.special_vs_normal_scale = float(special_vs_normal_scale)
+        self.gem_settings = gem_settings or {}
+        self.xp_per_catch = int(xp_per_catch)
+
+        # Loài cá theo độ hiếm (trọng số 'rate')
+        self._species: Dict[str, AliasTable] = {}
+        for r, pool in self.fish_pools.items():
+            try:
+                self._species[r] = AliasTable(pool, [f.get("rate", 1) for f in pool])
+            except ValueError:
+                continue
+
+        # Hạng cân
+        probs = weight_class_probs or {}
+        names = list(weight_class_names)
+        try:
+            self._weight_classes = AliasTable(names, [probs.get(n, 0) for n in names])
+        except ValueError:
+            self._weight_classes = AliasTable(names, [1] * len(names))
+
+        # Cá thời tiết: {weather_key: {rarity: [(special, chance)]}}
+        self._specials: Dict[str, Dict[str, List[Tuple[dict, float]]]] = {}
+        for w_key, w_info in self.weather_config.items():
+            by_rarity: Dict[str, List[Tuple[dict, float]]] = {}
+            for s in w_info.get("special_fish", []) or []:
+                r = s.get("rarity")
+                avg_normal = 1.0 / max(1, len(self.fish_pools.get(r, [])))
+                specified = s.get("chance")
+                if specified is None:
+                    chance = avg_normal * self.special_vs_normal_scale
+                else:
+                    chance = min(float(specified), avg_normal * 0.95)
+                by_rarity.setdefault(r, []).append((s, chance))
+            self._specials[w_key] = by_rarity
+
+        self.cache_size = max(1, int(cache_size))
+        self._rarity_cache: "OrderedDict[float, Tuple[AliasTable, Dict[str, float]]]" = OrderedDict()
+
+    @classmethod
+    def from_config(cls, cfg=None) -> "FishingEngine":
+        """Dựng engine từ module game_config (thiếu hằng số nào thì dùng mặc định)."""
+        if cfg is None:
+            try:
+                import game_config as cfg
+            except Exception:
+                cfg = None
+        g = lambda name, default=None: getattr(cfg, name, default) if cfg is not None else default
+        return cls(
+            g("FISHING_CONFIG", {}) or {"common": {"base_weight": 1, "luck_factor": 0}},
+            g("FISH_POOLS", {}),
+            weather_config=g("WEATHER_CONFIG", {}),
+            rarity_display=g("RARITY_DISPLAY", {}),
+            weight_class_names=g("WEIGHT_CLASS_NAMES", ("tiny", "normal", "huge", "gigantic")),
+            weight_class_probs=g("WEIGHT_CLASS_PROBS", {"tiny": 0.15, "normal": 0.60, "huge": 0.23, "gigantic": 0.02}),
+            weight_class_pct_ranges=g("WEIGHT_CLASS_PCT_RANGES"),
+            weight_by_rarity=g("WEIGHT_BY_RARITY", {}),
+            price_per_kg_by_rarity=g("PRICE_PER_KG_BY_RARITY", {}),
+            shiny_base=g("SHINY_BASE", 0.001),
+            shiny_sell_mult=g("SHINY_SELL_MULT", 20),
+            special_vs_normal_scale=g("SPECIAL_VS_NORMAL_SCALE", 0.8),
+            gem_settings=g("GEM_SETTINGS", {}),
+            xp_per_catch=g("XP_PER_CATCH", 20),
+            cache_size=g("RARITY_TABLE_CACHE_SIZE", 256),
+        )
+
+    # ===== Độ hiếm theo luck =====
+    def rarity_weights(self, luck: float) -> List[float]:
+        # Công thức: Weight_Cuối = Base * (1 + (Luck * Factor / 100))
+        return [max(0.0, b * (1 + (luck * f / 100.0))) for b, f in zip(self._base, self._factor)]
+
+    def rarity_table(self, luck: float) -> Tuple[AliasTable, Dict[str, float]]:
+        """(bảng alias, % hiển thị theo độ hiếm) cho một mức luck; có cache LRU."""
+        key = round(float(luck), 6)
+        hit = self._rarity_cache.get(key)
+        if hit is not None:
+            self._rarity_cache.move_to_end(key)
+            return hit
+        weights = self.rarity_weights(key)
+        total = sum(weights)
+        table = AliasTable(self.rarities, weights)
+        perc = {r: (w / total) * 100 for r, w in zip(self.rarities, weights)}
+        self._rarity_cache[key] = (table, perc)
+        if len(self._rarity_cache) > self.cache_size:
+            self._rarity_cache.popitem(last=False)
+        return table, perc
+
+    def odds(self, luck: float) -> Dict[str, float]:
+        return self.rarity_table(luck)[1]
+
+    # ===== Loài & hạng cân =====
+    def pick_species(self, rarity: str, rng=random) -> dict:
+        table = self._species.get(rarity)
+        if table is None:
+            # placeholder nếu không có định nghĩa cá cho bậc rarity
+            return {
+                "name": f"{self.rarity_display.get(rarity, rarity.title())} Fish",
+                "emoji": "",
+                "price_per_kg": self.price_per_kg_by_rarity.get(rarity, 10),
+                "rate": 1,
+            }
+        return table.sample(rng)
+
+    def pick_weight_class(self, rng=random) -> str:
+        return self._weight_classes.sample(rng)
+
+    def pick_special(self, weather_key: str | None, rarity: str, rng=random) -> dict | None:
+        for s, chance in self._specials.get(weather_key, {}).get(rarity, ()):
+            if rng.random() < chance:
+                return s
+        return None
+
+    # ===== Một lần câu =====
+    def roll(self, luck: float, weather_key: str | None = None, weight_mult: float = 1.0, rng=random) -> Tuple[dict, Dict[str, float]]:
+        """Bốc một con cá. Trả về (fish_obj, % độ hiếm hiển thị).
+
+        fish_obj có dạng được lưu trong `fishes` (chưa có 'id') kèm thêm key 'emoji'
+        để hiển thị; `weight_mult` là hệ số cân nặng của người chơi (item/pet/cần)."""
+        table, perc = self.rarity_table(luck)
+        buff = (self.weather_config.get(weather_key, {}) or {}).get("buff", {}) or {}
+        return self._roll_one(table, buff, weather_key, weight_mult, rng), perc
+
+    def roll_many(self, luck: float, n: int, weather_key: str | None = None, weight_mult: float = 1.0,
+                  rng=random) -> Tuple[list, Dict[str, float]]:
+        """Bốc `n` con cá trong một lần gọi (câu nhiều lần). Mỗi con được bốc độc lập với
+        đúng tỉ lệ của `roll`; bảng alias và buff thời tiết chỉ tra một lần cho cả lượt."""
+        table, perc = self.rarity_table(luck)
+        buff = (self.weather_config.get(weather_key, {}) or {}).get("buff", {}) or {}
+        fishes = [self._roll_one(table, buff, weather_key, weight_mult, rng) for _ in range(max(0, int(n)))]
+        return fishes, perc
+
+    def _roll_one(self, table: AliasTable, buff: dict, weather_key: str | None, weight_mult: float, rng) -> dict:
+        rarity = table.sample(rng)
+        special = self.pick_special(weather_key, rarity, rng)
+        shiny = False
+        if special is not None:
+            source = special  # cá thời tiết không có shiny
+        else:
+            source = self.pick_species(rarity, rng)
+            shiny_chance = self.shiny_base * float(source.get("shiny_mult", 1.0)) * float(buff.get("shiny_mult", 1))
+            shiny = rng.random() < shiny_chance
+
+        wc = self.pick_weight_class(rng)
+        if source.get("base_weight") is not None:
+            base_w = float(source["base_weight"])
+        else:
+            wmin, wmax = self.weight_by_rarity.get(rarity, (0.5, 2.0))
+            base_w = (float(wmin) + float(wmax)) / 2.0
+        pmin, pmax = self.weight_class_pct_ranges.get(wc, (0.9, 1.1))
+        weight = round(base_w * (pmin + (pmax - pmin) * rng.random()), 2)
+        weight = round(weight * float(buff.get("weight_mult", 1.0)) * float(weight_mult), 2)
+
+        price_per_kg = source.get("price_per_kg")
+        if price_per_kg is None:
+            price_per_kg = self.price_per_kg_by_rarity.get(rarity, 10)
+        sell_price = int(price_per_kg * weight * (self.shiny_sell_mult if shiny else 1))
+
+        return {
+            "name": source.get("name"),
+            "emoji": source.get("emoji", ""),
+            "rarity": rarity,
+            "weight": weight,
+            "weight_class": wc,
+            "price_per_kg": price_per_kg,
+            "sell_price": sell_price,
+            "caught_at": int(time.time()),
+            "shiny": bool(shiny),
+        }
+
+    def simulate(self, luck: float, trials: int, rng=random) -> Dict[str, int]:
+        """Đếm số lần ra từng độ hiếm sau `trials` lần bốc."""
+        table = self.rarity_table(luck)[0]
+        counts = {r: 0 for r in self.rarities}
+        sample = table.sample
+        for _ in range(int(trials)):
+            counts[sample(rng)] += 1
+        return counts
+
+    # ===== Mô phỏng trọn vẹn (NumPy) =====
+    def gem_mult(self, weather_key: str | None) -> int:
+        # Giống /fish: buff 'gem_mult' của thời tiết, mặc định GEM_SETTINGS['aurora_multiplier']
+        buff = (self.weather_config.get(weather_key, {}) or {}).get("buff", {}) or {}
+        return int(buff.get("gem_mult", self.gem_settings.get("aurora_multiplier", 1)))
+
+    def _species_arrays(self, weather_key: str | None):
+        """Bảng loài dạng mảng cho mô phỏng: mỗi độ hiếm → (chỉ số loài, prob, alias) và
+        danh sách cá thời tiết (chỉ số loài, chance); cùng các thuộc tính theo loài."""
+        names, rar, base_w, ppk, shiny_mult, special = [], [], [], [], [], []
+
+        def add(entry: dict, rarity: str, is_special: bool) -> int:
+            names.append(entry.get("name"))
+            rar.append(rarity)
+            if entry.get("base_weight") is not None:
+                base_w.append(float(entry["base_weight"]))
+            else:
+                wmin, wmax = self.weight_by_rarity.get(rarity, (0.5, 2.0))
+                base_w.append((float(wmin) + float(wmax)) / 2.0)
+            price = entry.get("price_per_kg")
+            ppk.append(float(price if price is not None else self.price_per_kg_by_rarity.get(rarity, 10)))
+            shiny_mult.append(0.0 if is_special else float(entry.get("shiny_mult", 1.0)))
+            special.append(is_special)
+            return len(names) - 1
+
+        pools = {}
+        for r in self.rarities:
+            table = self._species.get(r)
+            if table is None:
+                idx = [add(self.pick_species(r), r, False)]
+                pools[r] = (np.asarray(idx), np.ones(1), np.zeros(1, dtype=np.int64))
+            else:
+                idx = [add(f, r, False) for f in table.items]
+                pools[r] = (np.asarray(idx), np.asarray(table.prob), np.asarray(table.alias, dtype=np.int64))
+        specials = {
+            r: [(add(sp, r, True), chance) for sp, chance in lst]
+            for r, lst in self._specials.get(weather_key, {}).items()
+        }
+        attrs = {
+            "names": names, "rarity": rar,
+            "base_w": np.asarray(base_w), "ppk": np.asarray(ppk), "shiny_mult": np.asarray(shiny_mult),
+        }
+        return pools, specials, attrs
+
+    @staticmethod
+    def _np_alias(gen, prob, alias, size):
+        i = gen.integers(0, len(prob), size=size)
+        return np.where(gen.random(size) < prob[i], i, alias[i])
+
+    def simulate_catches(
+        self,
+        luck: float,
+        trials: int,
+        weather_key: str | None = None,
+        weight_mult: float = 1.0,
+        xp_flat: int = 0,
+        seed: int | None = None,
+    ) -> Dict[str, Any]:
+        """Mô phỏng `trials` lần câu thành công với đầy đủ luật của /fish.
+
+        Trả về tần suất theo độ hiếm / loài (kèm khoảng tin cậy 95%), số shiny và kỳ vọng
+        coins (giá bán) / gems / XP mỗi lần câu. Không đụng cache của engine nên gọi được
+        từ thread khác (run_in_executor)."""
+        trials = max(1, int(trials))
+        if np is None:
+            return self._simulate_catches_py(luck, trials, weather_key, weight_mult, xp_flat, seed)
+
+        gen = np.random.default_rng(seed)
+        rarity_table = AliasTable(self.rarities, self.rarity_weights(float(luck)))
+        r_prob = np.asarray(rarity_table.prob)
+        r_alias = np.asarray(rarity_table.alias, dtype=np.int64)
+        pools, specials, attrs = self._species_arrays(weather_key)
+        wc_names = list(self._weight_classes.items)
+        wc_prob = np.asarray(self._weight_classes.prob)
+        wc_alias = np.asarray(self._weight_classes.alias, dtype=np.int64)
+        wc_lo = np.asarray([float(self.weight_class_pct_ranges.get(n, (0.9, 1.1))[0]) for n in wc_names])
+        wc_hi = np.asarray([float(self.weight_class_pct_ranges.get(n, (0.9, 1.1))[1]) for n in wc_names])
+        buff = (self.weather_config.get(weather_key, {}) or {}).get("buff", {}) or {}
+        w_mult = float(buff.get("weight_mult", 1.0)) * float(weight_mult)
+        shiny_p = self.shiny_base * float(buff.get("shiny_mult", 1)) * attrs["shiny_mult"]
+        gp = self.gem_settings.get("gem_per_rarity", {}) if isinstance(self.gem_settings, dict) else {}
+        gems_by_rarity = np.asarray([int(gp.get(r, 0)) * self.gem_mult(weather_key) for r in self.rarities], dtype=np.int64)
+
+        n_sp = len(attrs["names"])
+        rarity_counts = np.zeros(len(self.rarities), dtype=np.int64)
+        species_counts = np.zeros(n_sp, dtype=np.int64)
+        shiny_total = 0
+        coin_sum = coin_sq = 0.0
+        gem_sum = gem_sq = 0.0
+
+        done = 0
+        while done < trials:
+            size = min(SIM_CHUNK, trials - done)
+            done += size
+            r_idx = self._np_alias(gen, r_prob, r_alias, size)
+            sp = np.empty(size, dtype=np.int64)
+            for ri, r in enumerate(self.rarities):
+                rows = np.flatnonzero(r_idx == ri)
+                if rows.size == 0:
+                    continue
+                # Cá thời tiết được thử lần lượt trước, giống `pick_special`
+                free = np.ones(rows.size, dtype=bool)
+                for sp_idx, chance in specials.get(r, ()):
+                    hit = free & (gen.random(rows.size) < chance)
+                    sp[rows[hit]] = sp_idx
+                    free &= ~hit
+                rows = rows[free]
+                if rows.size:
+                    idx, prob, alias = pools[r]
+                    sp[rows] = idx[self._np_alias(gen, prob, alias, rows.size)]
+
+            shiny = gen.random(size) < shiny_p[sp]
+            wc = self._np_alias(gen, wc_prob, wc_alias, size)
+            pct = wc_lo[wc] + (wc_hi[wc] - wc_lo[wc]) * gen.random(size)
+            weight = np.round(np.round(attrs["base_w"][sp] * pct, 2) * w_mult, 2)
+            coins = np.floor(attrs["ppk"][sp] * weight * np.where(shiny, self.shiny_sell_mult, 1.0))
+            gems = gems_by_rarity[r_idx]
+
+            rarity_counts += np.bincount(r_idx, minlength=len(self.rarities))
+            species_counts += np.bincount(sp, minlength=n_sp)
+            shiny_total += int(shiny.sum())
+            coin_sum += float(coins.sum())
+            coin_sq += float(np.square(coins).sum())
+            gem_sum += float(gems.sum())
+            gem_sq += float(np.square(gems, dtype=np.float64).sum())
+
+        species: Dict[str, int] = {}
+        for i, name in enumerate(attrs["names"]):
+            if species_counts[i]:
+                species[name] = species.get(name, 0) + int(species_counts[i])
+        return self._sim_report(
+            luck, trials, weather_key,
+            {r: int(c) for r, c in zip(self.rarities, rarity_counts)}, species, shiny_total,
+            (coin_sum, coin_sq), (gem_sum, gem_sq), xp_flat,
+        )
+
+    def _simulate_catches_py(self, luck, trials, weather_key, weight_mult, xp_flat, seed):
+        # Dự phòng khi không có NumPy: lặp roll() (chậm, nên dùng số lần nhỏ)
+        rng = random.Random(seed)
+        gp = self.gem_settings.get("gem_per_rarity", {}) if isinstance(self.gem_settings, dict) else {}
+        gm = self.gem_mult(weather_key)
+        rarity_counts = {r: 0 for r in self.rarities}
+        species: Dict[str, int] = {}
+        shiny_total = 0
+        coin_sum = coin_sq = gem_sum = gem_sq = 0.0
+        for _ in range(trials):
+            fish, _ = self.roll(luck, weather_key, weight_mult, rng)
+            rarity_counts[fish["rarity"]] += 1
+            species[fish["name"]] = species.get(fish["name"], 0) + 1
+            shiny_total += fish["shiny"]
+            gems = int(gp.get(fish["rarity"], 0)) * gm
+            coin_sum += fish["sell_price"]
+            coin_sq += fish["sell_price"] ** 2
+            gem_sum += gems
+            gem_sq += gems * gems
+        return self._sim_report(luck, trials, weather_key, rarity_counts, species, shiny_total,
+                                (coin_sum, coin_sq), (gem_sum, gem_sq), xp_flat)
+
+    def _sim_report(self, luck, trials, weather_key, rarity_counts, species, shiny_total, coins, gems, xp_flat):
+        def prop(c: int) -> Tuple[int, float, float, float]:
+            p = c / trials
+            half = _Z95 * math.sqrt(max(p * (1 - p), 0.0) / trials)
+            return c, p, max(0.0, p - half), min(1.0, p + half)
+
+        def mean(sums: Tuple[float, float]) -> Tuple[float, float, float]:
+            total, sq = sums
+            m = total / trials
+            var = max(sq / trials - m * m, 0.0) * trials / max(1, trials - 1)
+            half = _Z95 * math.sqrt(var / trials)
+            return m, m - half, m + half
+
+        return {
+            "trials": trials,
+            "luck": float(luck),
+            "weather": weather_key,
+            "rarity": {r: prop(c) for r, c in rarity_counts.items()},
+            "species": {n: prop(c) for n, c in sorted(species.items(), key=lambda kv: -kv[1])},
+            "shiny": prop(int(shiny_total)),
+            "coins": mean(coins),
+            "gems": mean(gems),
+            "xp": float(self.xp_per_catch + int(xp_flat)),
+        }
+
+
+_ENGINE: FishingEngine | None = None
+
+
+def get_engine() -> FishingEngine:
+    """Engine dùng chung cho cả bot (dựng lần đầu khi được gọi)."""
+    global _ENGINE
+    if _ENGINE is None:
+        _ENGINE = FishingEngine.from_config()
+    return _ENGINE
@@ -1,16 +1,16 @@
-from flask import Flask
-from threading import Thread
-
-app = Flask('')
-
-@app.route('/')
-def home():
-    return "Bot đang chạy ngon lành!"
-
-def run():
-    # Chạy server ở port 8080 (port chuẩn của Replit)
-    app.run(host='0.0.0.0', port=8080)
-
-def keep_alive():
-    t = Thread(target=run)
-    t.start()
+from flask import Flask
+from threading import Thread
+
+app = Flask('')
+
+@app.route('/')
+def home():
+    return "Bot đang chạy ngon lành!"
+
+def run():
+    # Chạy server ở port 8080 (port chuẩn của Replit)
+    app.run(host='0.0.0.0', port=8080)
+
+def keep_alive():
+    t = Thread(target=run)
+    t.start()
@@ -0,0 +1,274 @@
+# leaderboard.py
+"""Bảng xếp hạng giữ sẵn trong RAM, cập nhật dần theo từng lần ghi.
+
+Mỗi bảng là một skip list có độ rộng (indexable skip list) sắp theo điểm giảm dần:
+thêm / xoá / "tôi hạng mấy" O(log n), lấy top-k hoặc một đoạn quanh hạng r là
+O(log n + k). DataManager gọi `touch()` sau mỗi lần ghi (chỉ các bảng có field bị đổi)
+và `seed()` một lần khi khởi động.
+
+Bảng có sẵn (BOARDS):
+- wallet: số coins trong ví
+- gems:   số gem
+- level:  (level, xp)
+- fish:   giá bán của con cá đắt nhất đang giữ (kèm tên + độ hiếm)
+"""
+from __future__ import annotations
+import random
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+MAX_LEVEL = 24
+_P = 0.25
+
+
+class _Node:
+    __slots__ = ("key", "nexts", "widths")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.nexts: List[_Node | None] = [None] * level
+        # widths[i] = số bước ở tầng 0 từ node này tới nexts[i] (None = cuối danh sách)
+        self.widths = [1] * level
+
+
+class SortedIndex:
+    """Skip list có độ rộng: tập khoá có thứ tự, truy cập theo hạng (bắt đầu từ 1)."""
+
+    def __init__(self, rng: random.Random | None = None):
+        self._head = _Node(None, MAX_LEVEL)
+        self._len = 0
+        self._rng = rng or random.Random()
+
+    def __len__(self) -> int:
+        return self._len
+
+    def _random_level(self) -> int:
+        lvl = 1
+        while lvl < MAX_LEVEL and self._rng.random() < _P:
+            lvl += 1
+        return lvl
+
+    def insert(self, key) -> None:
+        update: List[_Node] = [self._head] * MAX_LEVEL
+        ranks = [0] * MAX_LEVEL
+        x, pos = self._head, 0
+        for i in range(MAX_LEVEL - 1, -1, -1):
+            nxt = x.nexts[i]
+            while nxt is not None and nxt.key < key:
+                pos += x.widths[i]
+                x, nxt = nxt, nxt.nexts[i]
+            update[i], ranks[i] = x, pos
+        lvl = self._random_level()
+        node = _Node(key, lvl)
+        new_pos = ranks[0] + 1
+        for i in range(lvl):
+            prev = update[i]
+            node.nexts[i] = prev.nexts[i]
+            prev.nexts[i] = node
+            node.widths[i] = ranks[i] + prev.widths[i] + 1 - new_pos
+            prev.widths[i] = new_pos - ranks[i]
+        for i in range(lvl, MAX_LEVEL):
+            update[i].widths[i] += 1
+        self._len += 1
+
+    def remove(self, key) -> bool:
+        update: List[_Node] = [self._head] * MAX_LEVEL
+        x = self._head
+        for i in range(MAX_LEVEL - 1, -1, -1):
+            nxt = x.nexts[i]
+            while nxt is not None and nxt.key < key:
+                x, nxt = nxt, nxt.nexts[i]
+            update[i] = x
+        node = x.nexts[0]
+        if node is None or node.key != key:
+            return False
+        for i in range(MAX_LEVEL):
+            prev = update[i]
+            if i < len(node.nexts) and prev.nexts[i] is node:
+                prev.widths[i] += node.widths[i] - 1
+                prev.nexts[i] = node.nexts[i]
+            else:
+                prev.widths[i] -= 1
+        self._len -= 1
+        return True
+
+    def rank(self, key) -> int | None:
+        """Hạng (1 = đầu bảng) của `key`, None nếu không có."""
+        x, pos = self._head, 0
+        for i in range(MAX_LEVEL - 1, -1, -1):
+            nxt = x.nexts[i]
+            while nxt is not None and nxt.key < key:
+                pos += x.widths[i]
+                x, nxt = nxt, nxt.nexts[i]
+        node = x.nexts[0]
+        return pos + 1 if node is not None and node.key == key else None
+
+    def slice(self, start: int, count: int) -> List[Any]:
+        """`count` khoá bắt đầu từ hạng `start` (1-based)."""
+        start = max(1, int(start))
+        if count <= 0 or start > self._len:
+            return []
+        x, pos = self._head, 0
+        for i in range(MAX_LEVEL - 1, -1, -1):
+            while x.nexts[i] is not None and pos + x.widths[i] <= start:
+                pos += x.widths[i]
+                x = x.nexts[i]
+        out = []
+        while x is not None and len(out) < count:
+            out.append(x.key)
+            x = x.nexts[0]
+        return out
+
+
+def _neg(score):
+    return tuple(-s for s in score) if isinstance(score, tuple) else -score
+
+
+class Leaderboard:
+    """Một bảng xếp hạng: user -> điểm (+ thông tin hiển thị), hạng theo điểm giảm dần."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._index = SortedIndex()
+        self._keys: Dict[str, tuple] = {}
+        self._extra: Dict[str, Any] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def set(self, uid: str, score, extra: Any = None) -> None:
+        """Đặt điểm của `uid`; score None thì bỏ user khỏi bảng."""
+        if score is None:
+            self.discard(uid)
+            return
+        key = (_neg(score), uid)
+        old = self._keys.get(uid)
+        if old != key:
+            if old is not None:
+                self._index.remove(old)
+            self._index.insert(key)
+            self._keys[uid] = key
+        self._extra[uid] = extra
+
+    def discard(self, uid: str) -> None:
+        old = self._keys.pop(uid, None)
+        if old is not None:
+            self._index.remove(old)
+        self._extra.pop(uid, None)
+
+    def _row(self, key: tuple, rank: int) -> Tuple[int, str, Any, Any]:
+        uid = key[1]
+        return rank, uid, _neg(key[0]), self._extra.get(uid)
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[int, str, Any, Any]]:
+        """Các dòng (hạng, uid, điểm, extra) từ hạng offset+1, tối đa k dòng."""
+        start = int(offset) + 1
+        return [self._row(key, start + i) for i, key in enumerate(self._index.slice(start, k))]
+
+    def rank(self, uid: str) -> int | None:
+        key = self._keys.get(uid)
+        return None if key is None else self._index.rank(key)
+
+    def around(self, uid: str, radius: int = 2) -> Tuple[int | None, List[Tuple[int, str, Any, Any]]]:
+        """Hạng của `uid` và các dòng lân cận (±radius)."""
+        r = self.rank(uid)
+        if r is None:
+            return None, []
+        start = max(1, r - radius)
+        return r, self.top(r + radius - start + 1, start - 1)
+
+
+# ---------- Điểm của từng bảng ----------
+def _int(doc: dict, field: str) -> int:
+    try:
+        return int(doc.get(field, 0) or 0)
+    except Exception:
+        return 0
+
+
+def _score_counter(field: str) -> Callable[..., Tuple[Any, Any]]:
+    def score(doc: dict, best_fish=None):
+        val = _int(doc, field)
+        return (val if val > 0 else None), None
+    return score
+
+
+def _score_level(doc: dict, best_fish=None):
+    level, xp = max(1, _int(doc, "level") or 1), _int(doc, "xp")
+    if level <= 1 and xp <= 0:
+        return None, None
+    return (level, xp), None
+
+
+def _max_fish(uid: str, doc: dict) -> dict | None:
+    fishes = doc.get("fishes") or []
+    if not isinstance(fishes, list):
+        return None
+    return max(fishes, key=lambda f: f.get("sell_price", 0) or 0, default=None)
+
+
+def _score_best_fish(doc: dict, best_fish: Callable[[], dict | None] | None = None):
+    best = best_fish() if best_fish is not None else _max_fish("", doc)
+    if not best:
+        return None, None
+    price = int(best.get("sell_price", 0) or 0)
+    if price <= 0:
+        return None, None
+    return price, (best.get("name", "Unknown Fish"), best.get("rarity", ""))
+
+
+# tên bảng -> (các field của document ảnh hưởng tới điểm, hàm tính điểm(doc, best_fish))
+BOARDS: Dict[str, Tuple[Tuple[str, ...], Callable[..., Tuple[Any, Any]]]] = {
+    "wallet": (("wallet",), _score_counter("wallet")),
+    "gems": (("gems",), _score_counter("gems")),
+    "level": (("level", "xp"), _score_level),
+    "fish": (("fishes",), _score_best_fish),
+}
+
+
+class Leaderboards:
+    """Tập các bảng xếp hạng của DataManager (xem BOARDS).
+
+    `best_fish(uid, doc)` trả về con cá đắt nhất của user; DataManager truyền vào hàm đọc
+    từ số liệu tổng hợp của nó để bảng "fish" không phải duyệt lại cả list mỗi lần ghi.
+    """
+
+    def __init__(self, best_fish: Callable[[str, dict], dict | None] | None = None):
+        self.boards: Dict[str, Leaderboard] = {name: Leaderboard(name) for name in BOARDS}
+        self._best_fish = best_fish or _max_fish
+
+    def __getitem__(self, name: str) -> Leaderboard:
+        return self.boards[name]
+
+    def touch(self, uid: str, doc: dict | None, fields: Iterable[str] | None = None) -> None:
+        """Cập nhật điểm của `uid` từ `doc` cho các bảng phụ thuộc `fields` (None = mọi bảng)."""
+        if doc is None:
+            return
+        wanted = None if fields is None else set(fields)
+        for name, (deps, score) in BOARDS.items():
+            if wanted is not None and wanted.isdisjoint(deps):
+                continue
+            val, extra = score(doc, lambda: self._best_fish(uid, doc))
+            self.boards[name].set(uid, val, extra)
+
+    def remove(self, uid: str) -> None:
+        for board in self.boards.values():
+            board.discard(uid)
+
+    def seed(self, docs: Iterable[Tuple[str, dict]]) -> int:
+        n = 0
+        for uid, doc in docs:
+            self.touch(uid, doc)
+            n += 1
+        return n
+
+    def top(self, name: str, k: int, offset: int = 0):
+        return self.boards[name].top(k, offset)
+
+    def rank(self, name: str, uid) -> int | None:
+        return self.boards[name].rank(str(uid))
+
+    def around(self, name: str, uid, radius: int = 2):
+        return self.boards[name].around(str(uid), radius)
+
+    def size(self, name: str) -> int:
+        return len(self.boards[name])
@@ -0,0 +1,151 @@
+# record_book.py
+"""Sổ kỷ lục: top-K con cá nặng nhất và đắt nhất từng câu được, theo từng loài + toàn server.
+
+Mỗi bảng là một min-heap kích thước K (đỉnh = kỷ lục yếu nhất), nên một lần câu chỉ tốn
+O(log K) và thường chỉ là một phép so sánh với đỉnh heap. Bảng nào đổi thì được đánh dấu
+và ghi lại (cả document của loài đó) vào collection `records`; đọc /records là O(K) và
+không đụng tới document user.
+"""
+from __future__ import annotations
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from storage import StorageBackend
+
+try:
+    from game_config import RECORD_BOOK_SIZE
+except Exception:
+    RECORD_BOOK_SIZE = 10
+
+try:
+    from fish_catalog import SPECIES
+except Exception:
+    SPECIES = {}
+
+COLLECTION = "records"
+GLOBAL_KEY = "__global__"
+# metric -> field của con cá dùng để xếp hạng
+METRICS = {"weight": "weight", "value": "sell_price"}
+
+_seq = itertools.count()
+
+
+def _entry(user_id, fish: dict, weather: str | None) -> Dict[str, Any]:
+    return {
+        "uid": str(user_id),
+        "name": fish.get("name"),
+        "rarity": fish.get("rarity"),
+        "weight": float(fish.get("weight", 0) or 0),
+        "sell_price": int(fish.get("sell_price", 0) or 0),
+        "shiny": bool(fish.get("shiny")),
+        "weather": weather,
+        "caught_at": int(fish.get("caught_at") or time.time()),
+    }
+
+
+class _TopK:
+    """Min-heap giữ K mục lớn nhất theo `field`; bằng nhau thì mục câu trước được giữ."""
+    __slots__ = ("field", "size", "heap")
+
+    def __init__(self, field: str, size: int):
+        self.field = field
+        self.size = size
+        self.heap: List[Tuple[float, int, int, dict]] = []
+
+    def _key(self, entry: dict) -> Tuple[float, int, int, dict]:
+        return (entry.get(self.field, 0) or 0, -int(entry.get("caught_at", 0)), next(_seq), entry)
+
+    def offer(self, entry: dict) -> bool:
+        key = self._key(entry)
+        if len(self.heap) < self.size:
+            heapq.heappush(self.heap, key)
+            return True
+        if key[:2] <= self.heap[0][:2]:
+            return False
+        heapq.heapreplace(self.heap, key)
+        return True
+
+    def best(self) -> dict | None:
+        return max(self.heap, key=lambda k: k[:2])[3] if self.heap else None
+
+    def sorted(self) -> List[dict]:
+        return [k[3] for k in sorted(self.heap, key=lambda k: k[:2], reverse=True)]
+
+
+class RecordBook:
+    def __init__(self, store: StorageBackend, size: int = RECORD_BOOK_SIZE):
+        self.store = store
+        self.size = max(1, int(size))
+        self._tables: Dict[str, Dict[str, _TopK]] = {}
+        self._dirty: set = set()
+        self._flush_lock = asyncio.Lock()
+
+    def _table(self, key: str) -> Dict[str, _TopK]:
+        t = self._tables.get(key)
+        if t is None:
+            t = self._tables[key] = {m: _TopK(field, self.size) for m, field in METRICS.items()}
+        return t
+
+    # ---------- Load / persist ----------
+    async def load(self) -> int:
+        n = 0
+        async for doc in self.store.iter_docs(COLLECTION):
+            table = self._table(doc["_id"])
+            for metric, top in table.items():
+                for entry in doc.get(metric, []) or []:
+                    top.offer(entry)
+            n += 1
+        return n
+
+    def _doc_update(self, key: str) -> Dict[str, Dict[str, Any]]:
+        table = self._table(key)
+        return {"$set": {m: top.sorted() for m, top in table.items()}}
+
+    async def flush(self) -> int:
+        """Ghi các bảng đã đổi (mỗi loài một document). Nội dung lấy tại thời điểm ghi nên
+        các lần flush nối tiếp nhau luôn để lại bản mới nhất."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+            keys, self._dirty = self._dirty, set()
+            try:
+                return await self.store.bulk_update(COLLECTION, [(k, self._doc_update(k)) for k in keys])
+            except Exception:
+                self._dirty |= keys
+                raise
+
+    # ---------- Ghi nhận ----------
+    def offer(self, user_id, fish: dict, weather: str | None = None) -> List[Tuple[str, str, bool]]:
+        """Đưa một con cá vào sổ; trả về các bảng (loài, metric, đứng đầu?) mà nó lọt vào top-K."""
+        name = fish.get("name")
+        if not name or (SPECIES and name not in SPECIES):
+            return []
+        entry = _entry(user_id, fish, weather)
+        broken = []
+        for key in (name, GLOBAL_KEY):
+            table = self._table(key)
+            for metric, top in table.items():
+                if top.offer(entry):
+                    broken.append((key, metric, top.best() is entry))
+                    self._dirty.add(key)
+        return broken
+
+    async def record_catches(self, user_id, fishes: Iterable[dict], weather: str | None = None) -> List[Tuple[str, str, bool]]:
+        broken = []
+        for fish in fishes:
+            broken += self.offer(user_id, fish, weather)
+        if self._dirty:
+            await self.flush()
+        return broken
+
+    # ---------- Đọc ----------
+    def top(self, species: str | None, metric: str) -> List[dict]:
+        """Kỷ lục của một loài (None = toàn server) theo 'weight' hoặc 'value'."""
+        table = self._tables.get(species or GLOBAL_KEY)
+        return table[metric].sorted() if table else []
+
+    def species(self) -> List[str]:
+        return sorted(k for k in self._tables if k != GLOBAL_KEY)
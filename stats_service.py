@@ -0,0 +1,149 @@
+# stats_service.py
+"""Chỉ số hiệu lực của người chơi (cần câu + item trang bị + pet đang dùng + thời tiết).
+
+Vector chỉ số được tính một lần rồi giữ trong RAM; DataManager báo `invalidate(uid)` khi
+trang bị / pet đang dùng / cấp cần thay đổi (hoặc document user được nạp lại). Phần cộng
+buff thời tiết được cache theo từng weather key nên đổi thời tiết không cần báo gì.
+Lúc câu cá chỉ còn một lần tra dict.
+
+Các dict trả về được dùng chung giữa các lần gọi: chỉ đọc, không sửa.
+"""
+from __future__ import annotations
+from typing import Any, Dict
+
+try:
+    from game_config import ROD_TIERS, BASE_CHALLENGE, BASE_LUCK, WEATHER_CONFIG
+except Exception:
+    ROD_TIERS = {1: {"name": "Cần Tre", "cost": 0, "bonus": 0, "len_add": 0, "timeout_sub": 0.0}}
+    BASE_CHALLENGE = {"len_min": 4, "len_max": 5, "timeout": 5.0}
+    BASE_LUCK = 1
+    WEATHER_CONFIG = {}
+
+try:
+    from game_items import ITEMS as GAME_ITEMS
+except Exception:
+    GAME_ITEMS = {}
+
+try:
+    from game_pets import PETS as GAME_PETS
+except Exception:
+    GAME_PETS = {}
+
+# Các field của document user mà vector chỉ số phụ thuộc vào
+STAT_FIELDS = ("equipped_items", "active_pets", "rod_level")
+
+# Timeout tối thiểu của thử thách câu cá (giây)
+MIN_TIMEOUT = 1.5
+
+
+def _f(v, default=0.0) -> float:
+    try:
+        return float(v)
+    except Exception:
+        return default
+
+
+class StatsService:
+    def __init__(self, dm):
+        self._dm = dm
+        self._base: Dict[str, Dict[str, Any]] = {}
+        self._effective: Dict[str, Dict[str | None, Dict[str, Any]]] = {}
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    # ---------- Invalidation ----------
+    def invalidate(self, user_id) -> None:
+        uid = str(user_id)
+        if self._base.pop(uid, None) is not None:
+            self._stats["invalidations"] += 1
+        self._effective.pop(uid, None)
+
+    def clear(self) -> None:
+        self._base.clear()
+        self._effective.clear()
+
+    def cache_stats(self) -> Dict[str, int]:
+        return dict(self._stats, cached=len(self._base))
+
+    # ---------- Lookup ----------
+    def base(self, user_id) -> Dict[str, Any]:
+        """Chỉ số từ cần + item + pet (chưa có thời tiết)."""
+        uid = str(user_id)
+        vec = self._base.get(uid)
+        if vec is not None:
+            self._stats["hits"] += 1
+            return vec
+        self._stats["misses"] += 1
+        vec = self._compute_base(uid)
+        # Chỉ cache khi user đang nằm trong cache của DataManager (chế độ lazy có thể chưa nạp)
+        if uid in self._dm._users_cache:
+            self._base[uid] = vec
+        return vec
+
+    def get(self, user_id, weather_key: str | None = None) -> Dict[str, Any]:
+        """Chỉ số hiệu lực khi câu cá dưới thời tiết `weather_key`."""
+        uid = str(user_id)
+        per_weather = self._effective.get(uid)
+        if per_weather is not None and weather_key in per_weather:
+            self._stats["hits"] += 1
+            return per_weather[weather_key]
+        base = self.base(uid)
+        buff = (WEATHER_CONFIG.get(weather_key, {}) or {}).get("buff", {}) or {}
+        vec = dict(base)
+        vec["weather"] = weather_key
+        vec["luck"] = base["luck"] + _f(buff.get("luck", 0))
+        vec["weather_weight_mult"] = _f(buff.get("weight_mult", 1.0), 1.0)
+        vec["shiny_mult"] = _f(buff.get("shiny_mult", 1), 1.0)
+        vec["gem_mult"] = buff.get("gem_mult")
+        if uid in self._base:
+            self._effective.setdefault(uid, {})[weather_key] = vec
+        return vec
+
+    # ---------- Computation ----------
+    def _compute_base(self, uid: str) -> Dict[str, Any]:
+        dm = self._dm
+        return compute_stats(dm.get_rod_level(uid), dm.get_equipped_items(uid), dm.get_active_pets(uid))
+
+
+def compute_stats(rod_level: int, equipped=(), active_pets=()) -> Dict[str, Any]:
+    """Vector chỉ số từ cấp cần + item trang bị + pet đang dùng (chưa có thời tiết)."""
+    tier = ROD_TIERS.get(rod_level, ROD_TIERS.get(1, {}))
+
+    luck = float(BASE_LUCK) + _f(tier.get("luck", 0))
+    weight_mult = 1.0
+    timeout_add = 0.0
+    len_sub = 0
+    xp_flat = 0
+    extra_slot = 0
+    if _f(tier.get("weight_mult", 0)) > 0:
+        weight_mult *= _f(tier.get("weight_mult"))
+
+    sources = [GAME_ITEMS.get(it, {}) for it in equipped]
+    sources += [GAME_PETS.get(pid, {}) for pid in active_pets]
+    for src in sources:
+        buffs = src.get("buffs", {}) if src else {}
+        if not buffs:
+            continue
+        luck += _f(buffs.get("luck", 0))
+        timeout_add += _f(buffs.get("timeout_add", 0.0))
+        len_sub += int(buffs.get("len_sub", 0))
+        xp_flat += int(buffs.get("xp_flat", 0))
+        extra_slot += int(buffs.get("extra_slot", 0))
+        wm = _f(buffs.get("weight_mult", 0))
+        if wm > 0:
+            weight_mult *= wm
+
+    len_add = max(0, int(tier.get("len_add", 0)) - len_sub)
+    timeout = max(MIN_TIMEOUT, float(BASE_CHALLENGE["timeout"]) - _f(tier.get("timeout_sub", 0.0)) + timeout_add)
+    return {
+        "rod_level": rod_level,
+        "rod_name": tier.get("name", f"Lv.{rod_level}"),
+        "luck": luck,
+        "weight_mult": weight_mult,
+        "timeout_add": timeout_add,
+        "len_sub": len_sub,
+        "xp_flat": xp_flat,
+        "extra_slot": extra_slot,
+        "len_min": int(BASE_CHALLENGE["len_min"]) + len_add,
+        "len_max": int(BASE_CHALLENGE["len_max"]) + len_add,
+        "timeout": timeout,
+    }
@@ -0,0 +1,443 @@
+# storage.py
+"""Các storage backend cho DataManager: Mongo (Motor), SQLite cục bộ và file JSON.
+
+DataManager chỉ nói chuyện với backend qua vài thao tác theo document `_id`
+(đọc toàn bộ, đọc một, update kiểu Mongo, ghi hàng loạt) nên có thể chạy
+toàn bộ bot mà không cần Mongo (deploy nhỏ, CI, benchmark).
+
+Chọn backend bằng biến môi trường DATA_BACKEND=mongo|sqlite|json.
+"""
+from __future__ import annotations
+import asyncio
+import copy
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Tuple
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from pymongo import UpdateOne
+except ImportError:
+    AsyncIOMotorClient = None
+    UpdateOne = None
+
+
+# ---------- Mongo-style update helpers (dùng chung cho các backend không phải Mongo) ----------
+def get_path(doc: Any, path: str) -> Any:
+    """Đọc giá trị theo dotted path (vd: 'inventory.common.Cá rô', 'fishes.0.id')."""
+    cur: Any = doc
+    for part in path.split("."):
+        if isinstance(cur, dict):
+            cur = cur.get(part)
+        elif isinstance(cur, list) and part.isdigit():
+            idx = int(part)
+            cur = cur[idx] if idx < len(cur) else None
+        else:
+            return None
+    return cur
+
+
+def set_path(doc: dict, path: str, value: Any) -> None:
+    parts = path.split(".")
+    cur: Any = doc
+    for part in parts[:-1]:
+        if isinstance(cur, list) and part.isdigit():
+            cur = cur[int(part)]
+            continue
+        nxt = cur.get(part)
+        if not isinstance(nxt, (dict, list)):
+            nxt = cur[part] = {}
+        cur = nxt
+    last = parts[-1]
+    if isinstance(cur, list) and last.isdigit():
+        cur[int(last)] = value
+    else:
+        cur[last] = value
+
+
+def unset_path(doc: dict, path: str) -> None:
+    parts = path.split(".")
+    parent = get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+    if isinstance(parent, dict):
+        parent.pop(parts[-1], None)
+
+
+_MISSING = object()
+
+
+def _cmp(value: Any, op: str, arg: Any) -> bool:
+    if op == "$exists":
+        return (value is not _MISSING) == bool(arg)
+    if value is _MISSING:
+        return op == "$ne"
+    if op == "$in":
+        return value in arg
+    if op == "$ne":
+        return value != arg
+    try:
+        if op == "$gte":
+            return value >= arg
+        if op == "$gt":
+            return value > arg
+        if op == "$lte":
+            return value <= arg
+        if op == "$lt":
+            return value < arg
+    except TypeError:
+        return False
+    raise ValueError(f"Toán tử không hỗ trợ: {op}")
+
+
+def match_value(value: Any, cond: Any) -> bool:
+    """So khớp một giá trị với điều kiện: giá trị trực tiếp, `{"$op": ...}` hoặc dict điều kiện theo field."""
+    if isinstance(cond, dict) and cond:
+        if all(k.startswith("$") for k in cond):
+            return all(_cmp(value, op, arg) for op, arg in cond.items())
+        if not isinstance(value, dict):
+            return False
+        return all(match_value(value.get(k, _MISSING), v) for k, v in cond.items())
+    return value == cond
+
+
+def match_filter(doc: dict, where: Dict[str, Any] | None) -> bool:
+    """Kiểm tra document có thoả filter kiểu Mongo (dotted path -> điều kiện) hay không."""
+    if not where:
+        return True
+    for path, cond in where.items():
+        value = get_path(doc, path)
+        if value is None and not _path_exists(doc, path):
+            value = _MISSING
+        if not match_value(value, cond):
+            return False
+    return True
+
+
+def _path_exists(doc: dict, path: str) -> bool:
+    parts = path.split(".")
+    parent = get_path(doc, ".".join(parts[:-1])) if len(parts) > 1 else doc
+    if isinstance(parent, dict):
+        return parts[-1] in parent
+    if isinstance(parent, list) and parts[-1].isdigit():
+        return int(parts[-1]) < len(parent)
+    return False
+
+
+def apply_update(doc: dict, update: Dict[str, Dict[str, Any]]) -> dict:
+    """Áp một update kiểu Mongo ($set/$unset/$inc/$push[$each]/$pull) lên document (tại chỗ)."""
+    for op, fields in update.items():
+        for path, value in fields.items():
+            if op == "$set":
+                set_path(doc, path, copy.deepcopy(value))
+            elif op == "$unset":
+                unset_path(doc, path)
+            elif op == "$inc":
+                set_path(doc, path, (get_path(doc, path) or 0) + value)
+            elif op == "$push":
+                lst = get_path(doc, path)
+                if not isinstance(lst, list):
+                    lst = []
+                    set_path(doc, path, lst)
+                if isinstance(value, dict) and "$each" in value:
+                    lst.extend(copy.deepcopy(value["$each"]))
+                else:
+                    lst.append(copy.deepcopy(value))
+            elif op == "$pull":
+                lst = get_path(doc, path)
+                if isinstance(lst, list):
+                    lst[:] = [e for e in lst if not match_value(e, value)]
+            else:
+                raise ValueError(f"Toán tử update không hỗ trợ: {op}")
+    return doc
+
+
+# ---------- Interface ----------
+class StorageBackend:
+    """Giao diện chung. Mỗi collection là tập document có khoá `_id` dạng chuỗi."""
+    name = "base"
+
+    async def iter_docs(self, coll: str) -> AsyncIterator[dict]:
+        raise NotImplementedError
+        yield  # pragma: no cover
+
+    async def find_one(self, coll: str, _id: str) -> dict | None:
+        raise NotImplementedError
+
+    async def find_modified_since(self, coll: str, ts: float) -> AsyncIterator[dict]:
+        """Các document có `updated_at` > `ts` (mặc định: lọc khi duyệt toàn bộ)."""
+        async for doc in self.iter_docs(coll):
+            if float(doc.get("updated_at") or 0) > ts:
+                yield doc
+
+    async def update_one(self, coll: str, _id: str, update: Dict[str, Dict[str, Any]], *,
+                         where: Dict[str, Any] | None = None, upsert: bool = True) -> bool:
+        """Áp `update` cho document `_id`. Nếu có `where` mà document không thoả thì không ghi
+        (và không upsert). Trả về True nếu đã ghi."""
+        raise NotImplementedError
+
+    async def bulk_update(self, coll: str, ops: Iterable[Tuple[str, Dict[str, Dict[str, Any]]]]) -> int:
+        """Ghi nhiều update (upsert) trong một lượt. Trả về số update đã gửi."""
+        n = 0
+        for _id, update in ops:
+            await self.update_one(coll, _id, update)
+            n += 1
+        return n
+
+    async def close(self) -> None:
+        pass
+
+
+# ---------- Mongo (Motor) ----------
+class MongoBackend(StorageBackend):
+    name = "mongo"
+
+    def __init__(self, uri: str | None = None, db_name: str = "fishing_bot"):
+        if AsyncIOMotorClient is None:
+            raise ImportError("❌ Thư viện 'motor' chưa được cài đặt. Hãy chạy lệnh: pip install motor dnspython")
+        # Lấy URI từ biến môi trường hoặc dùng localhost nếu test máy nhà
+        self.uri = uri or os.getenv("MONGO_URI", "mongodb://localhost:27017")
+        self.client = AsyncIOMotorClient(self.uri)
+        self.db = self.client[db_name]
+
+    async def iter_docs(self, coll: str) -> AsyncIterator[dict]:
+        async for doc in self.db[coll].find():
+            yield doc
+
+    async def find_one(self, coll: str, _id: str) -> dict | None:
+        return await self.db[coll].find_one({"_id": _id})
+
+    async def find_modified_since(self, coll: str, ts: float) -> AsyncIterator[dict]:
+        await self.db[coll].create_index("updated_at")  # idempotent
+        async for doc in self.db[coll].find({"updated_at": {"$gt": ts}}):
+            yield doc
+
+    async def update_one(self, coll, _id, update, *, where=None, upsert=True) -> bool:
+        flt = {"_id": _id}
+        if where:
+            flt.update(where)
+            upsert = False  # upsert với filter điều kiện sẽ tạo document trùng _id
+        res = await self.db[coll].update_one(flt, update, upsert=upsert)
+        return bool(res.matched_count or getattr(res, "upserted_id", None))
+
+    async def bulk_update(self, coll, ops) -> int:
+        requests = [UpdateOne({"_id": _id}, update, upsert=True) for _id, update in ops]
+        if requests:
+            await self.db[coll].bulk_write(requests, ordered=False)
+        return len(requests)
+
+    async def close(self) -> None:
+        self.client.close()
+
+
+# ---------- SQLite ----------
+class SqliteBackend(StorageBackend):
+    """Mỗi collection là một bảng `(_id TEXT PRIMARY KEY, doc TEXT)` chứa JSON.
+    Chạy ở chế độ WAL; mọi truy cập đi qua một thread riêng để không chặn event loop,
+    và `bulk_update` ghi cả lô trong MỘT transaction.
+    """
+    name = "sqlite"
+
+    def __init__(self, path: Path | str):
+        self.path = str(path)
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-store")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._tables: set[str] = set()
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _table(self, coll: str) -> str:
+        if not coll.isidentifier():
+            raise ValueError(f"Tên collection không hợp lệ: {coll!r}")
+        if coll not in self._tables:
+            self._conn.execute(f"CREATE TABLE IF NOT EXISTS {coll} (_id TEXT PRIMARY KEY, doc TEXT NOT NULL)")
+            self._tables.add(coll)
+        return coll
+
+    def _load(self, table: str, _id: str) -> dict | None:
+        row = self._conn.execute(f"SELECT doc FROM {table} WHERE _id = ?", (_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _apply(self, table: str, _id: str, update, where, upsert) -> bool:
+        doc = self._load(table, _id)
+        if doc is None:
+            if where or not upsert:
+                return False
+            doc = {"_id": _id}
+        elif not match_filter(doc, where):
+            return False
+        apply_update(doc, update)
+        self._conn.execute(
+            f"INSERT OR REPLACE INTO {table} (_id, doc) VALUES (?, ?)",
+            (_id, json.dumps(doc, ensure_ascii=False)),
+        )
+        return True
+
+    def _all_sync(self, coll: str) -> list[dict]:
+        table = self._table(coll)
+        return [json.loads(r[0]) for r in self._conn.execute(f"SELECT doc FROM {table}")]
+
+    def _find_sync(self, coll: str, _id: str) -> dict | None:
+        return self._load(self._table(coll), _id)
+
+    def _update_sync(self, coll, _id, update, where, upsert) -> bool:
+        table = self._table(coll)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            ok = self._apply(table, _id, update, where, upsert)
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return ok
+
+    def _bulk_sync(self, coll, ops) -> int:
+        table = self._table(coll)
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for _id, update in ops:
+                self._apply(table, _id, update, None, True)
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        return len(ops)
+
+    async def iter_docs(self, coll: str) -> AsyncIterator[dict]:
+        for doc in await self._run(self._all_sync, coll):
+            yield doc
+
+    async def find_one(self, coll, _id):
+        return await self._run(self._find_sync, coll, _id)
+
+    async def update_one(self, coll, _id, update, *, where=None, upsert=True) -> bool:
+        return await self._run(self._update_sync, coll, _id, update, where, upsert)
+
+    async def bulk_update(self, coll, ops) -> int:
+        return await self._run(self._bulk_sync, coll, list(ops))
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
+
+
+# ---------- JSON file ----------
+class JsonFileBackend(StorageBackend):
+    """Giữ toàn bộ dữ liệu trong RAM và lưu ra file JSON dạng `{"USERS": {...}, "GUILDS": {...}}`
+    (đọc được file data/fishing_data.json cũ). File được ghi nguyên tử (tmp + replace)
+    và gộp nhiều lần ghi liên tiếp trong `save_delay` giây thành một lần lưu.
+    """
+    name = "json"
+
+    def __init__(self, path: Path | str, save_delay: float = 1.0):
+        self.path = Path(path)
+        self.save_delay = float(save_delay)
+        self._data: Dict[str, Dict[str, dict]] = {}
+        self._save_task: asyncio.Task | None = None
+        self._dirty = False
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                raw = json.load(f) or {}
+            for key, docs in raw.items():
+                if isinstance(docs, dict):
+                    self._data[key.lower()] = {
+                        str(_id): {**doc, "_id": str(_id)} for _id, doc in docs.items() if isinstance(doc, dict)
+                    }
+
+    def _coll(self, coll: str) -> Dict[str, dict]:
+        return self._data.setdefault(coll, {})
+
+    async def iter_docs(self, coll: str) -> AsyncIterator[dict]:
+        for doc in list(self._coll(coll).values()):
+            yield copy.deepcopy(doc)
+
+    async def find_one(self, coll, _id):
+        doc = self._coll(coll).get(_id)
+        return copy.deepcopy(doc) if doc is not None else None
+
+    async def update_one(self, coll, _id, update, *, where=None, upsert=True) -> bool:
+        docs = self._coll(coll)
+        doc = docs.get(_id)
+        if doc is None:
+            if where or not upsert:
+                return False
+            doc = {"_id": _id}
+        elif not match_filter(doc, where):
+            return False
+        # Áp lên bản sao để update lỗi giữa chừng không để lại document dở dang
+        new_doc = apply_update(copy.deepcopy(doc), update)
+        docs[_id] = new_doc
+        self._schedule_save()
+        return True
+
+    async def bulk_update(self, coll, ops) -> int:
+        n = 0
+        for _id, update in ops:
+            await self.update_one(coll, _id, update)
+            n += 1
+        return n
+
+    def _schedule_save(self) -> None:
+        self._dirty = True
+        if self._save_task is None or self._save_task.done():
+            self._save_task = asyncio.ensure_future(self._delayed_save())
+
+    async def _delayed_save(self) -> None:
+        while self._dirty:
+            await asyncio.sleep(self.save_delay)
+            self._dirty = False
+            try:
+                await self.save()
+            except Exception as e:
+                print(f"⚠️ Lỗi khi lưu {self.path} (sẽ thử lại): {e}")
+                self._dirty = True
+
+    def _dump(self) -> str:
+        out = {
+            coll.upper(): {_id: {k: v for k, v in doc.items() if k != "_id"} for _id, doc in docs.items()}
+            for coll, docs in self._data.items()
+        }
+        return json.dumps(out, ensure_ascii=False, indent=2)
+
+    def _write(self, text: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    async def save(self) -> None:
+        """Lưu ngay toàn bộ dữ liệu ra file (nguyên tử)."""
+        text = self._dump()
+        await asyncio.get_running_loop().run_in_executor(None, self._write, text)
+
+    async def close(self) -> None:
+        task, self._save_task = self._save_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.save()
+
+
+def open_backend(data_file: Path | str | None, kind: str | None = None) -> StorageBackend:
+    """Tạo backend theo `kind` hoặc biến môi trường DATA_BACKEND.
+    Mặc định dùng Mongo nếu đã cài motor, ngược lại dùng file JSON.
+    """
+    kind = (kind or os.getenv("DATA_BACKEND") or ("mongo" if AsyncIOMotorClient is not None else "json")).lower()
+    if kind == "mongo":
+        return MongoBackend()
+    base = Path(data_file) if data_file else Path("data") / "fishing_data.json"
+    if kind == "sqlite":
+        return SqliteBackend(os.getenv("DATA_SQLITE_PATH") or base.with_suffix(".sqlite3"))
+    if kind == "json":
+        return JsonFileBackend(os.getenv("DATA_JSON_PATH") or base, float(os.getenv("DATA_JSON_SAVE_DELAY", 1.0)))
+    raise ValueError(f"DATA_BACKEND không hợp lệ: {kind!r} (mongo|sqlite|json)")
@@ -1,2 +1,2 @@
-
+
         log.warning("Chưa có Cog nào được load.")
\ No newline at end of file
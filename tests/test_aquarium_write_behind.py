@@ -0,0 +1,36 @@
+# tests/test_aquarium_write_behind.py
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager  # noqa: E402
+from storage import JsonFileBackend  # noqa: E402
+
+
+def _open(path):
+    return DataManager(path, backend=JsonFileBackend(path, save_delay=0), write_behind=True,
+                       lazy_users=False, snapshot=False, coherence="none")
+
+
+def test_add_then_remove_before_flush_deletes_key(tmp_path):
+    path = tmp_path / "data.json"
+
+    async def run():
+        d = _open(path)
+        await d.initialize()
+        await d.add_caught_fishes(1, [{"name": "A", "rarity": "rare", "sell_price": 1000, "weight": 1.0}])
+        fish = d.get_fish_objects(1)[0]
+        await d.add_to_aquarium(1, fish)
+        assert await d.remove_from_aquarium(1, fish["id"])
+        await d.close()
+
+        d2 = _open(path)
+        await d2.initialize()
+        assert d2.get_aquarium(1) == {}
+        pending, rate = d2.get_aquarium_income(1)
+        assert rate == 0.0
+        await d2.close()
+
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+# tests/test_buy_eggs_write_behind.py
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_manager import DataManager  # noqa: E402
+from storage import JsonFileBackend  # noqa: E402
+
+
+def _open(path):
+    return DataManager(path, backend=JsonFileBackend(path, save_delay=0), write_behind=True,
+                       lazy_users=False, snapshot=False, coherence="none")
+
+
+def _ids(eggs):
+    return sorted(e["id"] for e in eggs)
+
+
+def test_buy_eggs_after_pending_set_does_not_duplicate(tmp_path):
+    path = tmp_path / "data.json"
+
+    async def run():
+        d = _open(path)
+        await d.initialize()
+        await d.add_money(1, 100)
+        await d.add_egg(1, {"id": "a", "tier": "common", "hatch_at": 0})
+        await d.add_egg(1, {"id": "b", "tier": "common", "hatch_at": 0})
+        # `$set eggs` đang chờ ghi, trỏ tới list trong cache
+        assert await d.remove_egg(1, "a")
+        assert await d.buy_eggs(1, [{"id": "c", "tier": "common", "hatch_at": 0}], coins=30)
+        assert _ids(d.get_eggs(1)) == ["b", "c"]
+        assert d.get_balance(1) == 70
+        await d.close()
+
+        d2 = _open(path)
+        await d2.initialize()
+        assert _ids(d2.get_eggs(1)) == ["b", "c"]
+        assert d2.get_balance(1) == 70
+        await d2.close()
+
+    asyncio.run(run())
+
+
+def test_buy_eggs_without_funds_leaves_cache_untouched(tmp_path):
+    path = tmp_path / "data.json"
+
+    async def run():
+        d = _open(path)
+        await d.initialize()
+        await d.add_money(1, 10)
+        assert not await d.buy_eggs(1, [{"id": "c", "tier": "common", "hatch_at": 0}], coins=30)
+        assert d.get_eggs(1) == []
+        assert d.get_balance(1) == 10
+        await d.close()
+
+    asyncio.run(run())
@@ -0,0 +1,72 @@
+# tests/test_stale_writes.py
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coherence import LocalBus, LocalHub, StaleWriteError  # noqa: E402
+from data_manager import DataManager  # noqa: E402
+from storage import JsonFileBackend  # noqa: E402
+
+
+def _open(path, store, hub, write_behind):
+    return DataManager(path, backend=store, write_behind=write_behind, lazy_users=False,
+                       snapshot=False, coherence=LocalBus(hub))
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_flush_rejects_stale_set_and_reloads(tmp_path):
+    path = tmp_path / "data.json"
+
+    async def run():
+        store, hub = JsonFileBackend(path, save_delay=0), LocalHub()
+        a = _open(path, store, hub, write_behind=True)
+        b = _open(path, store, hub, write_behind=False)
+        await a.initialize()
+        await b.initialize()
+        await b.set_money(1, 10)
+        await _settle()
+        assert a.get_balance(1) == 10
+
+        await a.set_money(1, 50)   # chờ ghi, dựa trên version cũ
+        await b.set_money(1, 20)   # process khác ghi trước
+        await _settle()
+        assert await a.flush() == 0
+
+        assert (await store.find_one("users", "1"))["wallet"] == 20
+        assert a.get_balance(1) == 20
+        assert "1" not in a._pending
+
+    asyncio.run(run())
+
+
+def test_stale_txn_keeps_reloaded_cache(tmp_path):
+    path = tmp_path / "data.json"
+
+    async def run():
+        store, hub = JsonFileBackend(path, save_delay=0), LocalHub()
+        a = _open(path, store, hub, write_behind=False)
+        b = _open(path, store, hub, write_behind=False)
+        await a.initialize()
+        await b.initialize()
+        await a.set_money(1, 10)
+        await _settle()
+        # b sửa user mà a chưa kịp nhận sự kiện
+        b.bus, bus = None, b.bus
+        await b.set_money(1, 70)
+        b.bus = bus
+
+        with pytest.raises(StaleWriteError):
+            async with a.user_txn(1) as u:
+                u.set("wallet", 30)
+        assert a.get_balance(1) == 70
+        assert a.leaderboards.top("wallet", 1)[0][2] == 70
+
+    asyncio.run(run())
@@ -0,0 +1,32 @@
+# tests/test_weather.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from weather import MAX_LOOKAHEAD_BLOCKS, WeatherTimeline  # noqa: E402
+
+SINGLE = {
+    "sunny": {"rate": 1.0, "duration": 300},
+    "rain": {"rate": 0.0, "duration": 120},
+}
+
+
+def test_single_weather_does_not_hang():
+    tl = WeatherTimeline(SINGLE, seed="test")
+    t = 1_000_000.0
+    assert tl.current(t=t)[0] == "sunny"
+    end = tl.end_time(t=t)
+    assert t < end <= t + MAX_LOOKAHEAD_BLOCKS * tl.block
+    segs = tl.forecast(count=3, t=t)
+    assert len(segs) == 4
+    assert all(w == "sunny" for _, _, w in segs)
+    assert all(a[1] == b[0] for a, b in zip(segs, segs[1:]))
+
+
+def test_forecast_is_contiguous():
+    config = {"sunny": {"rate": 0.5, "duration": 300}, "rain": {"rate": 0.5, "duration": 120}}
+    tl = WeatherTimeline(config, seed="test")
+    segs = tl.forecast(count=10, t=5_000_000.0)
+    assert len(segs) == 11
+    assert all(a[1] == b[0] for a, b in zip(segs, segs[1:]))
@@ -0,0 +1,134 @@
+# user_resolver.py
+"""Tra tên người dùng Discord cho các bảng hiển thị nhiều user (leaderboard, ...).
+
+- Mention (`<@id>`) không cần gọi API: dùng `mention()` / `mentions()` khi chỉ cần vậy.
+- Tên hiển thị: cache TTL id -> tên; user bot đã biết (bot.get_user) lấy ngay, phần còn
+  lại gọi `fetch_user` song song bằng `asyncio.gather` với số request đồng thời giới hạn
+  bởi một Semaphore. User không tồn tại cũng được cache (None) để không hỏi lại.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, Tuple
+
+try:
+    import discord
+except Exception:  # cho phép import khi chạy công cụ ngoài bot
+    discord = None
+
+
+class UserResolver:
+    def __init__(self, bot, *, ttl: float = 600.0, concurrency: int = 5, max_size: int = 10000):
+        self.bot = bot
+        self.ttl = float(ttl)
+        self.max_size = max(1, int(max_size))
+        self._sem = asyncio.Semaphore(max(1, int(concurrency)))
+        # id -> (hết hạn lúc, tên hoặc None nếu user không tồn tại)
+        self._cache: "OrderedDict[int, Tuple[float, str | None]]" = OrderedDict()
+        self._inflight: Dict[int, asyncio.Future] = {}
+        self._stats = {"hits": 0, "local": 0, "fetched": 0, "not_found": 0, "errors": 0}
+
+    # ---------- Mention (không gọi API) ----------
+    @staticmethod
+    def mention(user_id: int) -> str:
+        return f"<@{int(user_id)}>"
+
+    def mentions(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        return {int(uid): self.mention(uid) for uid in user_ids}
+
+    # ---------- Tên hiển thị ----------
+    def _cached(self, uid: int):
+        ent = self._cache.get(uid)
+        if ent is None:
+            return False, None
+        if ent[0] < time.monotonic():
+            del self._cache[uid]
+            return False, None
+        self._cache.move_to_end(uid)
+        return True, ent[1]
+
+    def _store(self, uid: int, name: str | None) -> None:
+        self._cache[uid] = (time.monotonic() + self.ttl, name)
+        self._cache.move_to_end(uid)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, uid: int) -> str | None:
+        async with self._sem:
+            try:
+                user = await self.bot.fetch_user(uid)
+            except Exception as e:
+                if discord is not None and isinstance(e, discord.NotFound):
+                    self._stats["not_found"] += 1
+                    self._store(uid, None)
+                else:
+                    # Lỗi mạng / rate limit: không cache, lần sau thử lại
+                    self._stats["errors"] += 1
+                return None
+        self._stats["fetched"] += 1
+        name = getattr(user, "display_name", None) or getattr(user, "name", str(uid))
+        self._store(uid, name)
+        return name
+
+    async def _fetch_shared(self, uid: int) -> str | None:
+        # Nhiều lệnh cùng hỏi một user đang được fetch → dùng chung một request
+        fut = self._inflight.get(uid)
+        if fut is None:
+            fut = self._inflight[uid] = asyncio.ensure_future(self._fetch(uid))
+            fut.add_done_callback(lambda _f, uid=uid: self._inflight.pop(uid, None))
+        return await asyncio.shield(fut)
+
+    async def names(self, user_ids: Iterable[int]) -> Dict[int, str | None]:
+        """id -> tên hiển thị (None nếu user không tồn tại / không tra được)."""
+        out: Dict[int, str | None] = {}
+        missing = []
+        for raw in user_ids:
+            uid = int(raw)
+            if uid in out:
+                continue
+            hit, name = self._cached(uid)
+            if hit:
+                self._stats["hits"] += 1
+                out[uid] = name
+                continue
+            user = self.bot.get_user(uid)
+            if user is not None:
+                self._stats["local"] += 1
+                out[uid] = user.display_name
+                self._store(uid, out[uid])
+                continue
+            missing.append(uid)
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch_shared(uid) for uid in missing))
+            out.update(zip(missing, fetched))
+        return out
+
+    async def labels(self, user_ids: Iterable[int]) -> Dict[int, str]:
+        """Nhãn để hiển thị trong embed: mention nếu bot biết user (client hiển thị được),
+        còn lại tên đậm tra qua API; user không tồn tại thành `<Unknown User id>`.
+        Mọi user thiếu được tra cùng lúc, nên cả bảng chỉ tốn tối đa một đợt request."""
+        ids = [int(uid) for uid in user_ids]
+        out: Dict[int, str] = {}
+        unknown = []
+        for uid in ids:
+            if self.bot.get_user(uid) is not None:
+                out[uid] = self.mention(uid)
+            else:
+                unknown.append(uid)
+        if unknown:
+            for uid, name in (await self.names(unknown)).items():
+                if name:
+                    out[uid] = f"**{name}**"
+                elif uid in self._cache:
+                    out[uid] = f"<Unknown User {uid}>"
+                else:
+                    # Tra lỗi tạm thời (mạng / rate limit): vẫn hiển thị mention
+                    out[uid] = self.mention(uid)
+        return out
+
+    def invalidate(self, user_id: int) -> None:
+        self._cache.pop(int(user_id), None)
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self._stats, cached=len(self._cache))
@@ -0,0 +1,163 @@
+# weather.py
+"""Dòng thời gian thời tiết tất định, tính lười từ thời gian thực.
+
+Trục thời gian được chia thành các block dài `block` giây (mặc định = BCNN các `duration`
+trong WEATHER_CONFIG). Mỗi block tự sinh chuỗi thời tiết của nó bằng một RNG seed theo
+hash(seed, scope, số block): chọn thời tiết theo `rate`, giữ trong `duration` của nó, lần
+lượt cho tới hết block (thời tiết cuối bị cắt ở biên block). Không có task nền: mọi
+process cùng seed tính ra cùng thời tiết, thời điểm kết thúc và dự báo; tra một thời điểm
+chỉ cần sinh lại một block (vài lần bốc, có cache LRU).
+
+`scope` là "global" hoặc id guild (khi bật thời tiết theo guild) — thêm guild không tốn
+gì ngoài một key trong hash.
+"""
+from __future__ import annotations
+import hashlib
+import math
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+try:
+    from game_config import WEATHER_CONFIG
+except Exception:
+    WEATHER_CONFIG = {}
+
+try:
+    from game_config import WEATHER_SEED, WEATHER_PER_GUILD
+except Exception:
+    WEATHER_SEED = "weather"
+    WEATHER_PER_GUILD = False
+
+# (start, end, weather_key) — thời điểm tính bằng giây epoch
+Segment = Tuple[float, float, str]
+
+GLOBAL_SCOPE = "global"
+# Block dài nhất khi BCNN các duration quá lớn (tránh sinh quá nhiều đoạn mỗi block)
+MAX_BLOCK = 6 * 3600
+# Một thời tiết kéo dài quá số block này thì vẫn trả về (cắt ở biên block) — ví dụ khi
+# chỉ một thời tiết có rate > 0 thì thời tiết không bao giờ đổi
+MAX_LOOKAHEAD_BLOCKS = 4
+
+
+class WeatherTimeline:
+    def __init__(self, config: Dict[str, dict] | None = None, seed: Any = WEATHER_SEED, *,
+                 per_guild: bool = WEATHER_PER_GUILD, block: int | None = None, cache_size: int = 512):
+        self.config = WEATHER_CONFIG if config is None else config
+        self.seed = str(seed)
+        self.per_guild = bool(per_guild)
+        self._keys = [k for k, v in self.config.items() if float(v.get("rate", 0)) > 0]
+        self._rates = [float(self.config[k].get("rate", 0)) for k in self._keys]
+        self._durations = {k: max(1, int(self.config[k].get("duration", 60))) for k in self._keys}
+        if block is None:
+            block = 1
+            for d in self._durations.values():
+                block = block * d // math.gcd(block, d)
+            if block > MAX_BLOCK:
+                block = max(self._durations.values(), default=60)
+        self.block = max(1, int(block))
+        self.cache_size = max(1, int(cache_size))
+        self._cache: "OrderedDict[Tuple[str, int], List[Segment]]" = OrderedDict()
+
+    # ---------- Scope ----------
+    def scope(self, guild_id=None) -> str:
+        if self.per_guild and guild_id:
+            return str(int(guild_id))
+        return GLOBAL_SCOPE
+
+    # ---------- Block ----------
+    def _rng(self, scope: str, index: int) -> random.Random:
+        # hashlib (không dùng hash() vì bị random hoá theo process)
+        digest = hashlib.blake2b(f"{self.seed}:{scope}:{index}".encode(), digest_size=8).digest()
+        return random.Random(int.from_bytes(digest, "big"))
+
+    def segments(self, scope: str, index: int) -> List[Segment]:
+        """Chuỗi thời tiết của block `index` (đã gộp các đoạn liền nhau cùng thời tiết)."""
+        key = (scope, index)
+        segs = self._cache.get(key)
+        if segs is not None:
+            self._cache.move_to_end(key)
+            return segs
+        start = index * self.block
+        end = start + self.block
+        segs = []
+        if self._keys:
+            rng = self._rng(scope, index)
+            t = start
+            while t < end:
+                w = rng.choices(self._keys, weights=self._rates, k=1)[0]
+                t_end = min(end, t + self._durations[w])
+                if segs and segs[-1][2] == w:
+                    segs[-1] = (segs[-1][0], t_end, w)
+                else:
+                    segs.append((t, t_end, w))
+                t = t_end
+        self._cache[key] = segs
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return segs
+
+    def _iter_from(self, scope: str, t: float):
+        """Các đoạn thời tiết bắt đầu từ đoạn chứa `t`, gộp qua cả biên block
+        (tối đa MAX_LOOKAHEAD_BLOCKS block cho một đoạn)."""
+        index = int(t // self.block)
+        pending: Segment | None = None
+        blocks = 0
+        while True:
+            for seg in self.segments(scope, index):
+                if seg[1] <= t:
+                    continue
+                if pending is None:
+                    pending, blocks = seg, 0
+                elif pending[2] == seg[2]:
+                    pending = (pending[0], seg[1], seg[2])
+                else:
+                    yield pending
+                    pending, blocks = seg, 0
+            index += 1
+            if pending is not None:
+                blocks += 1
+                if blocks >= MAX_LOOKAHEAD_BLOCKS:
+                    yield pending
+                    pending = None
+
+    # ---------- Tra cứu ----------
+    def at(self, t: float | None = None, guild_id=None) -> Segment | None:
+        """Đoạn thời tiết đang diễn ra tại `t` (mặc định: bây giờ); None nếu không cấu hình."""
+        if not self._keys:
+            return None
+        t = time.time() if t is None else float(t)
+        return next(self._iter_from(self.scope(guild_id), t))
+
+    def current(self, guild_id=None, t: float | None = None) -> Tuple[str | None, Dict[str, Any]]:
+        seg = self.at(t, guild_id)
+        if seg is None:
+            return None, {}
+        return seg[2], self.config.get(seg[2], {})
+
+    def end_time(self, guild_id=None, t: float | None = None) -> float:
+        seg = self.at(t, guild_id)
+        return seg[1] if seg is not None else 0.0
+
+    def forecast(self, guild_id=None, count: int = 5, t: float | None = None) -> List[Segment]:
+        """Đoạn hiện tại + `count` đoạn tiếp theo."""
+        if not self._keys:
+            return []
+        t = time.time() if t is None else float(t)
+        out = []
+        for seg in self._iter_from(self.scope(guild_id), t):
+            out.append(seg)
+            if len(out) > count:
+                break
+        return out
+
+
+_timeline: WeatherTimeline | None = None
+
+
+def get_timeline() -> WeatherTimeline:
+    global _timeline
+    if _timeline is None:
+        _timeline = WeatherTimeline()
+    return _timeline